@@ -5,14 +5,19 @@ __author__ = """Master"""
 __email__ = "roadmasternavi@gmail.com"
 __version__ = "1.4.0"
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import scoped_session
 from sqlalchemy.orm import sessionmaker
 
 from radikopodcast.config import Config
+from radikopodcast.database.engine import LAZY_ENGINE
+from radikopodcast.database.engine import LazyEngine
+from radikopodcast.database.engine import LazyEngineSession
 
+CONFIG: Config = Config()
 # Reason: To follow the official documentation of SQLAlchemy:
 # - Session Basics — SQLAlchemy 2.0 Documentation
 #   https://docs.sqlalchemy.org/en/20/orm/session_basics.html
-Session = scoped_session(sessionmaker(bind=create_engine("sqlite:///programs.db")))  # pylint: disable=invalid-name
-CONFIG: Config = Config()
+# The engine is created from CONFIG.database_url on first use, see: radikopodcast.database.engine
+Session = scoped_session(  # pylint: disable=invalid-name
+    sessionmaker(class_=LazyEngineSession, info={LAZY_ENGINE: LazyEngine(lambda: CONFIG.database_url)}),
+)
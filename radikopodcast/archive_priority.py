@@ -0,0 +1,123 @@
+# Copyright (C) 2026 Master
+"""Priority of archives by the deadline when programs leave the time-free window."""
+
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+from typing import TYPE_CHECKING
+from typing import ClassVar
+
+from radikopodcast.database.models import Station
+from radikopodcast.programaggregate.host_classifier import HOST_CLASS_FAST
+from radikopodcast.programaggregate.host_classifier import HOST_CLASS_SLOW
+from radikopodcast.radiko_datetime import HOUR_BORDER_OF_RADIKO_DATE
+from radikopodcast.radiko_datetime import JST
+from radikopodcast.radiko_datetime import RadikoDate
+from radikopodcast.radiko_datetime import RadikoDatetime
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from datetime import date
+
+    from radikopodcast.database.models import Program
+
+# Archived by the segment pipeline of time-free 30, see: radikopodcast.programaggregate.timefree30
+ARCHIVE_KIND_TIMEFREE30 = "timefree30"
+
+
+@dataclass(frozen=True, order=True)
+class ArchiveDeadline:
+    """Deadline and estimated cost to archive the program, ordered by the slack."""
+
+    # The latest datetime to start archiving the program to finish it before the deadline
+    latest_start_at: datetime
+    deadline: datetime = field(compare=False)
+    cost: timedelta = field(compare=False)
+    kind: str = field(compare=False)
+    program: Program = field(compare=False)
+
+
+class ArchivePriorityQueue:
+    """Orders programs by the least slack, which is the remaining availability time minus the estimated cost.
+
+    The cost is estimated from the duration of the program, since the slow API and the segment pipeline of time-free
+    30 take much longer than the fast host for the same duration.
+    Projects which programs miss their deadline when number_process programs are archived in parallel in this order.
+    """
+
+    # Estimated archive time per program duration
+    COST_RATIOS: ClassVar[dict[str, float]] = {
+        HOST_CLASS_FAST: 0.05,
+        HOST_CLASS_SLOW: 0.5,
+        ARCHIVE_KIND_TIMEFREE30: 0.5,
+    }
+    TIME_FREE_DAYS = 7
+    TIMEFREE30_DAYS = 30
+
+    def __init__(self, *, number_process: int, timefree30: bool = False) -> None:
+        self.number_process = number_process
+        self.timefree30 = timefree30
+        self.heap: list[ArchiveDeadline] = []
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def push_all(self, programs: Iterable[Program], now: datetime) -> None:
+        host_classes: dict[str, str | None] = {}
+        for program in programs:
+            if program.station_id not in host_classes:
+                station = Station.find(program.station_id)
+                host_classes[program.station_id] = None if station is None else station.host_class
+            heapq.heappush(self.heap, self.estimate(program, host_classes[program.station_id], now))
+
+    def pop(self) -> ArchiveDeadline:
+        return heapq.heappop(self.heap)
+
+    def estimate(self, program: Program, host_class: str | None, now: datetime) -> ArchiveDeadline:
+        """Estimate the deadline and the cost of the program, treating stations not classified yet as slow."""
+        ft = self.to_jst(program.ft)
+        radiko_date = RadikoDate.radiko_date(ft)
+        if self.timefree30 and radiko_date < RadikoDatetime.time_free_oldest_date(now):
+            kind = ARCHIVE_KIND_TIMEFREE30
+        else:
+            kind = HOST_CLASS_FAST if host_class == HOST_CLASS_FAST else HOST_CLASS_SLOW
+        cost = (self.to_jst(program.to) - ft) * self.COST_RATIOS[kind]
+        deadline = self.compute_deadline(radiko_date)
+        return ArchiveDeadline(deadline - cost, deadline, cost, kind, program)
+
+    def compute_deadline(self, radiko_date: date) -> datetime:
+        """Return when the program of radiko_date gets removed, see: ProgramSchedule.remove()."""
+        days = self.TIMEFREE30_DAYS if self.timefree30 else self.TIME_FREE_DAYS
+        next_radiko_date = radiko_date + timedelta(days=days + 1)
+        return datetime.combine(next_radiko_date, time(HOUR_BORDER_OF_RADIKO_DATE), tzinfo=JST)
+
+    def project_misses(self, now: datetime, busy_until: Iterable[datetime] = ()) -> list[ArchiveDeadline]:
+        """Return the queued programs which are projected to finish after their deadline.
+
+        Args:
+            now: The datetime when the queued programs get dispatched.
+            busy_until: When each process which is archiving a program gets free.
+        """
+        processes = sorted(busy_until)[: self.number_process]
+        processes += [now] * (self.number_process - len(processes))
+        heapq.heapify(processes)
+        misses = []
+        for archive_deadline in sorted(self.heap):
+            finish_at = max(now, heapq.heappop(processes)) + archive_deadline.cost
+            heapq.heappush(processes, finish_at)
+            if finish_at > archive_deadline.deadline:
+                misses.append(archive_deadline)
+        return misses
+
+    @staticmethod
+    def to_jst(date_time: datetime | None) -> datetime:
+        if date_time is None:
+            message = f"{date_time=}"
+            raise ValueError(message)
+        # Reason: SQLite doesn't store timezone.
+        return date_time.replace(tzinfo=JST)
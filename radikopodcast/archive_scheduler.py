@@ -0,0 +1,114 @@
+# Copyright (C) 2026 Master
+"""Scheduler which runs archives of all programs under shared concurrency limits."""
+
+from __future__ import annotations
+
+from contextlib import ExitStack
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+
+from asynccpu import ProcessTaskPoolExecutor
+from typing_extensions import Self
+
+from radikopodcast.concurrency import DEFAULT_MAX_DISCOVERY_REQUESTS
+from radikopodcast.concurrency import DEFAULT_MAX_SEGMENT_DOWNLOADS
+from radikopodcast.concurrency import ArchiveLimits
+from radikopodcast.concurrency import ArchiveManager
+from radikopodcast.metrics import MetricsConfigurer
+from radikopodcast.tracing import TracingConfigurer
+
+if TYPE_CHECKING:
+    import queue
+    from asyncio import Future
+    from collections.abc import Awaitable
+    from logging import LogRecord
+    from pathlib import Path
+    from queue import Queue
+    from types import TracebackType
+
+    from radikopodcast.metrics import Sample
+
+
+class ArchiveScheduler:
+    """Runs each program in one process pool, bounding discovery requests and segment downloads across programs.
+
+    Programs run in processes up to max_programs, and discovery requests and segment downloads run in the process of
+    their program, limited by slots which the manager process serves to all processes of the pool.
+    When metrics is True, the processes of the pool send their metrics through the queue which the manager process
+    serves, see: radikopodcast.metrics
+    When trace_path is given, the processes of the pool write their tracing spans into it, see: radikopodcast.tracing
+    """
+
+    def __init__(  # noqa: PLR0913  # pylint: disable=too-many-arguments
+        self,
+        *,
+        max_programs: int,
+        max_discovery_requests: int = DEFAULT_MAX_DISCOVERY_REQUESTS,
+        max_segment_downloads: int = DEFAULT_MAX_SEGMENT_DOWNLOADS,
+        # Reason: This argument name is API. pylint: disable=redefined-outer-name
+        queue: queue.Queue[LogRecord] | None = None,
+        configurer: Callable[[], Any] | None = None,
+        metrics: bool = False,
+        trace_path: Path | None = None,
+    ) -> None:
+        self.max_programs = max_programs
+        self.max_discovery_requests = max_discovery_requests
+        self.max_segment_downloads = max_segment_downloads
+        self.queue = queue
+        self.configurer = configurer
+        self.metrics = metrics
+        self.trace_path = trace_path
+        self.exit_stack = ExitStack()
+        self.limits: ArchiveLimits | None = None
+        self.metrics_queue: Queue[Sample] | None = None
+        self.executor: ProcessTaskPoolExecutor | None = None
+
+    def __enter__(self) -> Self:
+        with ExitStack() as exit_stack:
+            manager = exit_stack.enter_context(ArchiveManager())
+            self.limits = ArchiveLimits.create_shared(
+                manager,
+                self.max_discovery_requests,
+                self.max_segment_downloads,
+            )
+            configurer = self.configurer
+            if self.metrics:
+                self.metrics_queue = manager.Queue()
+                configurer = MetricsConfigurer(self.metrics_queue, configurer)
+            if self.trace_path is not None:
+                configurer = TracingConfigurer(self.trace_path, configurer)
+            self.executor = exit_stack.enter_context(
+                ProcessTaskPoolExecutor(
+                    max_workers=self.max_programs,
+                    cancel_tasks_when_shutdown=True,
+                    queue=self.queue,
+                    configurer=configurer,
+                ),
+            )
+            self.exit_stack = exit_stack.pop_all()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> bool | None:
+        self.executor = None
+        self.limits = None
+        self.metrics_queue = None
+        return self.exit_stack.__exit__(exc_type, exc_value, traceback)
+
+    def create_process_task(self, function_coroutine: Callable[..., Awaitable[Any]], *args: Any) -> Future[Any]:  # noqa: ANN401
+        if self.executor is None:
+            message = "ArchiveScheduler is not running."
+            raise RuntimeError(message)
+        # Reason: pylint bug. pylint: disable=no-member
+        return self.executor.create_process_task(function_coroutine, *args)
+
+    def get_limits(self) -> ArchiveLimits:
+        if self.limits is None:
+            message = "ArchiveScheduler is not running."
+            raise RuntimeError(message)
+        return self.limits
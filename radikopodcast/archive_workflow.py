@@ -5,18 +5,32 @@ from __future__ import annotations
 
 import asyncio
 import os
+import shutil
+from datetime import timedelta
 from logging import getLogger
 from typing import TYPE_CHECKING
 
 from radikoplaylist.exceptions import BadHttpStatusCodeError
 from radikoplaylist.exceptions import NoAvailableUrlError
-from requests.exceptions import ConnectionError as RequestsConnectionError
+
+from radikopodcast.metrics import ARCHIVE_RETRIES
+from radikopodcast.metrics import METRICS
+from radikopodcast.programaggregate.segment.directory import SegmentDirectory
+from radikopodcast.programaggregate.segment.retry import TRANSIENT_ERRORS
+from radikopodcast.radiko_datetime import RadikoDatetime
+from radikopodcast.tracing import TRACER
 
 if TYPE_CHECKING:
+    from datetime import datetime
+
     from radikopodcast.database.models import Program
+    from radikopodcast.programaggregate.base import RadikoProgramAggregateToArchive
     from radikopodcast.programaggregate.factory import RadikoProgramAggregateToArchiveFactory
+    from radikopodcast.tracing import SpanContext
 
 MAX_ARCHIVE_RETRY_COUNT = 5
+# Doubled for each attempt, see: RadikoArchiveWorkflow.compute_retry_at
+ARCHIVE_RETRY_BASE_DELAY = timedelta(minutes=3)
 
 
 class RadikoArchiveWorkflow:
@@ -32,8 +46,17 @@ class RadikoArchiveWorkflow:
         self.radiko_program_aggregate_factory = radiko_program_aggregate_factory
         self.stop_if_file_exists = stop_if_file_exists
 
-    async def execute(self, program: Program) -> None:
-        """Archive radiko program."""
+    async def execute(self, program: Program, trace_parent: SpanContext | None = None) -> None:
+        """Archive radiko program.
+
+        Args:
+            program: Program to archive.
+            trace_parent: Span of the program in the parent process, which the spans of this archive are linked to.
+        """
+        with TRACER.span("execute", parent=trace_parent, title=str(program.title)):
+            await self._execute(program)
+
+    async def _execute(self, program: Program) -> None:
         self.logger.debug("Start archive")
         self.logger.debug(
             "program time: %s, station: %s, start: %s, end: %s",
@@ -42,7 +65,13 @@ class RadikoArchiveWorkflow:
             program.ft,
             program.to,
         )
-        program.mark_archiving()
+        if not program.mark_archiving():
+            self.logger.warning(
+                "%s %s is no longer claimed by this archive, skipped.",
+                program.station_id,
+                program.ft_string,
+            )
+            return
         try:
             await self._try_archive(program)
         except FileExistsError:
@@ -50,13 +79,13 @@ class RadikoArchiveWorkflow:
                 raise
             program.mark_failed()
             return
-        except (BadHttpStatusCodeError, NoAvailableUrlError, RequestsConnectionError):
+        except (NoAvailableUrlError, *TRANSIENT_ERRORS):
             return
         program.mark_archived()
 
     async def _try_archive(self, program: Program) -> None:
         try:
-            radiko_program_aggregate = self.radiko_program_aggregate_factory.create(program)
+            radiko_program_aggregate = self._route(program)
             await radiko_program_aggregate.archive()
         except (KeyboardInterrupt, asyncio.CancelledError):
             self.logger.debug("SIGINT for PID=%d", os.getpid())
@@ -70,23 +99,49 @@ class RadikoArchiveWorkflow:
                 program.ft_string,
                 error,
             )
+            self.radiko_program_aggregate_factory.host_classifier.invalidate(program)
             program.mark_failed()
             raise
-        except (BadHttpStatusCodeError, RequestsConnectionError) as error:
+        except TRANSIENT_ERRORS as error:
             self._retry_or_fail(program, error)
             raise
 
+    def _route(self, program: Program) -> RadikoProgramAggregateToArchive:
+        """Create the aggregate of the program, expiring the host class of the station when the host rejected it.
+
+        Errors after routing, for example, of segments, don't expire the host class, which may still be valid.
+        """
+        try:
+            with TRACER.span("route") as span:
+                radiko_program_aggregate = self.radiko_program_aggregate_factory.create(program)
+                span.set_attribute("aggregate", type(radiko_program_aggregate).__name__)
+        except BadHttpStatusCodeError:
+            self.radiko_program_aggregate_factory.host_classifier.invalidate(program)
+            raise
+        return radiko_program_aggregate
+
     def _retry_or_fail(self, program: Program, error: Exception) -> None:
         """Requeue the program for transient errors; mark failed once retries are exhausted."""
-        retry_count = program.mark_retry_or_failed(MAX_ARCHIVE_RETRY_COUNT)
+        retry_at = self.compute_retry_at(program.archive_retry_count + 1)
+        retry_count = program.mark_retry_or_failed(MAX_ARCHIVE_RETRY_COUNT, retry_at)
+        if retry_count is None:
+            self.logger.warning(
+                "%s %s was requeued by another process: %s",
+                program.station_id,
+                program.ft_string,
+                error,
+            )
+            return
         if retry_count < MAX_ARCHIVE_RETRY_COUNT:
+            METRICS.inc(ARCHIVE_RETRIES, reason="transient_error")
             self.logger.warning(
-                "Transient error archiving %s %s: %s (attempt %d/%d, will retry next cycle)",
+                "Transient error archiving %s %s: %s (attempt %d/%d, will retry at %s)",
                 program.station_id,
                 program.ft_string,
                 error,
                 retry_count,
                 MAX_ARCHIVE_RETRY_COUNT,
+                retry_at.isoformat(),
             )
             return
         self.logger.error(
@@ -96,3 +151,11 @@ class RadikoArchiveWorkflow:
             retry_count,
             error,
         )
+        # Reason: The segment directory is kept to resume on retry, see: SegmentDirectory.
+        output_directory = self.radiko_program_aggregate_factory.output_directory
+        shutil.rmtree(SegmentDirectory.build_path(output_directory, program), ignore_errors=True)
+
+    @staticmethod
+    def compute_retry_at(retry_count: int) -> datetime:
+        """Return when to retry the program for retry_count-th time, backing off exponentially."""
+        return RadikoDatetime.now_jst() + ARCHIVE_RETRY_BASE_DELAY * (1 << (retry_count - 1))
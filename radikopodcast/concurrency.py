@@ -0,0 +1,387 @@
+# Copyright (C) 2026 Master
+"""Concurrency limits shared by all in-flight programs."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import partial
+from logging import getLogger
+from multiprocessing.managers import SyncManager
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import Protocol
+from typing import TypeVar
+from urllib.parse import urlparse
+
+import aiohttp
+import ffmpeg
+import psutil
+from radikoplaylist.exceptions import HttpRequestTimeoutError
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+DEFAULT_MAX_DISCOVERY_REQUESTS = 3
+DEFAULT_MAX_SEGMENT_DOWNLOADS = 8
+HTTP_STATUS_TOO_MANY_REQUESTS = 429
+HTTP_STATUS_SERVER_ERROR = 500
+# Reason: To bound the time which the thread keeps waiting after the coroutine was cancelled.
+WAIT_TIMEOUT_SECONDS = 1.0
+
+T = TypeVar("T")
+
+
+class SharedSemaphore(Protocol):
+    """Semaphore which can be shared between processes, for example, the proxy of SharedSlots served by the manager."""
+
+    def acquire(self, holder: int, timeout: float) -> float | None: ...
+
+    def release(self, holder: int) -> None: ...
+
+
+async def acquire_in_thread(acquire: Callable[[], T | None], release: Callable[[], None]) -> T:
+    """Wait in a thread for acquire(), which returns None when it timed out, so that the event loop keeps running.
+
+    The thread keeps waiting after the coroutine was cancelled, so what it acquired then is released by release().
+    """
+    while True:
+        acquiring = asyncio.ensure_future(asyncio.to_thread(acquire))
+        try:
+            acquired = await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            acquiring.add_done_callback(partial(release_if_acquired, release))
+            raise
+        if acquired is not None:
+            return acquired
+
+
+def release_if_acquired(release: Callable[[], None], acquiring: asyncio.Future[Any]) -> None:
+    if not acquiring.cancelled() and acquiring.exception() is None and acquiring.result() is not None:
+        release()
+
+
+class SharedSlots:
+    """Counting semaphore which records the process holding each slot, to be served by the manager process.
+
+    Slots held by processes which died without releasing them, for example, killed by the pool while downloading, are
+    reclaimed when another process waits for a slot.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.holders: Counter[int] = Counter()
+        self.condition = threading.Condition()
+
+    @property
+    def in_flight(self) -> int:
+        return sum(self.holders.values())
+
+    def acquire(self, holder: int, timeout: float) -> float | None:
+        """Acquire a slot for the process holder, return when it acquired, or None when no slot was free in timeout."""
+        with self.condition:
+            if not self.condition.wait_for(self.is_available, timeout):
+                return None
+            self.holders[holder] += 1
+            return time.monotonic()
+
+    def release(self, holder: int) -> None:
+        with self.condition:
+            self.holders[holder] -= 1
+            if self.holders[holder] <= 0:
+                del self.holders[holder]
+            self.condition.notify()
+
+    def is_available(self) -> bool:
+        if self.in_flight < self.limit:
+            return True
+        for holder in [holder for holder in self.holders if not psutil.pid_exists(holder)]:
+            getLogger(__name__).warning("Reclaimed %d slots of the dead process: %d", self.holders[holder], holder)
+            del self.holders[holder]
+        return self.in_flight < self.limit
+
+
+class ConcurrencyLimiter:
+    """Limits the number of concurrent operations in the process, and across processes when semaphore is given.
+
+    The shared semaphore is waited for in a thread so that the event loop keeps running, and only up to limit
+    coroutines of each process wait for it at the same time.
+    """
+
+    def __init__(self, limit: int, semaphore: SharedSemaphore | None = None) -> None:
+        if limit < 1:
+            message = f"{limit=}"
+            raise ValueError(message)
+        self.limit = limit
+        self.semaphore = semaphore
+        self.local_semaphore: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Reason: asyncio.Semaphore belongs to the event loop of the process, and can't be pickled.
+        return {**self.__dict__, "local_semaphore": None}
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        async with self.get_local_semaphore():
+            if self.semaphore is None:
+                yield
+                return
+            holder = os.getpid()
+            await acquire_in_thread(
+                partial(self.semaphore.acquire, holder, WAIT_TIMEOUT_SECONDS),
+                partial(self.semaphore.release, holder),
+            )
+            try:
+                yield
+            finally:
+                self.semaphore.release(holder)
+
+    def get_local_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self.local_semaphore is None or self.local_semaphore[0] is not loop:
+            self.local_semaphore = (loop, asyncio.Semaphore(self.limit))
+        return self.local_semaphore[1]
+
+
+def is_overloaded(error: BaseException) -> bool:
+    """Return whether error means the host is overloaded: 429/5xx, timeouts or connection errors.
+
+    The error raised from the original error, for example, BadHttpStatusCodeError from ClientResponseError, is
+    classified by the original error.
+    """
+    for cause in (error, error.__cause__):
+        if isinstance(cause, aiohttp.ClientResponseError):
+            return cause.status == HTTP_STATUS_TOO_MANY_REQUESTS or cause.status >= HTTP_STATUS_SERVER_ERROR
+        if isinstance(
+            cause,
+            (
+                asyncio.TimeoutError,
+                aiohttp.ClientConnectionError,
+                HttpRequestTimeoutError,
+                RequestsConnectionError,
+                ffmpeg.Error,
+            ),
+        ):
+            return True
+    return False
+
+
+@dataclass(frozen=True)
+class HostConcurrencyStats:
+    """Current window and observed latency of the requests to the host, for monitoring."""
+
+    host: str
+    window: float
+    latency: float | None
+    in_flight: int
+
+
+class AdaptiveConcurrencyLimiter(SharedSlots):
+    """Limits concurrent requests to a host by AIMD (additive increase, multiplicative decrease).
+
+    The window grows by one for each window of requests which succeeded while the smoothed latency stays within
+    LATENCY_TOLERANCE times the lowest latency observed, and is halved when the host looks overloaded.
+    Failures of the requests which started before the previous decrease don't decrease the window again, so that a
+    burst of failures halves the window only once.
+    """
+
+    INITIAL_WINDOW = 3
+    DECREASE_FACTOR = 0.5
+    LATENCY_TOLERANCE = 2.0
+    LATENCY_SMOOTHING = 0.2
+
+    def __init__(self, host: str, max_window: int, min_window: int = 1) -> None:
+        self.host = host
+        self.max_window = max_window
+        self.min_window = min_window
+        self.window = float(max(min_window, min(self.INITIAL_WINDOW, max_window)))
+        super().__init__(int(self.window))
+        self.latency: float | None = None
+        self.min_latency: float | None = None
+        self.decreased_at = 0.0
+        self.logger = getLogger(__name__)
+
+    def increase(self, latency: float) -> None:
+        with self.condition:
+            self.latency = (
+                latency if self.latency is None else self.latency + self.LATENCY_SMOOTHING * (latency - self.latency)
+            )
+            self.min_latency = latency if self.min_latency is None else min(self.min_latency, latency)
+            if self.latency > self.min_latency * self.LATENCY_TOLERANCE:
+                return
+            window = min(float(self.max_window), self.window + 1 / self.window)
+            if int(window) > int(self.window):
+                self.logger.debug("Increased window of %s: %d (latency: %.3fs)", self.host, int(window), self.latency)
+            self.set_window(window)
+
+    def decrease(self, started_at: float) -> None:
+        with self.condition:
+            if started_at < self.decreased_at:
+                return
+            self.set_window(max(float(self.min_window), self.window * self.DECREASE_FACTOR))
+            self.decreased_at = time.monotonic()
+            self.logger.warning("Decreased window of %s: %d", self.host, int(self.window))
+
+    def set_window(self, window: float) -> None:
+        with self.condition:
+            self.window = window
+            self.limit = int(window)
+            self.condition.notify_all()
+
+    def get_stats(self) -> HostConcurrencyStats:
+        with self.condition:
+            return HostConcurrencyStats(self.host, self.window, self.latency, self.in_flight)
+
+
+class HostWindows:
+    """Adaptive limiters for each host, which are created on the first request to the host.
+
+    The manager process serves them to all processes of the pool, so that a backoff which a program observed shrinks
+    the window of the other programs as well.
+    """
+
+    def __init__(self, max_window: int) -> None:
+        self.max_window = max_window
+        self.limiters: dict[str, AdaptiveConcurrencyLimiter] = {}
+        self.lock = threading.Lock()
+
+    def __reduce__(self) -> tuple[type[HostWindows], tuple[int]]:
+        # Reason: Windows which the manager doesn't serve are adapted in each process, and locks can't be pickled.
+        return (HostWindows, (self.max_window,))
+
+    def acquire(self, host: str, holder: int, timeout: float) -> float | None:
+        return self.get(host).acquire(holder, timeout)
+
+    def release(self, host: str, holder: int) -> None:
+        self.get(host).release(holder)
+
+    def increase(self, host: str, started_at: float) -> None:
+        self.get(host).increase(time.monotonic() - started_at)
+
+    def decrease(self, host: str, started_at: float) -> None:
+        self.get(host).decrease(started_at)
+
+    def get(self, host: str) -> AdaptiveConcurrencyLimiter:
+        with self.lock:
+            limiter = self.limiters.get(host)
+            if limiter is None:
+                limiter = self.limiters[host] = AdaptiveConcurrencyLimiter(host, self.max_window)
+            return limiter
+
+    def get_stats(self) -> list[HostConcurrencyStats]:
+        with self.lock:
+            limiters = list(self.limiters.values())
+        return [limiter.get_stats() for limiter in limiters]
+
+
+class HostConcurrencyLimiters:
+    """Limits concurrent requests to each host by the windows, which are shared across processes when given.
+
+    Only up to max_window coroutines of each process wait for the window of each host at the same time, since each of
+    them occupies a thread of the default executor while it waits.
+    """
+
+    def __init__(self, max_window: int, windows: HostWindows | None = None) -> None:
+        self.max_window = max_window
+        self.windows = windows or HostWindows(max_window)
+        self.local_semaphores: tuple[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]] | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Reason: asyncio.Semaphore belongs to the event loop of the process, and can't be pickled.
+        return {**self.__dict__, "local_semaphores": None}
+
+    @asynccontextmanager
+    async def acquire(self, url: str) -> AsyncIterator[None]:
+        """Acquire the limiter of the host of url."""
+        host = urlparse(url).netloc
+        async with self.get_local_semaphore(host), self.acquire_window(host):
+            yield
+
+    @asynccontextmanager
+    async def acquire_window(self, host: str) -> AsyncIterator[None]:
+        holder = os.getpid()
+        started_at = await acquire_in_thread(
+            partial(self.windows.acquire, host, holder, WAIT_TIMEOUT_SECONDS),
+            partial(self.windows.release, host, holder),
+        )
+        try:
+            yield
+        except BaseException as error:
+            if is_overloaded(error):
+                self.windows.decrease(host, started_at)
+            raise
+        else:
+            self.windows.increase(host, started_at)
+        finally:
+            self.windows.release(host, holder)
+
+    def get_local_semaphore(self, host: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self.local_semaphores is None or self.local_semaphores[0] is not loop:
+            self.local_semaphores = (loop, {})
+        semaphores = self.local_semaphores[1]
+        semaphore = semaphores.get(host)
+        if semaphore is None:
+            semaphore = semaphores[host] = asyncio.Semaphore(self.max_window)
+        return semaphore
+
+    def get_stats(self) -> list[HostConcurrencyStats]:
+        return self.windows.get_stats()
+
+
+class ArchiveManager(SyncManager):
+    """SyncManager which also serves SharedSlots and HostWindows."""
+
+    SharedSlots: Callable[[int], SharedSemaphore]
+    HostWindows: Callable[[int], HostWindows]
+
+
+ArchiveManager.register("SharedSlots", SharedSlots)
+ArchiveManager.register("HostWindows", HostWindows)
+
+
+@dataclass(frozen=True)
+class ArchiveLimits:
+    """Limits of discovery requests and segment downloads shared by all in-flight programs.
+
+    In addition, requests to each host are limited by the window adapted to the responses which the host returned.
+    """
+
+    discovery_requests: ConcurrencyLimiter
+    segment_downloads: ConcurrencyLimiter
+    hosts: HostConcurrencyLimiters
+
+    @classmethod
+    def create_local(
+        cls,
+        max_discovery_requests: int = DEFAULT_MAX_DISCOVERY_REQUESTS,
+        max_segment_downloads: int = DEFAULT_MAX_SEGMENT_DOWNLOADS,
+    ) -> ArchiveLimits:
+        """Create limits which bound each process independently."""
+        return cls(
+            ConcurrencyLimiter(max_discovery_requests),
+            ConcurrencyLimiter(max_segment_downloads),
+            HostConcurrencyLimiters(max(max_discovery_requests, max_segment_downloads)),
+        )
+
+    @classmethod
+    def create_shared(
+        cls,
+        manager: ArchiveManager,
+        max_discovery_requests: int = DEFAULT_MAX_DISCOVERY_REQUESTS,
+        max_segment_downloads: int = DEFAULT_MAX_SEGMENT_DOWNLOADS,
+    ) -> ArchiveLimits:
+        """Create limits which bound all processes together, by slots and windows served by manager."""
+        max_window = max(max_discovery_requests, max_segment_downloads)
+        return cls(
+            ConcurrencyLimiter(max_discovery_requests, manager.SharedSlots(max_discovery_requests)),
+            ConcurrencyLimiter(max_segment_downloads, manager.SharedSlots(max_segment_downloads)),
+            HostConcurrencyLimiters(max_window, manager.HostWindows(max_window)),
+        )
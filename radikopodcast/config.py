@@ -17,7 +17,34 @@ class Config(YamlDataClassConfig):
     # Reason: To use auto complete
     area_id: str = "JP13"
     number_process: int = 3
+    # Shared by all in-flight programs, see: radikopodcast.archive_scheduler
+    max_discovery_requests: int = 3
+    max_segment_downloads: int = 8
+    # Programs over the caps are deferred, see: radikopodcast.dispatch_caps
+    max_programs_per_station: int = 2
+    max_programs_per_host: int = 2
     stop_if_file_exists: bool = False
     keywords: list[str] = field(default_factory=list)
+    # "ffmpeg" or "aiohttp", see: radikopodcast.programaggregate.segment.downloader_factory
+    segment_downloader: str = "ffmpeg"
+    # "chunk" or "coverage", see: radikopodcast.programaggregate.segment.discovery_factory
+    segment_discovery: str = "chunk"
+    # "concat" or "stream", see: radikopodcast.programaggregate.segment.muxer
+    segment_muxer: str = "concat"
     # Reason: To use auto complete by YamlDataClassConfig
     radiko_session: Optional[str] = None  # noqa: UP045
+    # "DEBUG", "INFO", "WARNING" or "ERROR", see: radikopodcast.logging_pipeline
+    log_level: str = "INFO"
+    # Port of the local HTTP endpoint of metrics in Prometheus text format, see: radikopodcast.metrics
+    # Reason: To use auto complete by YamlDataClassConfig
+    metrics_port: Optional[int] = None  # noqa: UP045
+    # JSON lines file of tracing spans in OTLP/JSON, see: radikopodcast.tracing
+    # Reason: To use auto complete by YamlDataClassConfig
+    trace_path: Optional[str] = None  # noqa: UP045
+    # URL of the database, which defaults to "sqlite:///programs.db", see: radikopodcast.database.engine
+    # Nodes share the database of the URL, for example, "postgresql://host/radikopodcast", see: radikopodcast.node_lease
+    # Reason: To use auto complete by YamlDataClassConfig
+    database_url: Optional[str] = None  # noqa: UP045
+    # Owner of leases, which defaults to "hostname:PID"
+    # Reason: To use auto complete by YamlDataClassConfig
+    node_id: Optional[str] = None  # noqa: UP045
@@ -0,0 +1,135 @@
+# Copyright (C) 2026 Master
+"""Recovery of programs which a killed process left archiving or suspended."""
+
+from __future__ import annotations
+
+import asyncio
+import shutil
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+from radikopodcast.archive_workflow import MAX_ARCHIVE_RETRY_COUNT
+from radikopodcast.database.models import ArchiveStatusId
+from radikopodcast.database.models import Program
+from radikopodcast.metrics import ARCHIVE_RETRIES
+from radikopodcast.metrics import METRICS
+from radikopodcast.node_lease import NodeLeases
+from radikopodcast.programaggregate.segment.directory import SegmentDirectory
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Collection
+    from datetime import datetime
+
+    from radikopodcast.output_directory import OutputDirectory
+
+
+class CrashRecovery:
+    """Requeues programs whose archive process is gone, for example, killed by OOM killer.
+
+    A program is stale when it is archiving or suspended, its lease expired, and its heartbeat, which the owner updates
+    with the lease, is older than STALE_AFTER.
+    Before requeued, the program is reconciled with the output directory: the output file is removed since it wasn't
+    marked archived, so it may be partially written, while the segment directory is kept, so that the next attempt
+    resumes only the missing segments.
+    Killed archives count as attempts, so that a program which kills its process every time is marked failed
+    eventually, while suspended archives, which were interrupted by the user, don't.
+    Programs which this node, the owner, is still archiving aren't stale even when their leases expired, for example,
+    while the event loop stalled past the lease, since their child processes are still writing the output files.
+    """
+
+    STALE_AFTER = NodeLeases.LEASE_DURATION
+    INTERVAL_SECONDS = NodeLeases.HEARTBEAT_INTERVAL_SECONDS
+
+    def __init__(
+        self,
+        output_directory: OutputDirectory,
+        max_retry_count: int = MAX_ARCHIVE_RETRY_COUNT,
+        *,
+        owner: str | None = None,
+    ) -> None:
+        self.output_directory = output_directory
+        self.max_retry_count = max_retry_count
+        self.owner = owner
+        self.logger = getLogger(__name__)
+
+    def recover(self, now: datetime | None = None, in_flight: Collection[int] = ()) -> int:
+        """Requeue stale programs, return the number of them.
+
+        Args:
+            now: Current datetime in naive UTC.
+            in_flight: IDs of the programs which this node is archiving.
+        """
+        now = NodeLeases.now() if now is None else now
+        suspended_programs: list[Program] = []
+        count = 0
+        for program in self.find_stale(now, in_flight):
+            # Reason: Another node may be recovering the program.
+            if not program.take_over(now):
+                continue
+            self.reconcile(program)
+            count += 1
+            if program.archive_status == ArchiveStatusId.SUSPENDED.value:
+                suspended_programs.append(program)
+                continue
+            self.requeue(program)
+        self.requeue_suspended(suspended_programs)
+        return count
+
+    def find_stale(self, now: datetime, in_flight: Collection[int]) -> list[Program]:
+        return [
+            program
+            for program in Program.find_stale(now, now - self.STALE_AFTER)
+            if not (program.lease_owner == self.owner and program.id in in_flight)
+        ]
+
+    def reconcile(self, program: Program) -> None:
+        """Remove the partially written output file, keep segments to resume."""
+        output_file_path = self.output_directory.build_file_path(program)
+        if output_file_path.exists():
+            self.logger.warning("Removed partial output file: %s", output_file_path)
+            output_file_path.unlink()
+        segment_directory_path = SegmentDirectory.build_path(self.output_directory, program)
+        if segment_directory_path.exists():
+            self.logger.info("Resume from segment directory: %s", segment_directory_path)
+
+    def requeue_suspended(self, programs: list[Program]) -> None:
+        """Mark suspended programs archivable by one UPDATE."""
+        marked_ids = Program.mark_all((program.id for program in programs), ArchiveStatusId.ARCHIVABLE)
+        for program in programs:
+            if program.id in marked_ids:
+                METRICS.inc(ARCHIVE_RETRIES, reason="suspended")
+                self.logger.warning("Requeued suspended program: %s %s", program.station_id, program.ft_string)
+
+    def requeue(self, program: Program) -> None:
+        retry_count = program.mark_retry_or_failed(self.max_retry_count)
+        if retry_count is None:
+            return
+        if retry_count < self.max_retry_count:
+            METRICS.inc(ARCHIVE_RETRIES, reason="crashed")
+            self.logger.warning(
+                "Requeued program left archiving: %s %s (attempt %d/%d)",
+                program.station_id,
+                program.ft_string,
+                retry_count,
+                self.max_retry_count,
+            )
+            return
+        self.logger.error(
+            "Giving up archiving %s %s after %d attempts left archiving",
+            program.station_id,
+            program.ft_string,
+            retry_count,
+        )
+        shutil.rmtree(SegmentDirectory.build_path(self.output_directory, program), ignore_errors=True)
+
+    async def run_periodically(
+        self,
+        on_recovered: Callable[[], None],
+        get_in_flight: Callable[[], Collection[int]] = tuple,
+    ) -> None:
+        """Recover every INTERVAL_SECONDS, calling on_recovered when programs were requeued."""
+        while True:
+            await asyncio.sleep(self.INTERVAL_SECONDS)
+            if self.recover(in_flight=get_in_flight()):
+                on_recovered()
@@ -5,19 +5,43 @@ from logging import getLogger
 from typing import TYPE_CHECKING
 from typing import cast
 
+from sqlalchemy import bindparam
+from sqlalchemy import delete
 from sqlalchemy import inspect
+from sqlalchemy import select
 from sqlalchemy import text
+from sqlalchemy import update
 
 from radikopodcast import Session
 from radikopodcast.database.models import Base
+from radikopodcast.database.models import Keyword
+from radikopodcast.database.models import Program
+from radikopodcast.database.models import ProgramKeyword
+from radikopodcast.database.title_search import TitleSearch
+from radikopodcast.keyword_matcher import KeywordMatcher
 
 if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection
     from sqlalchemy.engine import Engine
 
 
 class Database:
     """Database."""
 
+    # Table name, column name, and column definition of columns added after the first release
+    MIGRATION_COLUMNS = (
+        ("programs", "archive_retry_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("programs", "archive_retry_at", "DATETIME"),
+        ("programs", "lease_owner", "VARCHAR(255)"),
+        ("programs", "lease_expires_at", "DATETIME"),
+        ("programs", "archive_updated_at", "DATETIME"),
+        ("programs", "title_normalized", "TEXT"),
+        ("stations", "host_class", "VARCHAR(255)"),
+        ("stations", "host_classified_at", "DATETIME"),
+        ("stations", "host_confidence", "INTEGER NOT NULL DEFAULT 0"),
+        ("stations", "playlist_host", "VARCHAR(255)"),
+    )
+
     def __init__(self) -> None:
         self.logger = getLogger(__name__)
         engine = Session.get_bind()
@@ -34,12 +58,50 @@ class Database:
 
     @staticmethod
     def migrate_database() -> None:
-        """Add columns introduced after the database file was created."""
+        """Add tables and columns introduced after the database file was created."""
         engine = Session.get_bind()
-        column_names = {column["name"] for column in inspect(engine).get_columns("programs")}
-        if "archive_retry_count" in column_names:
-            return
+        # pylint: disable=no-member
+        Base.metadata.create_all(engine)
+        inspector = inspect(engine)
         # Reason: Session.get_bind() is typed as Engine | Connection, but this Session is always
         # bound to an Engine (see radikopodcast/__init__.py), so narrow the type for engine.begin().
         with cast("Engine", engine).begin() as connection:
-            connection.execute(text("ALTER TABLE programs ADD COLUMN archive_retry_count INTEGER NOT NULL DEFAULT 0"))
+            for table_name, column_name, definition in Database.MIGRATION_COLUMNS:
+                column_names = {column["name"] for column in inspector.get_columns(table_name)}
+                if column_name in column_names:
+                    continue
+                connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}"))
+            Database.migrate_normalized_titles(connection)
+            Database.migrate_indexes(connection)
+
+    @staticmethod
+    def migrate_normalized_titles(connection: "Connection") -> None:
+        """Normalize titles of programs ingested before titles were normalized, then match keywords again."""
+        programs = connection.execute(
+            select(Program.id, Program.title).where(Program.title_normalized.is_(None), Program.title.is_not(None)),
+        ).all()
+        if not programs:
+            return
+        connection.execute(
+            update(Program)
+            .where(Program.id == bindparam("program_id"))
+            .values(title_normalized=bindparam("normalized")),
+            # Reason: Titles are selected only when they aren't null.
+            [
+                {"program_id": program_id, "normalized": KeywordMatcher.normalize(cast("str", title))}
+                for program_id, title in programs
+            ],
+        )
+        # Reason: Keywords were matched with titles which weren't normalized, they are registered again on search.
+        connection.execute(delete(ProgramKeyword))
+        connection.execute(delete(Keyword))
+
+    @staticmethod
+    def migrate_indexes(connection: "Connection") -> None:
+        """Create indexes introduced after the database file was created, including the full-text index of titles."""
+        # pylint: disable=no-member
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+        if TitleSearch.is_supported(connection) and not inspect(connection).has_table(TitleSearch.TABLE):
+            TitleSearch.create(connection)
@@ -0,0 +1,118 @@
+# Copyright (C) 2026 Master
+"""Database engine, which is created on first use with the connection settings for parallel archiving."""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+
+from sqlalchemy import create_engine
+from sqlalchemy import event
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.orm import Session as SQLAlchemySession
+
+if TYPE_CHECKING:
+    from sqlite3 import Connection as SQLiteConnection
+
+    from sqlalchemy.engine import Connection
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.pool import ConnectionPoolEntry
+    from sqlalchemy.pool import PoolProxiedConnection
+
+DEFAULT_DATABASE_URL = "sqlite:///programs.db"
+# Key of Session.info which holds LazyEngine
+LAZY_ENGINE = "lazy_engine"
+
+
+class SQLitePragmas:
+    """Pragmas which each SQLite connection runs when it opens.
+
+    WAL lets processes read while another process writes, and NORMAL synchronous doesn't fsync on each commit in WAL
+    mode, which is still safe against crashes of processes.
+    The busy timeout makes a writer wait for the lock instead of raising "database is locked" at once.
+    """
+
+    BUSY_TIMEOUT_MILLISECONDS = 30000
+    MMAP_SIZE = 256 * 1024 * 1024
+
+    @classmethod
+    def execute(cls, dbapi_connection: SQLiteConnection, _connection_record: ConnectionPoolEntry) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={cls.BUSY_TIMEOUT_MILLISECONDS:d}")
+            cursor.execute(f"PRAGMA mmap_size={cls.MMAP_SIZE:d}")
+        finally:
+            cursor.close()
+
+
+class ForkGuard:
+    """Discards pooled connections which were opened by another process.
+
+    Child processes of ProcessTaskPoolExecutor are forked with the pool of the parent process, and a connection used
+    by two processes corrupts its state, so that a child process opens its own connections instead, see:
+    - Using Connection Pools with Multiprocessing or os.fork() — SQLAlchemy 2.0 Documentation
+      https://docs.sqlalchemy.org/en/20/core/pooling.html#using-connection-pools-with-multiprocessing-or-os-fork
+    """
+
+    @staticmethod
+    def connect(_dbapi_connection: object, connection_record: ConnectionPoolEntry) -> None:
+        connection_record.info["pid"] = os.getpid()
+
+    @staticmethod
+    def checkout(
+        _dbapi_connection: object,
+        connection_record: ConnectionPoolEntry,
+        connection_proxy: PoolProxiedConnection,
+    ) -> None:
+        pid = os.getpid()
+        if connection_record.info["pid"] == pid:
+            return
+        # Reason: To leave the connection open for the process which opened it.
+        # The interfaces are typed as read-only, though the implementations allow it as the documentation does.
+        connection_record.dbapi_connection = connection_proxy.dbapi_connection = None  # type: ignore[misc]
+        message = (
+            f"Connection record belongs to pid {connection_record.info['pid']}, attempting to check out in pid {pid}"
+        )
+        raise DisconnectionError(message)
+
+
+def create_database_engine(url: str) -> Engine:
+    """Create the engine of the URL, which runs SQLitePragmas on SQLite and is guarded by ForkGuard."""
+    engine = create_engine(url)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", SQLitePragmas.execute)
+    event.listen(engine, "connect", ForkGuard.connect)
+    event.listen(engine, "checkout", ForkGuard.checkout)
+    return engine
+
+
+class LazyEngine:
+    """Engine which is created on first use from the URL get_url returns, or DEFAULT_DATABASE_URL.
+
+    So that the URL in the configuration which is loaded after import takes effect.
+    """
+
+    def __init__(self, get_url: Callable[[], str | None]) -> None:
+        self.get_url = get_url
+        self.engine: Engine | None = None
+        self.lock = threading.Lock()
+
+    def get(self) -> Engine:
+        with self.lock:
+            if self.engine is None:
+                self.engine = create_database_engine(self.get_url() or DEFAULT_DATABASE_URL)
+            return self.engine
+
+
+class LazyEngineSession(SQLAlchemySession):
+    """Session which binds LazyEngine in its info unless an engine is bound by Session.configure()."""
+
+    def get_bind(self, mapper: Any = None, **kwargs: Any) -> Engine | Connection:  # noqa: ANN401
+        if self.bind is None and LAZY_ENGINE in self.info:
+            self.bind = self.info[LAZY_ENGINE].get()
+        return super().get_bind(mapper, **kwargs)
@@ -5,9 +5,10 @@ from __future__ import annotations
 
 # Reason: To prevent following error:
 #   E   sqlalchemy.orm.exc.MappedAnnotationError: Could not resolve all types within mapped annotation: "Mapped[datetime.datetime | None]".  Ensure all types are written correctly and are imported within the module in use.
-import datetime  # noqa: TC003
+import datetime
 from abc import abstractmethod
 from enum import IntEnum
+from logging import getLogger
 from typing import TYPE_CHECKING
 from typing import Generic
 from typing import Optional
@@ -16,13 +17,24 @@ from typing import cast
 
 from inflector import Inflector
 from sqlalchemy import DATETIME
+from sqlalchemy import Index
 from sqlalchemy import Integer
 from sqlalchemy import String
+from sqlalchemy import Text
 from sqlalchemy import and_
+from sqlalchemy import case
+from sqlalchemy import delete
+from sqlalchemy import event
 from sqlalchemy import func
+from sqlalchemy import insert
 from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import Session as SQLAlchemySession
 from sqlalchemy.orm import declared_attr
 from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationship
@@ -32,14 +44,25 @@ from sqlalchemy.sql.sqltypes import DATE
 from sqlalchemy.sql.sqltypes import INTEGER
 
 from radikopodcast.database.session_manager import SessionManager
+from radikopodcast.database.title_search import TitleSearch
+from radikopodcast.keyword_matcher import KeywordMatcher
+from radikopodcast.radiko_datetime import JST
+from radikopodcast.radiko_datetime import TIME_FREE_AVAILABILITY_DELAY
 from radikopodcast.radiko_datetime import RadikoDatetime
 from radikopodcast.radikoxml.xml_parser import XmlParser
 from radikopodcast.radikoxml.xml_parser import XmlParserProgram
 from radikopodcast.radikoxml.xml_parser import XmlParserStation
+from radikopodcast.tracing import TRACER
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
 
+    from sqlalchemy import ColumnElement
+    from sqlalchemy import Select
+    from sqlalchemy import Update
+    from sqlalchemy.engine import Connection
+    from sqlalchemy.orm import UOWTransaction
+
 
 class ArchiveStatusId(IntEnum):
     """This class implements file for CSV convert id on database."""
@@ -51,6 +74,18 @@ class ArchiveStatusId(IntEnum):
     ARCHIVED = 4
 
 
+# Statuses which each status can be marked from, so that a process which lost its program, for example, to
+# radikopodcast.crash_recovery, can't overwrite the status which another process marked.
+# Archivable programs become archiving only by Program.claim(), which leases them to the node.
+MARKABLE_FROM = {
+    ArchiveStatusId.ARCHIVABLE: (ArchiveStatusId.ARCHIVING, ArchiveStatusId.SUSPENDED),
+    ArchiveStatusId.ARCHIVING: (ArchiveStatusId.ARCHIVING,),
+    ArchiveStatusId.SUSPENDED: (ArchiveStatusId.ARCHIVING,),
+    ArchiveStatusId.FAILED: (ArchiveStatusId.ARCHIVING,),
+    ArchiveStatusId.ARCHIVED: (ArchiveStatusId.ARCHIVING,),
+}
+
+
 # Reason: To follow SQLAlchemy 2.0 style of declarative mapping:
 # - Declarative Mapping Styles — SQLAlchemy 2.0 Documentation
 #   https://docs.sqlalchemy.org/en/20/orm/declarative_styles.html
@@ -106,11 +141,56 @@ class Station(ModelInitByXml[XmlParserStation]):
     list_program: Mapped[list[Program]] = relationship("Program", backref="station")
     # Reason: To allow null in Python 3.9 with SQLAlchemy 2
     transfer_target: Mapped[Optional[str]] = mapped_column(String(255))  # noqa: UP045
+    # "fast" or "slow", see: radikopodcast.programaggregate.host_classifier
+    # Reason: To allow null in Python 3.9 with SQLAlchemy 2
+    host_class: Mapped[Optional[str]] = mapped_column(String(255))  # noqa: UP045
+    # Reason: To allow null in Python 3.9 with SQLAlchemy 2
+    host_classified_at: Mapped[Optional[datetime.datetime]] = mapped_column(DATETIME)  # noqa: UP045
+    # Host which served the media playlist when the host class was observed
+    # Reason: To allow null in Python 3.9 with SQLAlchemy 2
+    playlist_host: Mapped[Optional[str]] = mapped_column(String(255))  # noqa: UP045
+    # Number of times the same host class was observed in a row
+    host_confidence: Mapped[int] = mapped_column(INTEGER, nullable=False, default=0, server_default="0")
 
     def init(self, xml_parser: XmlParserStation) -> None:
         # Reason: "id" meets requirement of snake_case. pylint: disable=invalid-name
         self.id = xml_parser.id
         self.name = xml_parser.name
+        self.host_confidence = 0
+
+    @staticmethod
+    def find(station_id: str) -> Station | None:
+        with SessionManager() as session:
+            return session.get(Station, station_id)
+
+    @staticmethod
+    def record_host_class(
+        station_id: str,
+        host_class: str,
+        classified_at: datetime.datetime,
+        max_confidence: int,
+        playlist_host: str | None = None,
+    ) -> None:
+        """Record the observed host class, raising the confidence when it is the same as the previous one."""
+        with SessionManager() as session:
+            station = session.query(Station).with_for_update().filter_by(id=station_id).one_or_none()
+            if station is None:
+                return
+            station.host_confidence = (
+                min(station.host_confidence + 1, max_confidence) if station.host_class == host_class else 1
+            )
+            station.host_class = host_class
+            station.host_classified_at = classified_at
+            station.playlist_host = playlist_host
+            session.commit()
+
+    @staticmethod
+    def expire_host_class(station_id: str) -> None:
+        """Expire the host class to revalidate it on the next dispatch."""
+        with SessionManager() as session, session.begin():
+            session.execute(
+                update(Station).where(Station.id == station_id).values(host_classified_at=None, host_confidence=0),
+            )
 
     @staticmethod
     def is_empty() -> bool:
@@ -126,6 +206,8 @@ class Station(ModelInitByXml[XmlParserStation]):
 class Program(ModelInitByXml[XmlParserProgram]):
     """Program of radiko."""
 
+    # Reason: To find archivable programs in the order of ft by the index.
+    __table_args__ = (Index("ix_programs_archive_status_ft", "archive_status", "ft"),)
     # Reason: Model. pylint: disable=too-many-instance-attributes
     id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True)
     # The id in the radiko API is not unique...
@@ -137,6 +219,9 @@ class Program(ModelInitByXml[XmlParserProgram]):
     ft: Mapped[Optional[datetime.datetime]] = mapped_column(DATETIME)  # noqa: UP045
     # Reason: To allow null in Python 3.9 with SQLAlchemy 2
     title: Mapped[Optional[str]] = mapped_column(String(255))  # noqa: UP045
+    # Title normalized by KeywordMatcher.normalize() to match keywords, indexed by TitleSearch
+    # Reason: To allow null in Python 3.9 with SQLAlchemy 2
+    title_normalized: Mapped[Optional[str]] = mapped_column(Text)  # noqa: UP045
     station_id: Mapped[str] = mapped_column(String(255), ForeignKey("stations.id"), nullable=False)
     # Reason: To allow null in Python 3.9 with SQLAlchemy 2
     date: Mapped[Optional[datetime.date]] = mapped_column(DATE)  # noqa: UP045
@@ -145,6 +230,19 @@ class Program(ModelInitByXml[XmlParserProgram]):
     # Reason: To allow null in Python 3.9 with SQLAlchemy 2
     archive_status: Mapped[Optional[int]] = mapped_column(INTEGER)  # noqa: UP045
     archive_retry_count: Mapped[int] = mapped_column(INTEGER, nullable=False, default=0, server_default="0")
+    # In JST as well as ft and to, since SQLite doesn't store timezone
+    # Reason: To allow null in Python 3.9 with SQLAlchemy 2
+    archive_retry_at: Mapped[Optional[datetime.datetime]] = mapped_column(DATETIME)  # noqa: UP045
+    # Node which claimed the program while archiving, see: radikopodcast.node_lease
+    # Reason: To allow null in Python 3.9 with SQLAlchemy 2
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(255))  # noqa: UP045
+    # In UTC, since SQLite doesn't store timezone
+    # Reason: To allow null in Python 3.9 with SQLAlchemy 2
+    lease_expires_at: Mapped[Optional[datetime.datetime]] = mapped_column(DATETIME)  # noqa: UP045
+    # Heartbeat of the archive, updated on each status change and lease renewal, see: radikopodcast.crash_recovery
+    # In UTC, since SQLite doesn't store timezone
+    # Reason: To allow null in Python 3.9 with SQLAlchemy 2
+    archive_updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DATETIME)  # noqa: UP045
 
     def init(self, xml_parser: XmlParserProgram) -> None:
         # Reason: "id" meets requirement of snake_case.
@@ -154,50 +252,252 @@ class Program(ModelInitByXml[XmlParserProgram]):
         # Reason: "to" meets requirement of snake_case.
         self.to = xml_parser.to  # pylint: disable=invalid-name
         self.title = xml_parser.title
+        self.title_normalized = None if self.title is None else KeywordMatcher.normalize(self.title)
         self.station_id = xml_parser.station_id
         self.date = xml_parser.date
         self.area_id = xml_parser.area_id
         self.archive_status = ArchiveStatusId.ARCHIVABLE.value
         self.archive_retry_count = 0
 
-    def mark_archivable(self) -> None:
-        Program.mark(self, ArchiveStatusId.ARCHIVABLE)
+    def mark_archivable(self) -> bool:
+        return Program.mark(self, ArchiveStatusId.ARCHIVABLE)
+
+    def mark_archiving(self) -> bool:
+        return Program.mark(self, ArchiveStatusId.ARCHIVING)
 
-    def mark_archiving(self) -> None:
-        Program.mark(self, ArchiveStatusId.ARCHIVING)
+    def mark_suspended(self) -> bool:
+        return Program.mark(self, ArchiveStatusId.SUSPENDED)
 
-    def mark_suspended(self) -> None:
-        Program.mark(self, ArchiveStatusId.SUSPENDED)
+    def mark_failed(self) -> bool:
+        return Program.mark(self, ArchiveStatusId.FAILED)
 
-    def mark_failed(self) -> None:
-        Program.mark(self, ArchiveStatusId.FAILED)
+    def mark_archived(self) -> bool:
+        return Program.mark(self, ArchiveStatusId.ARCHIVED)
+
+    @staticmethod
+    def mark(program: Program, archive_id: ArchiveStatusId) -> bool:
+        """Atomically mark the program as archive_id, return whether its status was one of MARKABLE_FROM.
 
-    def mark_archived(self) -> None:
-        Program.mark(self, ArchiveStatusId.ARCHIVED)
+        The archiving program is marked only while the lease belongs to the owner which claimed the program.
+        The program gets the new state when it is marked.
+        """
+        values = Program.build_mark_values(archive_id)
+        with TRACER.span("mark", status=archive_id.name.lower()) as span:
+            marked_ids = Program.mark_all([program.id], archive_id, values, lease_owner=program.lease_owner)
+            marked = marked_ids == {program.id}
+            span.set_attribute("marked", int(marked))
+        if marked:
+            for key, value in values.items():
+                setattr(program, key, value)
+        return marked
 
     @staticmethod
-    def mark(program: Program, archive_id: ArchiveStatusId) -> None:
+    def mark_all(
+        program_ids: Iterable[int],
+        archive_id: ArchiveStatusId,
+        values: dict[str, object] | None = None,
+        *,
+        lease_owner: str | None = None,
+    ) -> set[int]:
+        """Atomically mark the programs whose status is one of MARKABLE_FROM by one UPDATE, return IDs of them.
+
+        The archiving programs are marked only when they are leased to lease_owner, or have no lease when it is None,
+        so that the archive which lost its program can't mark it after another owner claimed it again.
+        """
+        program_ids = list(program_ids)
+        if not program_ids:
+            return set()
+        statement = (
+            update(Program)
+            .where(
+                Program.id.in_(program_ids),
+                Program.archive_status.in_([status.value for status in MARKABLE_FROM[archive_id]]),
+                or_(Program.archive_status != ArchiveStatusId.ARCHIVING.value, Program.is_leased_to(lease_owner)),
+            )
+            .values(values or Program.build_mark_values(archive_id))
+        )
         with SessionManager() as session:
-            selected_program = session.query(Program).with_for_update().filter_by(id=program.id).one()
-            selected_program.archive_status = archive_id.value
-            session.commit()
+            if session.get_bind().dialect.update_returning:
+                with session.begin():
+                    return set(session.scalars(statement.returning(Program.id)))
+            return {program.id for program in Program.update_one_by_one(session, statement, program_ids)}
+
+    @staticmethod
+    def is_leased_to(lease_owner: str | None) -> ColumnElement[bool]:
+        """Return the condition of the programs leased to lease_owner, or which have no lease when it is None."""
+        return Program.lease_owner.is_(None) if lease_owner is None else Program.lease_owner == lease_owner
 
-    def mark_retry_or_failed(self, max_retry_count: int) -> int:
-        """Atomically increment the retry count; mark archivable if retries remain, failed otherwise.
+    @staticmethod
+    def build_mark_values(archive_id: ArchiveStatusId) -> dict[str, object]:
+        values: dict[str, object] = {"archive_status": archive_id.value, "archive_updated_at": Program.now_utc()}
+        if archive_id != ArchiveStatusId.ARCHIVING:
+            values.update(lease_owner=None, lease_expires_at=None)
+        return values
 
-        Returns:
-            The incremented retry count.
+    @staticmethod
+    def claim(
+        program_ids: Iterable[int],
+        *,
+        lease_owner: str | None = None,
+        lease_expires_at: datetime.datetime | None = None,
+    ) -> list[Program]:
+        """Atomically mark archivable programs as archiving, return only the programs which this call claimed.
+
+        The programs claimed by another dispatcher, or which are not archivable anymore, are left as they are.
+        The claimed programs are returned in the order of program_ids.
+        The claimed programs are leased to lease_owner until lease_expires_at, see: radikopodcast.node_lease
         """
+        order = {program_id: index for index, program_id in enumerate(program_ids)}
+        if not order:
+            return []
+        statement = (
+            update(Program)
+            .where(Program.id.in_(order), Program.archive_status == ArchiveStatusId.ARCHIVABLE.value)
+            .values(
+                archive_status=ArchiveStatusId.ARCHIVING.value,
+                lease_owner=lease_owner,
+                lease_expires_at=lease_expires_at,
+                archive_updated_at=Program.now_utc(),
+            )
+        )
         with SessionManager() as session:
-            selected_program = session.query(Program).with_for_update().filter_by(id=self.id).one()
-            selected_program.archive_retry_count = selected_program.archive_retry_count + 1
-            retry_count = selected_program.archive_retry_count
-            selected_program.archive_status = (
-                ArchiveStatusId.ARCHIVABLE.value if retry_count < max_retry_count else ArchiveStatusId.FAILED.value
+            if session.get_bind().dialect.update_returning:
+                with session.begin():
+                    programs = list(session.scalars(statement.returning(Program)))
+                    for program in programs:
+                        # Reason: To keep the loaded attributes after commit.
+                        session.expunge(program)
+            else:
+                programs = Program.update_one_by_one(session, statement, order)
+        return sorted(programs, key=lambda program: order[program.id])
+
+    @staticmethod
+    def update_one_by_one(session: SQLAlchemySession, statement: Update, program_ids: Iterable[int]) -> list[Program]:
+        """Update programs one by one for databases which don't support UPDATE ... RETURNING (SQLite < 3.35)."""
+        updated_ids = []
+        with session.begin():
+            for program_id in program_ids:
+                result = session.execute(statement.where(Program.id == program_id))
+                # Reason: Result of UPDATE statement is CursorResult. pylint: disable=no-member
+                if cast("int", result.rowcount) == 1:  # type: ignore[attr-defined]
+                    updated_ids.append(program_id)
+        return session.query(Program).filter(Program.id.in_(updated_ids)).all()
+
+    @staticmethod
+    def renew_leases(lease_owner: str, program_ids: Iterable[int], lease_expires_at: datetime.datetime) -> set[int]:
+        """Extend the leases of the programs which lease_owner is archiving, return IDs of the renewed programs."""
+        program_ids = list(program_ids)
+        if not program_ids:
+            return set()
+        condition = and_(
+            Program.id.in_(program_ids),
+            Program.archive_status == ArchiveStatusId.ARCHIVING.value,
+            Program.lease_owner == lease_owner,
+        )
+        with SessionManager() as session, session.begin():
+            session.execute(
+                update(Program)
+                .where(condition)
+                .values(lease_expires_at=lease_expires_at, archive_updated_at=Program.now_utc()),
             )
-            session.commit()
-            self.archive_retry_count = retry_count
-            return retry_count
+            return set(session.scalars(select(Program.id).where(condition)))
+
+    @staticmethod
+    def find_stale(now: datetime.datetime, stale_before: datetime.datetime) -> list[Program]:
+        """Return programs left archiving or suspended by a process which is gone.
+
+        The program is stale when its lease expired or it has no lease, and its heartbeat is older than stale_before.
+        """
+        with SessionManager() as session:
+            return (
+                session.query(Program)
+                .filter(
+                    Program.archive_status.in_([ArchiveStatusId.ARCHIVING.value, ArchiveStatusId.SUSPENDED.value]),
+                    or_(Program.lease_expires_at.is_(None), Program.lease_expires_at < now),
+                    or_(Program.archive_updated_at.is_(None), Program.archive_updated_at < stale_before),
+                )
+                .order_by(Program.id)
+                .all()
+            )
+
+    def take_over(self, now: datetime.datetime) -> bool:
+        """Atomically update the heartbeat of the stale program, return whether no other node has updated it since.
+
+        The program isn't found by find_stale() for a while after this, so that only one node recovers it.
+        The program gets no lease when it is taken over, so that this node can requeue it, see: mark_retry_or_failed()
+        """
+        heartbeat = (
+            Program.archive_updated_at.is_(None)
+            if self.archive_updated_at is None
+            else Program.archive_updated_at == self.archive_updated_at
+        )
+        with SessionManager() as session, session.begin():
+            result = session.execute(
+                update(Program)
+                .where(Program.id == self.id, Program.archive_status == self.archive_status, heartbeat)
+                .values(lease_owner=None, lease_expires_at=None, archive_updated_at=now),
+            )
+        # Reason: Result of UPDATE statement is CursorResult. pylint: disable=no-member
+        if cast("int", result.rowcount) != 1:  # type: ignore[attr-defined]
+            return False
+        self.lease_owner = self.lease_expires_at = None
+        return True
+
+    def mark_retry_or_failed(self, max_retry_count: int, retry_at: datetime.datetime | None = None) -> int | None:
+        """Atomically increment the retry count of the archiving program; mark archivable if retries remain.
+
+        The program is marked failed once retries are exhausted.
+        The program is updated only while the lease belongs to the owner which claimed it, see: mark_all()
+
+        Args:
+            max_retry_count: Number of attempts until the program is marked failed.
+            retry_at: The program isn't found by find() with now before this datetime.
+
+        Returns:
+            The incremented retry count, or None when the program isn't archiving, for example, already requeued.
+        """
+        retry_count = Program.archive_retry_count + 1
+        statement = (
+            update(Program)
+            .where(
+                Program.id == self.id,
+                Program.archive_status == ArchiveStatusId.ARCHIVING.value,
+                Program.is_leased_to(self.lease_owner),
+            )
+            .values(
+                archive_retry_count=retry_count,
+                archive_retry_at=None if retry_at is None else Program.to_naive_jst(retry_at),
+                archive_status=case(
+                    (retry_count < max_retry_count, ArchiveStatusId.ARCHIVABLE.value),
+                    else_=ArchiveStatusId.FAILED.value,
+                ),
+                lease_owner=None,
+                lease_expires_at=None,
+                archive_updated_at=Program.now_utc(),
+            )
+        )
+        with TRACER.span("mark_retry_or_failed"), SessionManager() as session, session.begin():
+            if session.get_bind().dialect.update_returning:
+                incremented = session.scalars(statement.returning(Program.archive_retry_count)).one_or_none()
+            else:
+                incremented = Program.increment_retry_count_without_returning(session, statement, self.id)
+        if incremented is not None:
+            self.archive_retry_count = incremented
+            self.lease_owner = self.lease_expires_at = None
+        return incremented
+
+    @staticmethod
+    def increment_retry_count_without_returning(
+        session: SQLAlchemySession,
+        statement: Update,
+        program_id: int,
+    ) -> int | None:
+        """Select the incremented retry count in the transaction for databases which don't support UPDATE ... RETURNING."""
+        result = session.execute(statement)
+        # Reason: Result of UPDATE statement is CursorResult. pylint: disable=no-member
+        if cast("int", result.rowcount) != 1:  # type: ignore[attr-defined]
+            return None
+        return session.scalars(select(Program.archive_retry_count).where(Program.id == program_id)).one()
 
     @property
     def ft_string(self) -> str:
@@ -220,23 +520,89 @@ class Program(ModelInitByXml[XmlParserProgram]):
             return count == (0,)
 
     @staticmethod
-    def find(keywords: list[str]) -> list[Program]:
-        """Select programs from the database matching keywords."""
+    def count_by_status() -> dict[ArchiveStatusId, int]:
+        """Return the number of programs for each archive status, including the statuses which no program has."""
         with SessionManager() as session:
-            list_condition_keyword = [Program.title.like(f"%{keyword}%") for keyword in keywords]
-            return (
-                session.query(Program)
-                .filter(
-                    and_(or_(*list_condition_keyword), Program.archive_status.is_(ArchiveStatusId.ARCHIVABLE.value)),
-                )
-                .order_by(Program.ft.asc())
+            rows = (
+                session.query(Program.archive_status, func.count(Program.id))  # pylint: disable=not-callable
+                .filter(Program.archive_status.is_not(None))
+                .group_by(Program.archive_status)
                 .all()
             )
+        counts = dict.fromkeys(ArchiveStatusId, 0)
+        counts.update({ArchiveStatusId(status): count for status, count in rows if status is not None})
+        return counts
 
     @staticmethod
-    def delete(boundary_date: datetime.date) -> None:
+    def find(keywords: list[str], now: datetime.datetime | None = None) -> list[Program]:
+        """Select programs from the database matching keywords.
+
+        When now is given, the programs whose time-free playlist isn't available yet, or whose retry is backing off,
+        are excluded.
+        """
+        Keyword.register(keywords)
+        with SessionManager() as session:
+            query = session.query(Program).filter(Program.match(keywords))
+            if now is not None:
+                naive_now = Program.to_naive_jst(now)
+                query = query.filter(
+                    Program.to <= naive_now - TIME_FREE_AVAILABILITY_DELAY,
+                    or_(Program.archive_retry_at.is_(None), Program.archive_retry_at <= naive_now),
+                )
+            return query.order_by(Program.ft.asc()).all()
+
+    @staticmethod
+    def find_next_archivable_at(keywords: list[str], now: datetime.datetime) -> datetime.datetime | None:
+        """Return the earliest datetime after now when find() with keywords may find a program which it can't now."""
+        naive_now = Program.to_naive_jst(now)
+        Keyword.register(keywords)
         with SessionManager() as session:
-            session.query(Program).filter(Program.date < boundary_date).delete()
+            query = session.query(Program).filter(Program.match(keywords))
+            # Reason: Pylint's bug. pylint: disable=not-callable
+            next_to = (
+                query.filter(Program.to > naive_now - TIME_FREE_AVAILABILITY_DELAY)
+                .with_entities(func.min(Program.to))
+                .scalar()
+            )
+            next_retry_at = (
+                query.filter(Program.archive_retry_at > naive_now)
+                .with_entities(func.min(Program.archive_retry_at))
+                .scalar()
+            )
+        moments = [
+            *([] if next_to is None else [next_to + TIME_FREE_AVAILABILITY_DELAY]),
+            *([] if next_retry_at is None else [next_retry_at]),
+        ]
+        return min(moments).replace(tzinfo=JST) if moments else None
+
+    @staticmethod
+    def match(keywords: list[str]) -> ColumnElement[bool]:
+        """Return the condition of archivable programs whose title contains any of registered keywords."""
+        return and_(
+            Program.id.in_(ProgramKeyword.select_program_ids(keywords)),
+            Program.archive_status == ArchiveStatusId.ARCHIVABLE.value,
+        )
+
+    @staticmethod
+    def now_utc() -> datetime.datetime:
+        # Reason: SQLite doesn't store timezone.
+        return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def to_naive_jst(date_time: datetime.datetime) -> datetime.datetime:
+        # Reason: SQLite doesn't store timezone.
+        return date_time.astimezone(JST).replace(tzinfo=None)
+
+    @staticmethod
+    def delete(boundary_date: datetime.date) -> None:
+        """Delete programs before boundary_date along with their keyword matches."""
+        with SessionManager() as session, session.begin():
+            session.execute(
+                delete(ProgramKeyword).where(
+                    ProgramKeyword.program_id.in_(select(Program.id).where(Program.date < boundary_date)),
+                ),
+            )
+            session.execute(delete(Program).where(Program.date < boundary_date))
 
     def is_timefree30_required(self) -> bool:
         """Return whether the program requires time-free 30-day download."""
@@ -244,3 +610,245 @@ class Program(ModelInitByXml[XmlParserProgram]):
             message = f"{self.ft=}"
             raise ValueError(message)
         return RadikoDatetime.is_timefree30_required(self.ft)
+
+
+# Reason: To create the full-text index of titles along with the table.
+event.listen(Program.__table__, "after_create", TitleSearch.after_create)
+
+
+class Keyword(Base):
+    """Keyword which titles of programs were matched against, see: ProgramKeyword."""
+
+    __tablename__ = "keywords"
+
+    id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True)
+    keyword: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
+
+    # Reason: SQLite in WAL mode raises "database is locked" at once without waiting for the busy timeout when the
+    # transaction which read can't write since another process wrote meanwhile (SQLITE_BUSY_SNAPSHOT).
+    REGISTER_ATTEMPTS = 3
+
+    @staticmethod
+    def register(keywords: Iterable[str]) -> None:
+        """Register keywords which aren't registered yet, matching them against the programs already ingested.
+
+        The registration which another process kept conflicting with is given up, and is done on the next search.
+        """
+        keywords = list(dict.fromkeys(keywords))
+        for _ in range(Keyword.REGISTER_ATTEMPTS):
+            try:
+                Keyword.try_register(keywords)
+            except OperationalError as error:
+                if "database is locked" not in str(error.orig):
+                    raise
+                busy_error = error
+                continue
+            return
+        getLogger(__name__).warning("Registering keywords was given up: %s", busy_error)
+
+    @staticmethod
+    def try_register(keywords: list[str]) -> None:
+        with SessionManager() as session:
+            try:
+                with session.begin():
+                    registered = set(session.scalars(select(Keyword.keyword)))
+                    Keyword.add_all(session, [keyword for keyword in keywords if keyword not in registered])
+            except IntegrityError:
+                # Reason: Another process registered some of them at the same time, the rest are registered next time.
+                pass
+
+    @staticmethod
+    def add_all(session: SQLAlchemySession, keywords: list[str]) -> None:
+        """Match only the new keywords against the programs which the full-text index finds as candidates."""
+        if not keywords:
+            return
+        models = [Keyword(keyword=keyword) for keyword in keywords]
+        session.add_all(models)
+        session.flush()
+        normalized_keywords = [KeywordMatcher.normalize(keyword) for keyword in keywords]
+        indexed = TitleSearch.exists(session)
+        condition = TitleSearch.match(normalized_keywords, Program.id, Program.title_normalized, indexed=indexed)
+        candidates = session.execute(select(Program.id, Program.title_normalized).where(condition))
+        ProgramKeyword.save_matched(session.connection(), {model.keyword: model.id for model in models}, candidates)
+
+    @staticmethod
+    def remove_except(keywords: Iterable[str]) -> None:
+        """Remove keywords which are no longer searched, along with their matches.
+
+        Nodes which share the database are expected to search the same keywords, otherwise, they remove the keywords
+        of each other, which are matched again on the next search.
+        """
+        condition = Keyword.keyword.not_in(list(keywords))
+        with SessionManager() as session, session.begin():
+            session.execute(
+                delete(ProgramKeyword).where(ProgramKeyword.keyword_id.in_(select(Keyword.id).where(condition))),
+            )
+            session.execute(delete(Keyword).where(condition))
+
+
+class ProgramKeyword(Base):
+    """Keyword which the title of the program contains, matched once when either of them is added.
+
+    Since titles don't change after ingested, searching programs by keywords is a lookup of this table by the primary
+    key instead of matching every title on each search.
+    """
+
+    __tablename__ = "program_keywords"
+    # Reason: To delete the matches of the programs which are deleted by the index.
+    __table_args__ = (Index("ix_program_keywords_program_id", "program_id"),)
+
+    keyword_id: Mapped[int] = mapped_column(Integer, ForeignKey("keywords.id"), primary_key=True)
+    program_id: Mapped[int] = mapped_column(Integer, ForeignKey("programs.id"), primary_key=True)
+
+    @staticmethod
+    def select_program_ids(keywords: list[str]) -> Select[int]:
+        return (
+            select(ProgramKeyword.program_id)
+            .join(Keyword, Keyword.id == ProgramKeyword.keyword_id)
+            .where(Keyword.keyword.in_(keywords))
+        )
+
+    @staticmethod
+    def match_ingested(session: SQLAlchemySession, _flush_context: UOWTransaction) -> None:
+        """Match programs which the flush inserted against the registered keywords, by one pass over each title."""
+        programs = [
+            (instance.id, instance.title_normalized) for instance in session.new if isinstance(instance, Program)
+        ]
+        if not programs:
+            return
+        # Reason: Session can't execute ORM statements while flushing.
+        connection = session.connection()
+        keyword_ids = dict(connection.execute(select(Keyword.keyword, Keyword.id)).all())
+        ProgramKeyword.save_matched(connection, keyword_ids, programs)
+
+    @staticmethod
+    def save_matched(
+        connection: Connection,
+        keyword_ids: dict[str, int],
+        programs: Iterable[tuple[int, str | None]],
+    ) -> None:
+        """Insert matches of the keywords, which are the keys of keyword_ids, with the normalized titles of programs."""
+        if not keyword_ids:
+            return
+        keyword_matcher = KeywordMatcher(keyword_ids)
+        matches = [
+            {"keyword_id": keyword_ids[keyword], "program_id": program_id}
+            for program_id, title_normalized in programs
+            if title_normalized is not None
+            for keyword in keyword_matcher.match(title_normalized)
+        ]
+        if matches:
+            connection.execute(insert(ProgramKeyword), matches)
+
+
+# Reason: To match programs against keywords once when they are ingested.
+event.listen(SQLAlchemySession, "after_flush", ProgramKeyword.match_ingested)
+
+
+class AuthToken(Base):
+    """Authorized headers of radiko API shared between processes until they expire.
+
+    The refreshing_until works as a lock, so that only one process authorizes again while others keep using the
+    current headers.
+    """
+
+    __tablename__ = "auth_tokens"
+
+    # SHA-256 of the area ID and the radiko_session, to avoid using the session as a key as it is
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    area_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Reason: To allow null in Python 3.9 with SQLAlchemy 2
+    headers: Mapped[Optional[str]] = mapped_column(Text)  # noqa: UP045
+    # Reason: To allow null in Python 3.9 with SQLAlchemy 2
+    expires_at: Mapped[Optional[datetime.datetime]] = mapped_column(DATETIME)  # noqa: UP045
+    # Reason: To allow null in Python 3.9 with SQLAlchemy 2
+    refreshing_until: Mapped[Optional[datetime.datetime]] = mapped_column(DATETIME)  # noqa: UP045
+
+    @staticmethod
+    def find(token_id: str) -> AuthToken | None:
+        with SessionManager() as session:
+            return session.get(AuthToken, token_id)
+
+    @staticmethod
+    def lock(token_id: str, area_id: str, now: datetime.datetime, until: datetime.datetime) -> bool:
+        """Atomically take the lock to refresh, return whether this process took it."""
+        with SessionManager() as session:
+            try:
+                with session.begin():
+                    session.add(AuthToken(id=token_id, area_id=area_id))
+            except IntegrityError:
+                # Reason: Another process already inserted the record.
+                pass
+            with session.begin():
+                result = session.execute(
+                    update(AuthToken)
+                    .where(
+                        AuthToken.id == token_id,
+                        or_(AuthToken.refreshing_until.is_(None), AuthToken.refreshing_until < now),
+                    )
+                    .values(refreshing_until=until),
+                )
+            # Reason: Result of UPDATE statement is CursorResult. pylint: disable=no-member
+            return cast("int", result.rowcount) == 1  # type: ignore[attr-defined]
+
+    @staticmethod
+    def save(token_id: str, headers: str, expires_at: datetime.datetime) -> None:
+        """Store refreshed headers and release the lock."""
+        AuthToken.set(token_id, headers=headers, expires_at=expires_at, refreshing_until=None)
+
+    @staticmethod
+    def unlock(token_id: str) -> None:
+        AuthToken.set(token_id, refreshing_until=None)
+
+    @staticmethod
+    def expire(token_id: str) -> None:
+        AuthToken.set(token_id, expires_at=None)
+
+    @staticmethod
+    def set(token_id: str, **values: object) -> None:
+        with SessionManager() as session, session.begin():
+            session.execute(update(AuthToken).where(AuthToken.id == token_id).values(**values))
+
+
+class Lease(Base):
+    """Lease of a role which only one node takes at a time, for example, the leader to refresh the schedule.
+
+    The lease is taken by another node when the owner doesn't renew it until it expires.
+    """
+
+    __tablename__ = "leases"
+
+    id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # Reason: To allow null in Python 3.9 with SQLAlchemy 2
+    owner: Mapped[Optional[str]] = mapped_column(String(255))  # noqa: UP045
+    # Reason: To allow null in Python 3.9 with SQLAlchemy 2
+    expires_at: Mapped[Optional[datetime.datetime]] = mapped_column(DATETIME)  # noqa: UP045
+
+    @staticmethod
+    def acquire(lease_id: str, owner: str, now: datetime.datetime, until: datetime.datetime) -> bool:
+        """Atomically take or renew the lease, return whether owner holds it."""
+        with SessionManager() as session:
+            try:
+                with session.begin():
+                    session.add(Lease(id=lease_id))
+            except IntegrityError:
+                # Reason: Another node already inserted the record.
+                pass
+            with session.begin():
+                result = session.execute(
+                    update(Lease)
+                    .where(
+                        Lease.id == lease_id,
+                        or_(Lease.owner.is_(None), Lease.owner == owner, Lease.expires_at < now),
+                    )
+                    .values(owner=owner, expires_at=until),
+                )
+            # Reason: Result of UPDATE statement is CursorResult. pylint: disable=no-member
+            return cast("int", result.rowcount) == 1  # type: ignore[attr-defined]
+
+    @staticmethod
+    def release(lease_id: str, owner: str) -> None:
+        with SessionManager() as session, session.begin():
+            session.execute(
+                update(Lease).where(Lease.id == lease_id, Lease.owner == owner).values(owner=None, expires_at=None),
+            )
@@ -3,19 +3,21 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
 
 from radikopodcast.database.database import Database
+from radikopodcast.database.models import Keyword
 from radikopodcast.database.models import Program
 from radikopodcast.database.models import Station
 from radikopodcast.database.program_downloader import ProgramDownloader
+from radikopodcast.radiko_datetime import HOUR_BORDER_OF_RADIKO_DATE
+from radikopodcast.radiko_datetime import JST
 from radikopodcast.radiko_datetime import RadikoDatetime
 from radikopodcast.radikoapi.radiko_api import RadikoApi
 from radikopodcast.radikoxml.xml_converter import XmlConverterStation
 
-if TYPE_CHECKING:
-    from datetime import datetime
-
 
 class ProgramSchedule:
     """Program schedule."""
@@ -35,8 +37,10 @@ class ProgramSchedule:
             Station.save_all(XmlConverterStation(RadikoApi(area_id=self.area_id).get_station()).to_model())
 
     @staticmethod
-    def search(keywords: list[str]) -> list[Program]:
-        return Program.find(keywords)
+    def search(keywords: list[str], now: datetime | None = None) -> list[Program]:
+        """Search programs by keywords, matching only the keywords added or removed since the last search."""
+        Keyword.remove_except(keywords)
+        return Program.find(keywords, now)
 
     def download_if_program_has_not_been_downloaded(self) -> None:
         now = RadikoDatetime.now_jst()
@@ -52,6 +56,42 @@ class ProgramSchedule:
             and now.minute <= self.MINUTE_MARGIN_WHEN_RADIKO_PROGRAM_UPDATE
         )
 
+    def next_search_at(self, keywords: list[str], now: datetime, *, refresh: bool = True) -> datetime | None:
+        """Return the earliest datetime from now when search() may find a program which it can't now.
+
+        Args:
+            keywords: Keywords to search.
+            now: Current datetime.
+            refresh: Whether this node refreshes the schedule, otherwise, the next refresh isn't taken into account.
+        """
+        moments = [
+            *([self.next_refresh_at(now)] if refresh else []),
+            *(
+                []
+                if (next_archivable_at := Program.find_next_archivable_at(keywords, now)) is None
+                else [next_archivable_at]
+            ),
+        ]
+        return min(moments) if moments else None
+
+    def next_refresh_at(self, now: datetime) -> datetime:
+        """Return the earliest datetime from now when has_downloaded() returns False."""
+        refresh_at = now
+        if self.last_updated is not None:
+            radiko_date = (self.last_updated - timedelta(hours=HOUR_BORDER_OF_RADIKO_DATE)).date()
+            next_radiko_date = radiko_date + timedelta(days=1)
+            refresh_at = max(now, datetime.combine(next_radiko_date, time(HOUR_BORDER_OF_RADIKO_DATE), tzinfo=JST))
+        if (
+            refresh_at.hour == self.HOUR_WHEN_RADIKO_PROGRAM_UPDATE
+            and refresh_at.minute <= self.MINUTE_MARGIN_WHEN_RADIKO_PROGRAM_UPDATE
+        ):
+            refresh_at = refresh_at.replace(
+                minute=self.MINUTE_MARGIN_WHEN_RADIKO_PROGRAM_UPDATE + 1,
+                second=0,
+                microsecond=0,
+            )
+        return refresh_at
+
     def add(self, now: datetime) -> None:
         """Add programs from radiko API."""
         program_downloader = ProgramDownloader(now, area_id=self.area_id, radiko_session=self.radiko_session)
@@ -0,0 +1,127 @@
+# Copyright (C) 2026 Master
+"""Full-text index of the titles of programs."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from typing import Any
+
+from sqlalchemy import Integer
+from sqlalchemy import column
+from sqlalchemy import inspect
+from sqlalchemy import or_
+from sqlalchemy import text
+
+if TYPE_CHECKING:
+    from sqlalchemy import ColumnElement
+    from sqlalchemy.engine import Connection
+    from sqlalchemy.orm import InstrumentedAttribute
+    from sqlalchemy.orm import Session as SQLAlchemySession
+    from sqlalchemy.sql.schema import Table
+
+
+class TitleSearch:
+    """Index of programs.title_normalized by SQLite FTS5 with the trigram tokenizer, kept in sync by triggers.
+
+    The trigram tokenizer matches any substring of 3 characters or more by the index, so that the search doesn't scan
+    all programs of the catalogue.
+    Shorter keywords, and databases other than SQLite, fall back to LIKE.
+    The index is external content, which refers to the titles in programs instead of copying them, see:
+    - SQLite FTS5 Extension
+      https://www.sqlite.org/fts5.html#external_content_tables
+    """
+
+    TABLE = "programs_title_normalized_fts"
+    MIN_KEYWORD_LENGTH = 3
+    # Reason: The trigram tokenizer is available since SQLite 3.34.0.
+    MIN_SQLITE_VERSION = (3, 34, 0)
+    DDL = (
+        (
+            "CREATE VIRTUAL TABLE IF NOT EXISTS programs_title_normalized_fts "
+            "USING fts5(title_normalized, content='programs', content_rowid='id', tokenize='trigram')"
+        ),
+        (
+            "CREATE TRIGGER IF NOT EXISTS programs_title_normalized_fts_insert AFTER INSERT ON programs BEGIN "
+            "INSERT INTO programs_title_normalized_fts(rowid, title_normalized) VALUES (new.id, new.title_normalized); "
+            "END"
+        ),
+        (
+            "CREATE TRIGGER IF NOT EXISTS programs_title_normalized_fts_delete AFTER DELETE ON programs BEGIN "
+            "INSERT INTO programs_title_normalized_fts(programs_title_normalized_fts, rowid, title_normalized) "
+            "VALUES ('delete', old.id, old.title_normalized); "
+            "END"
+        ),
+        (
+            "CREATE TRIGGER IF NOT EXISTS programs_title_normalized_fts_update "
+            "AFTER UPDATE OF title_normalized ON programs BEGIN "
+            "INSERT INTO programs_title_normalized_fts(programs_title_normalized_fts, rowid, title_normalized) "
+            "VALUES ('delete', old.id, old.title_normalized); "
+            "INSERT INTO programs_title_normalized_fts(rowid, title_normalized) VALUES (new.id, new.title_normalized); "
+            "END"
+        ),
+    )
+    # Index of raw titles which was replaced by this index
+    OBSOLETE_DDL = (
+        "DROP TRIGGER IF EXISTS programs_title_fts_insert",
+        "DROP TRIGGER IF EXISTS programs_title_fts_delete",
+        "DROP TRIGGER IF EXISTS programs_title_fts_update",
+        "DROP TABLE IF EXISTS programs_title_fts",
+    )
+    REBUILD = "INSERT INTO programs_title_normalized_fts(programs_title_normalized_fts) VALUES ('rebuild')"
+    SELECT = "SELECT rowid FROM programs_title_normalized_fts WHERE programs_title_normalized_fts MATCH :query"
+
+    @classmethod
+    def is_supported(cls, connection: Connection) -> bool:
+        dialect = connection.dialect
+        if dialect.name != "sqlite":
+            return False
+        # Reason: The DBAPI module of the dialect isn't typed.
+        sqlite_version_info: tuple[int, ...] = dialect.dbapi.sqlite_version_info  # type: ignore[union-attr]
+        return sqlite_version_info >= cls.MIN_SQLITE_VERSION
+
+    @classmethod
+    def create(cls, connection: Connection) -> None:
+        """Create the index and its triggers, then index the titles which programs already has."""
+        for statement in (*cls.OBSOLETE_DDL, *cls.DDL):
+            connection.execute(text(statement))
+        connection.execute(text(cls.REBUILD))
+
+    @classmethod
+    def after_create(cls, _target: Table, connection: Connection, **_kwargs: Any) -> None:  # noqa: ANN401
+        """Create the index along with programs by Base.metadata.create_all()."""
+        if cls.is_supported(connection):
+            cls.create(connection)
+
+    @classmethod
+    def exists(cls, session: SQLAlchemySession) -> bool:
+        return inspect(session.connection()).has_table(cls.TABLE)
+
+    @classmethod
+    def match(
+        cls,
+        keywords: list[str],
+        program_id: InstrumentedAttribute[int],
+        title_normalized: InstrumentedAttribute[str | None],
+        *,
+        indexed: bool,
+    ) -> ColumnElement[bool]:
+        """Return the condition of normalized titles which contain any of normalized keywords.
+
+        The index is used when indexed is True.
+        """
+        if not indexed:
+            return or_(*(title_normalized.like(f"%{keyword}%") for keyword in keywords))
+        long_keywords = [keyword for keyword in keywords if len(keyword) >= cls.MIN_KEYWORD_LENGTH]
+        conditions = [
+            title_normalized.like(f"%{keyword}%") for keyword in keywords if len(keyword) < cls.MIN_KEYWORD_LENGTH
+        ]
+        if long_keywords:
+            query = " OR ".join(cls.quote(keyword) for keyword in long_keywords)
+            select_indexed = text(cls.SELECT).bindparams(query=query).columns(column("rowid", Integer))
+            conditions.append(program_id.in_(select_indexed))
+        return or_(*conditions)
+
+    @staticmethod
+    def quote(keyword: str) -> str:
+        """Quote the keyword as a string of FTS5, so that its characters aren't parsed as the query syntax."""
+        return '"' + keyword.replace('"', '""') + '"'
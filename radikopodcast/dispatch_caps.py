@@ -0,0 +1,72 @@
+# Copyright (C) 2026 Master
+"""Caps of in-flight programs for each station and each playlist host."""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import TYPE_CHECKING
+
+from radikopodcast.database.models import Station
+from radikopodcast.programaggregate.host_classifier import HOST_CLASS_SLOW
+
+if TYPE_CHECKING:
+    from radikopodcast.database.models import Program
+
+DEFAULT_MAX_PROGRAMS_PER_STATION = 2
+DEFAULT_MAX_PROGRAMS_PER_HOST = 2
+
+
+class DispatchCaps:
+    """Caps the number of in-flight programs for each station and for each slow playlist host.
+
+    The programs over the caps are deferred: they stay archivable and get dispatched when another program of the
+    station or the host finishes.
+    Programs of the fast host aren't capped by host, since the fast host is a CDN which serves all stations, while
+    each slow host is an endpoint which throttles the stations behind it.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_programs_per_station: int = DEFAULT_MAX_PROGRAMS_PER_STATION,
+        max_programs_per_host: int = DEFAULT_MAX_PROGRAMS_PER_HOST,
+    ) -> None:
+        if max_programs_per_station < 1 or max_programs_per_host < 1:
+            message = f"{max_programs_per_station=}, {max_programs_per_host=}"
+            raise ValueError(message)
+        self.max_programs_per_station = max_programs_per_station
+        self.max_programs_per_host = max_programs_per_host
+        self.stations: Counter[str] = Counter()
+        self.hosts: Counter[str] = Counter()
+        # Station ID and playlist host of each in-flight program
+        self.keys: dict[int, tuple[str, str | None]] = {}
+
+    def acquire(self, program: Program) -> bool:
+        """Count the program as in flight and return True, or return False when it is over the caps."""
+        host = self.resolve_host(program.station_id)
+        if self.stations[program.station_id] >= self.max_programs_per_station or (
+            host is not None and self.hosts[host] >= self.max_programs_per_host
+        ):
+            return False
+        self.stations[program.station_id] += 1
+        if host is not None:
+            self.hosts[host] += 1
+        self.keys[program.id] = (program.station_id, host)
+        return True
+
+    def release(self, program_id: int) -> None:
+        keys = self.keys.pop(program_id, None)
+        if keys is None:
+            return
+        station_id, host = keys
+        self.stations[station_id] -= 1
+        if host is not None:
+            self.hosts[host] -= 1
+
+    @staticmethod
+    def resolve_host(station_id: str) -> str | None:
+        """Return the playlist host of the station when it is slow, None when it isn't capped by host."""
+        station = Station.find(station_id)
+        if station is None or station.host_class != HOST_CLASS_SLOW:
+            return None
+        return station.playlist_host
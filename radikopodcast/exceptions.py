@@ -1,6 +1,8 @@
 # Copyright (C) 2026 Master
 """This module implements exceptions for this package."""
 
+from radikoplaylist.exceptions import BadHttpStatusCodeError
+
 # This comment avoids docformatter's issue:
 # - The docformatter removes blank line against PEP8 (conflicts with Ruff (Black)) · Issue #350 · PyCQA/docformatter
 #   https://github.com/PyCQA/docformatter/issues/350
@@ -15,3 +17,7 @@ class Error(Exception):
 
 class XmlParseError(Error):
     """Target XML is invalid."""
+
+
+class UnauthorizedError(BadHttpStatusCodeError):
+    """Radiko rejected the authorized headers by 401 or 403, for example, when it revoked them before they expire."""
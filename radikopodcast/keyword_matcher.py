@@ -0,0 +1,72 @@
+# Copyright (C) 2026 Master
+"""Matcher of keywords in titles of programs."""
+
+from __future__ import annotations
+
+import unicodedata
+from collections import deque
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton which finds all keywords contained in a normalized text by one pass over the text.
+
+    Keywords are normalized as well as titles of programs by normalize(), see:
+    - Aho-Corasick algorithm - Wikipedia
+      https://en.wikipedia.org/wiki/Aho%E2%80%93Corasick_algorithm
+    """
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        # Transitions, failure links, and keywords found at each state, the state 0 is the root
+        self.transitions: list[dict[str, int]] = [{}]
+        self.failures: list[int] = [0]
+        self.outputs: list[set[str]] = [set()]
+        for keyword in keywords:
+            self.add(keyword)
+        self.link()
+
+    def add(self, keyword: str) -> None:
+        state = 0
+        for character in self.normalize(keyword):
+            next_state = self.transitions[state].get(character)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions[state][character] = next_state
+                self.transitions.append({})
+                self.failures.append(0)
+                self.outputs.append(set())
+            state = next_state
+        self.outputs[state].add(keyword)
+
+    def link(self) -> None:
+        """Link each state to the state of its longest proper suffix in breadth-first order."""
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                self.failures[next_state] = self.transit(self.failures[state], character)
+                # Reason: The failure state is shallower, so that its outputs already include its own suffixes.
+                self.outputs[next_state] |= self.outputs[self.failures[next_state]]
+
+    def transit(self, state: int, character: str) -> int:
+        while state and character not in self.transitions[state]:
+            state = self.failures[state]
+        return self.transitions[state].get(character, 0)
+
+    def match(self, normalized_text: str) -> set[str]:
+        """Return keywords which the text normalized by normalize() contains."""
+        matched = set(self.outputs[0])
+        state = 0
+        for character in normalized_text:
+            state = self.transit(state, character)
+            matched |= self.outputs[state]
+        return matched
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Unify full-width and half-width forms by NFKC, and cases by casefold, which radiko titles mix."""
+        return unicodedata.normalize("NFKC", text).casefold()
@@ -0,0 +1,171 @@
+# Copyright (C) 2026 Master
+"""Logging of all processes handed off through a queue to a single writer thread."""
+
+from __future__ import annotations
+
+import logging
+from contextlib import ExitStack
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from multiprocessing.managers import SyncManager
+from queue import SimpleQueue
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+
+from typing_extensions import Self
+
+if TYPE_CHECKING:
+    import queue
+    from logging import Handler
+    from logging import Logger
+    from logging import LogRecord
+    from types import TracebackType
+
+DEFAULT_LOG_LEVEL = "INFO"
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s"
+
+
+class LoggingPipeline:
+    """Hands off log records of the process and of the child processes through the queue until the context exits.
+
+    Loggers only put records into the queue, and a single writer writes them, so that the event loops don't wait for
+    the I/O of logging, and records of processes don't interleave.
+    When the caller gives the queue, the writer is the listener of the caller, otherwise, QueueListener writes records
+    with the handlers which the root logger had, or into stderr when it had none, same as logging.basicConfig().
+    The queue is served by the manager process, since asynccpu passes it to the child processes with each task.
+    """
+
+    def __init__(
+        self,
+        level: str = DEFAULT_LOG_LEVEL,
+        # Reason: This argument name is API. pylint: disable=redefined-outer-name
+        queue: queue.Queue[LogRecord] | None = None,
+    ) -> None:
+        self.level = level.upper()
+        # Reason: getLevelName() returns "Level <name>" for unknown names.
+        if logging.getLevelName(self.level) == f"Level {self.level}":
+            message = f"Unknown log level: {level}"
+            raise ValueError(message)
+        self.queue = queue
+        self.exit_stack = ExitStack()
+        self.handlers: list[Handler] = []
+        self.original_level = logging.NOTSET
+        self.queue_handler: QueueHandler | None = None
+
+    def __enter__(self) -> Self:
+        root = logging.getLogger()
+        with ExitStack() as exit_stack:
+            records = self.queue if self.queue is not None else self.start_writer(exit_stack, root.handlers)
+            self.handlers = root.handlers[:]
+            for handler in self.handlers:
+                root.removeHandler(handler)
+            self.queue_handler = QueueHandler(records)
+            root.addHandler(self.queue_handler)
+            self.original_level = root.level
+            root.setLevel(self.level)
+            self.exit_stack = exit_stack.pop_all()
+        return self
+
+    def start_writer(self, exit_stack: ExitStack, handlers: list[Handler]) -> SimpleQueue[LogRecord]:
+        """Start the writer of the local queue, and the thread which forwards records of child processes into it.
+
+        Records of this process are put into the local queue, since a put into the queue of the manager process
+        waits for its reply.
+        """
+        records: SimpleQueue[LogRecord] = SimpleQueue()
+        writer = QueueListener(records, *(handlers or [self.create_stream_handler()]))
+        writer.start()
+        exit_stack.callback(writer.stop)
+        self.queue = exit_stack.enter_context(SyncManager()).Queue()
+        exit_stack.callback(setattr, self, "queue", None)
+        forwarder = QueueListener(self.queue, QueueHandler(records))
+        forwarder.start()
+        exit_stack.callback(forwarder.stop)
+        return records
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        root = logging.getLogger()
+        if self.queue_handler is not None:
+            root.removeHandler(self.queue_handler)
+            self.queue_handler = None
+        root.setLevel(self.original_level)
+        # Reason: The listener writes the records left in the queue with the handlers before they are restored.
+        self.exit_stack.close()
+        for handler in self.handlers:
+            root.addHandler(handler)
+        self.handlers = []
+
+    def create_configurer(self, configurer: Callable[[], Any] | None = None) -> LoggingConfigurer:
+        if self.queue is None:
+            message = "LoggingPipeline is not running."
+            raise RuntimeError(message)
+        return LoggingConfigurer(self.queue, self.level, configurer)
+
+    @staticmethod
+    def create_stream_handler() -> Handler:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        return handler
+
+
+class LoggingConfigurer:
+    """Configurer of the child processes which puts their records into the queue at the level.
+
+    asynccpu resets the level of the root logger in the child processes to pass all records, which would build
+    every debug message only to discard it, and forked child processes inherit the handlers of the parent process.
+    The configurer given by the caller of the pool runs after that.
+    """
+
+    def __init__(
+        self,
+        # Reason: This argument name is API. pylint: disable=redefined-outer-name
+        queue: queue.Queue[LogRecord],
+        level: str = DEFAULT_LOG_LEVEL,
+        configurer: Callable[[], Any] | None = None,
+    ) -> None:
+        self.queue = queue
+        self.level = level
+        self.configurer = configurer
+
+    def __call__(self) -> None:
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(QueueHandler(self.queue))
+        root.setLevel(self.level)
+        if self.configurer is not None:
+            self.configurer()
+
+
+class SampledLogger:
+    """Logs the first record and every interval-th record after that, for records repeated in a hot loop.
+
+    Records are counted only while the logger is enabled for their level, and the number of the records which were
+    skipped since the last one is appended to the message.
+    """
+
+    def __init__(self, logger: Logger, interval: int) -> None:
+        self.logger = logger
+        self.interval = interval
+        self.count = 0
+
+    def log(self, level: int, message: str, *args: object) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        self.count += 1
+        if (self.count - 1) % self.interval:
+            return
+        if self.count == 1 or self.interval == 1:
+            self.logger.log(level, message, *args)
+            return
+        sampled_message = f"{message} (%d similar records skipped)"
+        self.logger.log(level, sampled_message, *args, self.interval - 1)
+
+    def warning(self, message: str, *args: object) -> None:
+        self.log(logging.WARNING, message, *args)
@@ -0,0 +1,265 @@
+# Copyright (C) 2026 Master
+"""Metrics of the archiving daemon in Prometheus text format, aggregated across the processes of the pool."""
+
+from __future__ import annotations
+
+import bisect
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextlib import suppress
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+METRIC_COUNTER = "counter"
+METRIC_GAUGE = "gauge"
+METRIC_HISTOGRAM = "histogram"
+
+# Reason: The order of labels has to be stable to aggregate samples of the same labels.
+Labels = tuple[tuple[str, str], ...]
+# Name of metric, labels, and the value to add, set or observe
+Sample = tuple[str, Labels, float]
+
+
+@dataclass(frozen=True)
+class MetricDefinition:
+    """Name, type and help text of a metric, and buckets in seconds when it is a histogram."""
+
+    name: str
+    kind: str
+    help: str
+    buckets: tuple[float, ...] = ()
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DURATION_BUCKETS = (1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 1800.0, 3600.0, 7200.0)
+
+PROGRAMS = MetricDefinition("radikopodcast_programs", METRIC_GAUGE, "Programs by archive status.")
+QUEUE_DEPTH = MetricDefinition(
+    "radikopodcast_queue_depth",
+    METRIC_GAUGE,
+    "Archivable programs which were found but not dispatched yet.",
+)
+IN_FLIGHT_PROGRAMS = MetricDefinition(
+    "radikopodcast_in_flight_programs",
+    METRIC_GAUGE,
+    "Programs which this node is archiving.",
+)
+HOST_CONCURRENCY_WINDOW = MetricDefinition(
+    "radikopodcast_host_concurrency_window",
+    METRIC_GAUGE,
+    "Window of concurrent requests adapted to the responses of each host.",
+)
+HOST_LATENCY_SECONDS = MetricDefinition(
+    "radikopodcast_host_latency_seconds",
+    METRIC_GAUGE,
+    "Smoothed latency of the requests which succeeded, by host.",
+)
+SEGMENTS_DISCOVERED = MetricDefinition(
+    "radikopodcast_segments_discovered_total",
+    METRIC_COUNTER,
+    "Segments discovered for time-free 30 programs.",
+)
+SEGMENTS_DOWNLOADED = MetricDefinition(
+    "radikopodcast_segments_downloaded_total",
+    METRIC_COUNTER,
+    "Segments completely downloaded.",
+)
+SEGMENT_BYTES_WRITTEN = MetricDefinition(
+    "radikopodcast_segment_bytes_written_total",
+    METRIC_COUNTER,
+    "Bytes of the segments completely downloaded.",
+)
+SEGMENT_RETRIES = MetricDefinition(
+    "radikopodcast_segment_retries_total",
+    METRIC_COUNTER,
+    "Retries of segment requests.",
+)
+ARCHIVE_RETRIES = MetricDefinition(
+    "radikopodcast_archive_retries_total",
+    METRIC_COUNTER,
+    "Programs requeued to retry, by reason.",
+)
+MASTER_PLAYLIST_SECONDS = MetricDefinition(
+    "radikopodcast_master_playlist_request_seconds",
+    METRIC_HISTOGRAM,
+    "Latency of MasterPlaylistClient to get the media playlist URL.",
+    LATENCY_BUCKETS,
+)
+FFMPEG_RUN_SECONDS = MetricDefinition(
+    "radikopodcast_ffmpeg_run_seconds",
+    METRIC_HISTOGRAM,
+    "Duration of ffmpeg runs, by what ffmpeg ran for.",
+    DURATION_BUCKETS,
+)
+DEFINITIONS = {
+    definition.name: definition
+    for definition in (
+        PROGRAMS,
+        QUEUE_DEPTH,
+        IN_FLIGHT_PROGRAMS,
+        HOST_CONCURRENCY_WINDOW,
+        HOST_LATENCY_SECONDS,
+        SEGMENTS_DISCOVERED,
+        SEGMENTS_DOWNLOADED,
+        SEGMENT_BYTES_WRITTEN,
+        SEGMENT_RETRIES,
+        ARCHIVE_RETRIES,
+        MASTER_PLAYLIST_SECONDS,
+        FFMPEG_RUN_SECONDS,
+    )
+}
+
+
+@dataclass
+class Histogram:
+    """Observations counted in each bucket, which isn't cumulative until rendered."""
+
+    buckets: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)
+    sum: float = 0.0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        self.counts = self.counts or [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Registry of the metrics of a process.
+
+    When the queue is set, which the parent process shares with the child processes by MetricsConfigurer, samples are
+    put into the queue instead, and the parent process aggregates them by drain().
+    Gauges are set only by the parent process, since a gauge set by each child process can't be aggregated.
+    """
+
+    def __init__(self) -> None:
+        self.values: dict[tuple[str, Labels], float] = {}
+        self.histograms: dict[tuple[str, Labels], Histogram] = {}
+        # Reason: Some metrics are recorded in threads, for example, MasterPlaylistClient in asyncio.to_thread().
+        self.lock = threading.Lock()
+        self.queue: queue.Queue[Sample] | None = None
+
+    def inc(self, definition: MetricDefinition, value: float = 1.0, **labels: str) -> None:
+        self.record((definition.name, self.to_labels(labels), value))
+
+    def set(self, definition: MetricDefinition, value: float, **labels: str) -> None:
+        with self.lock:
+            self.values[(definition.name, self.to_labels(labels))] = value
+
+    def observe(self, definition: MetricDefinition, value: float, **labels: str) -> None:
+        self.record((definition.name, self.to_labels(labels), value))
+
+    @contextmanager
+    def time(self, definition: MetricDefinition, **labels: str) -> Iterator[None]:
+        """Observe the duration of the block in seconds, including when it raised."""
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(definition, time.monotonic() - started_at, **labels)
+
+    def record(self, sample: Sample) -> None:
+        if self.queue is None:
+            self.apply(sample)
+            return
+        # Reason: Metrics shouldn't break archiving when the parent process is shutting down the queue.
+        with suppress(OSError, EOFError):
+            self.queue.put_nowait(sample)
+
+    def apply(self, sample: Sample) -> None:
+        name, labels, value = sample
+        definition = DEFINITIONS[name]
+        with self.lock:
+            if definition.kind == METRIC_HISTOGRAM:
+                histogram = self.histograms.get((name, labels))
+                if histogram is None:
+                    histogram = self.histograms[(name, labels)] = Histogram(definition.buckets)
+                histogram.observe(value)
+                return
+            self.values[(name, labels)] = self.values.get((name, labels), 0.0) + value
+
+    def drain(self, samples: queue.Queue[Sample]) -> int:
+        """Aggregate samples which the child processes put, return the number of them."""
+        count = 0
+        with suppress(OSError, EOFError):
+            while True:
+                try:
+                    self.apply(samples.get_nowait())
+                except queue.Empty:
+                    break
+                count += 1
+        return count
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format."""
+        with self.lock:
+            lines: list[str] = []
+            for definition in DEFINITIONS.values():
+                lines.extend(self.render_definition(definition))
+            return "".join(f"{line}\n" for line in lines)
+
+    def render_definition(self, definition: MetricDefinition) -> Iterator[str]:
+        yield f"# HELP {definition.name} {definition.help}"
+        yield f"# TYPE {definition.name} {definition.kind}"
+        if definition.kind == METRIC_HISTOGRAM:
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name == definition.name:
+                    yield from self.render_histogram(name, labels, histogram)
+            return
+        yield from (
+            f"{name}{self.format_labels(labels)} {value!r}"
+            for (name, labels), value in sorted(self.values.items())
+            if name == definition.name
+        )
+
+    def render_histogram(self, name: str, labels: Labels, histogram: Histogram) -> Iterator[str]:
+        cumulative = 0
+        for bucket, count in zip((*(repr(bucket) for bucket in histogram.buckets), "+Inf"), histogram.counts):
+            cumulative += count
+            yield f"{name}_bucket{self.format_labels((*labels, ('le', bucket)))} {cumulative}"
+        yield f"{name}_sum{self.format_labels(labels)} {histogram.sum!r}"
+        yield f"{name}_count{self.format_labels(labels)} {histogram.count}"
+
+    @staticmethod
+    def to_labels(labels: dict[str, str]) -> Labels:
+        return tuple(sorted(labels.items()))
+
+    @staticmethod
+    def format_labels(labels: Labels) -> str:
+        if not labels:
+            return ""
+        escaped = (
+            (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for key, value in labels
+        )
+        return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+METRICS = Metrics()
+
+
+class MetricsConfigurer:
+    """Configurer of the child processes which sends their metrics to the parent process through the queue.
+
+    The configurer given by the caller of the pool runs after that.
+    """
+
+    def __init__(self, samples: queue.Queue[Sample], configurer: Callable[[], Any] | None = None) -> None:
+        self.samples = samples
+        self.configurer = configurer
+
+    def __call__(self) -> None:
+        METRICS.queue = self.samples
+        if self.configurer is not None:
+            self.configurer()
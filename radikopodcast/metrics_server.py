@@ -0,0 +1,83 @@
+# Copyright (C) 2026 Master
+"""Local HTTP endpoint which exposes the metrics to Prometheus."""
+
+from __future__ import annotations
+
+import asyncio
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+from aiohttp import web
+from typing_extensions import Self
+
+from radikopodcast.metrics import METRICS
+
+if TYPE_CHECKING:
+    import queue
+    from collections.abc import Callable
+    from types import TracebackType
+
+    from radikopodcast.metrics import Sample
+
+
+class MetricsServer:
+    """Serves GET /metrics on the host and the port until the context exits.
+
+    Samples of the child processes are aggregated every DRAIN_INTERVAL_SECONDS, so that the queue doesn't grow while
+    nobody scrapes, and collect is called on each scrape to set gauges which are computed on demand.
+    """
+
+    DRAIN_INTERVAL_SECONDS = 10.0
+    CONTENT_TYPE = "text/plain; version=0.0.4"
+
+    def __init__(
+        self,
+        port: int,
+        *,
+        host: str = "127.0.0.1",
+        samples: queue.Queue[Sample] | None = None,
+        collect: Callable[[], None] | None = None,
+    ) -> None:
+        self.port = port
+        self.host = host
+        self.samples = samples
+        self.collect = collect
+        self.runner: web.AppRunner | None = None
+        self.drain_task: asyncio.Future[None] | None = None
+        self.logger = getLogger(__name__)
+
+    async def __aenter__(self) -> Self:
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        self.drain_task = asyncio.ensure_future(self.drain_periodically())
+        self.logger.info("Serving metrics: http://%s:%d/metrics", self.host, self.port)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        _exc_val: BaseException | None,
+        _exc_tb: TracebackType | None,
+    ) -> None:
+        if self.drain_task is not None:
+            self.drain_task.cancel()
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    async def handle(self, _request: web.Request) -> web.Response:
+        self.drain()
+        if self.collect is not None:
+            self.collect()
+        return web.Response(body=METRICS.render().encode(), headers={"Content-Type": self.CONTENT_TYPE})
+
+    async def drain_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.DRAIN_INTERVAL_SECONDS)
+            self.drain()
+
+    def drain(self) -> None:
+        if self.samples is not None:
+            METRICS.drain(self.samples)
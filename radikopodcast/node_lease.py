@@ -0,0 +1,84 @@
+# Copyright (C) 2026 Master
+"""Leases which each node holds in the database shared by nodes."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+from radikopodcast.database.models import Lease
+from radikopodcast.database.models import Program
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Collection
+
+
+class NodeLeases:
+    """Leases of archive jobs and of the leader role which this node holds.
+
+    Archive jobs are leased to the node which claimed them, and the leases are renewed by heartbeat while the jobs are
+    in flight. Jobs whose lease expired, for example, because their node crashed, go back to the queue by
+    radikopodcast.crash_recovery.
+    Only the node which holds the leader lease refreshes the program schedule.
+    """
+
+    LEASE_DURATION = timedelta(minutes=5)
+    HEARTBEAT_INTERVAL_SECONDS = 60.0
+    LEADER_LEASE_ID = "schedule_refresh"
+
+    def __init__(self, owner: str | None = None) -> None:
+        self.owner = owner or self.create_owner()
+        self.is_leader = False
+        self.logger = getLogger(__name__)
+
+    @staticmethod
+    def create_owner() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def lease_expires_at(self) -> datetime:
+        return self.now() + self.LEASE_DURATION
+
+    def elect(self) -> bool:
+        """Take or renew the leader lease, return whether this node is the leader."""
+        now = self.now()
+        is_leader = Lease.acquire(self.LEADER_LEASE_ID, self.owner, now, now + self.LEASE_DURATION)
+        if is_leader != self.is_leader:
+            self.logger.info("%s the leader: %s", "Became" if is_leader else "Stepped down from", self.owner)
+        self.is_leader = is_leader
+        return is_leader
+
+    def resign(self) -> None:
+        if self.is_leader:
+            Lease.release(self.LEADER_LEASE_ID, self.owner)
+        self.is_leader = False
+
+    def heartbeat(self, program_ids: Collection[int]) -> set[int]:
+        """Renew the leases of program_ids and of the leader.
+
+        Returns:
+            IDs of the programs whose lease was renewed.
+        """
+        renewed_ids = Program.renew_leases(self.owner, program_ids, self.lease_expires_at())
+        for program_id in set(program_ids) - renewed_ids:
+            self.logger.warning("Lost lease of program: %d", program_id)
+        if self.is_leader:
+            self.elect()
+        return renewed_ids
+
+    async def run_heartbeat(self, get_program_ids: Callable[[], Collection[int]]) -> None:
+        """Run heartbeat every HEARTBEAT_INTERVAL_SECONDS."""
+        while True:
+            await asyncio.sleep(self.HEARTBEAT_INTERVAL_SECONDS)
+            self.heartbeat(get_program_ids())
+
+    @staticmethod
+    def now() -> datetime:
+        # Reason: SQLite doesn't store timezone.
+        return datetime.now(timezone.utc).replace(tzinfo=None)
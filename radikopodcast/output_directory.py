@@ -20,8 +20,7 @@ class OutputDirectory:
 
     async def get_output_file_path(self, program: Program) -> anyio.Path:
         """Return output file path for the given program."""
-        file_name = f"{self.build_file_stem(program)}.m4a"
-        output_file_path = anyio.Path(self.path) / file_name
+        output_file_path = anyio.Path(self.build_file_path(program))
         self.logger.debug("out file name: %s", output_file_path)
         if await output_file_path.exists():
             self.logger.error("File already exists. out_file_name = %s", output_file_path)
@@ -29,6 +28,10 @@ class OutputDirectory:
             raise FileExistsError(message)
         return output_file_path
 
+    def build_file_path(self, program: Program) -> Path:
+        """Build output file path for the given program."""
+        return self.path / f"{self.build_file_stem(program)}.m4a"
+
     @staticmethod
     def build_file_stem(program: Program) -> str:
         """Build file stem for the given program."""
@@ -7,12 +7,16 @@ from logging import getLogger
 from typing import TYPE_CHECKING
 
 from asyncffmpeg import FFmpegCoroutineFactory
-from radikoplaylist import MasterPlaylistClient
 from radikoplaylist import TimeFreeMasterPlaylistRequest
-from radikoplaylist.playlist_create_url_getter import TimeFreeUrlChecker
 
+from radikopodcast.concurrency import ArchiveLimits
+from radikopodcast.programaggregate.host_classifier import HOST_CLASS_FAST
+from radikopodcast.programaggregate.host_classifier import StationHostClassifier
 from radikopodcast.programaggregate.normal import TIME_TO_FORCE_TERMINATION
 from radikopodcast.programaggregate.normal import RadikoProgramAggregateToArchiveGeneral
+from radikopodcast.programaggregate.segment.discovery_factory import SEGMENT_DISCOVERY_CHUNK
+from radikopodcast.programaggregate.segment.downloader_factory import SEGMENT_DOWNLOADER_FFMPEG
+from radikopodcast.programaggregate.segment.muxer import SEGMENT_MUXER_CONCAT
 from radikopodcast.programaggregate.slowapi import RadikoProgramAggregateToArchiveSlowApi
 from radikopodcast.programaggregate.timefree30 import RadikoProgramAggregateToArchiveTimeFree30
 
@@ -25,12 +29,16 @@ if TYPE_CHECKING:
 class RadikoProgramAggregateToArchiveFactory:
     """Factory for RadikoProgramArchiver."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913 pylint: disable=too-many-arguments
         self,
         output_directory: OutputDirectory,
         *,
         time_to_force_termination: int = TIME_TO_FORCE_TERMINATION,
         radiko_session: str | None = None,
+        segment_downloader: str = SEGMENT_DOWNLOADER_FFMPEG,
+        segment_discovery: str = SEGMENT_DISCOVERY_CHUNK,
+        segment_muxer: str = SEGMENT_MUXER_CONCAT,
+        limits: ArchiveLimits | None = None,
     ) -> None:
         self.logger = getLogger(__name__)
         self.output_directory = output_directory
@@ -38,30 +46,40 @@ class RadikoProgramAggregateToArchiveFactory:
         self.logger.info(self.ffmpeg_coroutine)
         self.logger.info(self.ffmpeg_coroutine.execute)
         self.radiko_session = radiko_session
+        self.segment_downloader = segment_downloader
+        self.segment_discovery = segment_discovery
+        self.segment_muxer = segment_muxer
+        self.host_classifier = StationHostClassifier()
+        # Reason: Limits shared between processes are replaced by ArchiveScheduler while it runs.
+        self.limits = limits or ArchiveLimits.create_local()
 
     def create(self, program: Program) -> RadikoProgramAggregateToArchive:
         if self.radiko_session and program.is_timefree30_required():
-            return RadikoProgramAggregateToArchiveTimeFree30(program, self.output_directory, self.radiko_session)
-        if self._is_fast_api(program):
-            return RadikoProgramAggregateToArchiveGeneral(program, self.output_directory, self.ffmpeg_coroutine)
+            return RadikoProgramAggregateToArchiveTimeFree30(
+                program,
+                self.output_directory,
+                self.radiko_session,
+                segment_downloader=self.segment_downloader,
+                segment_discovery=self.segment_discovery,
+                segment_muxer=self.segment_muxer,
+                limits=self.limits,
+            )
+        # Reason: The master playlist is passed to the aggregate to record the program without requesting it again.
+        host_class, master_playlist = self.host_classifier.classify(program)
+        if host_class == HOST_CLASS_FAST:
+            return RadikoProgramAggregateToArchiveGeneral(
+                program,
+                self.output_directory,
+                self.ffmpeg_coroutine,
+                master_playlist,
+            )
         return RadikoProgramAggregateToArchiveSlowApi(
             program,
             self.output_directory,
             self.radiko_session or "",
             TimeFreeMasterPlaylistRequest,
+            segment_downloader=self.segment_downloader,
+            segment_discovery=self.segment_discovery,
+            segment_muxer=self.segment_muxer,
+            limits=self.limits,
         )
-
-    def _is_fast_api(self, program: Program) -> bool:
-        """Return True if the station's playlist URL is served from https://radiko.jp (fast CDN).
-
-        Uses MasterPlaylistClient.get() so tests can mock at the same level as the rest of the
-        archiving pipeline.
-        """
-        area_id = program.area_id or "JP13"
-        request = TimeFreeMasterPlaylistRequest(
-            program.station_id,
-            int(program.ft_string),
-            int(program.to_string),
-        )
-        master_playlist = MasterPlaylistClient.get(request, area_id=area_id)
-        return TimeFreeUrlChecker.is_fastest_host_to_download(master_playlist.media_playlist_url)
@@ -0,0 +1,118 @@
+# Copyright (C) 2026 Master
+"""Classifier of stations by the host which serves their time-free playlists."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from logging import getLogger
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+from radikoplaylist import TimeFreeMasterPlaylistRequest
+from radikoplaylist.exceptions import HttpRequestError
+from radikoplaylist.exceptions import NoAvailableUrlError
+from radikoplaylist.playlist_create_url_getter import TimeFreeUrlChecker
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+from radikopodcast.database.models import Station
+from radikopodcast.radikoapi.authorization import CachedMasterPlaylistClient
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from radikopodcast.database.models import Program
+    from radikopodcast.radikoapi.authorization import ExpiringMasterPlaylist
+
+# Served from https://radiko.jp (fast CDN)
+HOST_CLASS_FAST = "fast"
+# Served from other hosts (slow API), see: radikopodcast.programaggregate.slowapi
+HOST_CLASS_SLOW = "slow"
+
+
+class StationHostClassifier:
+    """Classifies stations into fast or slow host, caching the class on the Station row.
+
+    The host class is a stable property of a station, so the cached class is reused for a period which gets longer
+    as the same class is observed in a row (confidence), and revalidated after the period or a routing failure.
+    """
+
+    TIME_TO_REVALIDATE = timedelta(days=1)
+    MAX_CONFIDENCE = 7
+
+    def __init__(self) -> None:
+        self.logger = getLogger(__name__)
+
+    def classify(self, program: Program) -> tuple[str, ExpiringMasterPlaylist | None]:
+        """Return the host class of the station, with the master playlist when it was requested to revalidate."""
+        station = Station.find(program.station_id)
+        if station is not None and station.host_class is not None and self.is_fresh(station, self.now()):
+            return station.host_class, None
+        master_playlist = self.revalidate(program)
+        return self.classify_master_playlist(master_playlist), master_playlist
+
+    def revalidate(self, program: Program) -> ExpiringMasterPlaylist:
+        """Request the master playlist of the program and record the host class of the station."""
+        area_id = program.area_id or "JP13"
+        request = TimeFreeMasterPlaylistRequest(
+            program.station_id,
+            int(program.ft_string),
+            int(program.to_string),
+        )
+        master_playlist = CachedMasterPlaylistClient.get(request, area_id=area_id)
+        host_class = self.classify_master_playlist(master_playlist)
+        playlist_host = urlparse(master_playlist.media_playlist_url).netloc
+        Station.record_host_class(program.station_id, host_class, self.now(), self.MAX_CONFIDENCE, playlist_host)
+        self.logger.debug(
+            "Classified station: %s, host_class: %s, playlist_host: %s",
+            program.station_id,
+            host_class,
+            playlist_host,
+        )
+        return master_playlist
+
+    def revalidate_expired(self, programs: Iterable[Program]) -> None:
+        """Revalidate stations whose host class has expired, by their latest program, before dispatching them."""
+        now = self.now()
+        for station_id, program in self.find_latest_programs(programs).items():
+            station = Station.find(station_id)
+            if station is None or self.is_fresh(station, now):
+                continue
+            try:
+                self.revalidate(program)
+            except (HttpRequestError, NoAvailableUrlError, RequestsConnectionError) as error:
+                # Reason: The station will be revalidated on dispatch.
+                self.logger.warning("Failed to revalidate host class of %s: %s", station_id, error)
+
+    @staticmethod
+    def find_latest_programs(programs: Iterable[Program]) -> dict[str, Program]:
+        """Return the latest program of each station, which is the most likely to be available on time-free."""
+        latest_programs: dict[str, Program] = {}
+        for program in programs:
+            latest_program = latest_programs.get(program.station_id)
+            if latest_program is None or program.ft_string > latest_program.ft_string:
+                latest_programs[program.station_id] = program
+        return latest_programs
+
+    @staticmethod
+    def invalidate(program: Program) -> None:
+        """Expire the host class of the station after a routing failure."""
+        Station.expire_host_class(program.station_id)
+
+    @classmethod
+    def is_fresh(cls, station: Station, now: datetime) -> bool:
+        return (
+            station.host_classified_at is not None
+            and now < station.host_classified_at + cls.TIME_TO_REVALIDATE * station.host_confidence
+        )
+
+    @staticmethod
+    def classify_master_playlist(master_playlist: ExpiringMasterPlaylist) -> str:
+        is_fast = TimeFreeUrlChecker.is_fastest_host_to_download(master_playlist.media_playlist_url)
+        return HOST_CLASS_FAST if is_fast else HOST_CLASS_SLOW
+
+    @staticmethod
+    def now() -> datetime:
+        # Reason: SQLite doesn't store timezone.
+        return datetime.now(timezone.utc).replace(tzinfo=None)
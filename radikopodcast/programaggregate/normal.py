@@ -5,8 +5,11 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from radikopodcast.metrics import FFMPEG_RUN_SECONDS
+from radikopodcast.metrics import METRICS
 from radikopodcast.programaggregate.base import RadikoProgramAggregateToArchive
 from radikopodcast.radiko_stream_spec_factory import RadikoStreamSpecFactory
+from radikopodcast.tracing import TRACER
 
 if TYPE_CHECKING:
     from asyncffmpeg import FFmpegCoroutine
@@ -14,21 +17,29 @@ if TYPE_CHECKING:
 
     from radikopodcast.database.models import Program
     from radikopodcast.output_directory import OutputDirectory
+    from radikopodcast.radikoapi.authorization import ExpiringMasterPlaylist
 
 TIME_TO_FORCE_TERMINATION = 8
 
 
 class RadikoProgramAggregateToArchiveGeneral(RadikoProgramAggregateToArchive):
-    """Archiver for normal (non-time-free-30) programs, which uses ffmpeg to record the stream directly."""
+    """Archiver for normal (non-time-free-30) programs, which uses ffmpeg to record the stream directly.
+
+    The master_playlist resolved to route the program is reused to record it unless it has expired.
+    """
 
     def __init__(
         self,
         program: Program,
         output_directory: OutputDirectory,
         ffmpeg_coroutine: FFmpegCoroutine[FFmpegProcess],
+        master_playlist: ExpiringMasterPlaylist | None = None,
     ) -> None:
         super().__init__(program, output_directory)
         self.ffmpeg_coroutine = ffmpeg_coroutine
+        self.master_playlist = master_playlist
 
     async def archive(self) -> None:
-        await self.ffmpeg_coroutine.execute(RadikoStreamSpecFactory(self.program, self.output_directory).create)
+        radiko_stream_spec_factory = RadikoStreamSpecFactory(self.program, self.output_directory, self.master_playlist)
+        with METRICS.time(FFMPEG_RUN_SECONDS, purpose="record"), TRACER.span("record"):
+            await self.ffmpeg_coroutine.execute(radiko_stream_spec_factory.create)
@@ -3,16 +3,20 @@
 
 from __future__ import annotations
 
+import asyncio
 import shutil
 from typing import TYPE_CHECKING
 
 import anyio
 from typing_extensions import Self
 
+from radikopodcast.programaggregate.segment.manifest import SegmentManifest
+from radikopodcast.programaggregate.segment.retry import TRANSIENT_ERRORS
 from radikopodcast.radiko_datetime import RadikoDatetime
 
 if TYPE_CHECKING:
     from datetime import datetime
+    from pathlib import Path
     from types import TracebackType
 
     from radikopodcast.database.models import Program
@@ -20,30 +24,47 @@ if TYPE_CHECKING:
 
 
 class SegmentDirectory:
-    """Context manager for segment directory, ensuring cleanup after use."""
+    """Context manager for segment directory, ensuring cleanup after use.
+
+    The directory and its manifest are kept when the archive is interrupted or failed by a transient error, so that
+    the next attempt resumes only the missing segments.
+    """
+
+    # .m4a: Segments remuxed by ffmpeg, .aac: Raw ADTS segments fetched by SegmentsFetcher
+    SEGMENT_SUFFIXES = (".m4a", ".aac")
+    # Reason: To resume programs which the archive workflow requeues, see: radikopodcast.archive_workflow
+    RESUMABLE_ERRORS = (asyncio.CancelledError, KeyboardInterrupt, *TRANSIENT_ERRORS)
 
     def __init__(self, output_directory: OutputDirectory, program: Program) -> None:
         self.output_directory = output_directory
         self.program = program
-        self.path = anyio.Path(output_directory.path / output_directory.build_file_stem(program))
+        self.path = anyio.Path(self.build_path(output_directory, program))
+        self.manifest = SegmentManifest(self.path)
 
     async def __aenter__(self) -> Self:
         await self.path.mkdir(parents=True, exist_ok=True)
+        await self.manifest.load()
         return self
 
     async def __aexit__(
         self,
-        _exc_type: type[BaseException] | None,
+        exc_type: type[BaseException] | None,
         _exc_val: BaseException | None,
         _exc_tb: TracebackType | None,
     ) -> None:
+        if exc_type is not None and issubclass(exc_type, self.RESUMABLE_ERRORS):
+            return
         shutil.rmtree(self.path, ignore_errors=True)
 
+    @staticmethod
+    def build_path(output_directory: OutputDirectory, program: Program) -> Path:
+        return output_directory.path / output_directory.build_file_stem(program)
+
     async def create_segment_list_file(self) -> anyio.Path:
-        segment_files = sorted([f async for f in self.path.glob("*.m4a")])
+        segment_files = sorted([f async for f in self.path.iterdir() if f.suffix in self.SEGMENT_SUFFIXES])
         input_list_path = self.path / "input.txt"
         await input_list_path.write_text("\n".join(f"file '{f.name}'" for f in segment_files), encoding="utf-8")
         return input_list_path
 
-    def get_segment_path(self, segment_dt: datetime) -> anyio.Path:
-        return self.path / f"{segment_dt.strftime(RadikoDatetime.FORMAT_CODE)}.m4a"
+    def get_segment_path(self, segment_dt: datetime, suffix: str = ".m4a") -> anyio.Path:
+        return self.path / f"{segment_dt.strftime(RadikoDatetime.FORMAT_CODE)}{suffix}"
@@ -3,25 +3,33 @@
 
 from __future__ import annotations
 
+import asyncio
 import re
 from collections.abc import Callable
+from contextlib import AsyncExitStack
 from datetime import datetime
 from datetime import timedelta
+from functools import partial
 from logging import getLogger
 from typing import TYPE_CHECKING
+from urllib.parse import urljoin
 
 import aiohttp
-from asynccpu import ProcessTaskPoolExecutor
-from radikoplaylist import MasterPlaylistClient
 from radikoplaylist import TimeFree30DayMasterPlaylistRequest
 from radikoplaylist.master_playlist_request import MasterPlaylistRequest
 
+from radikopodcast.concurrency import DEFAULT_MAX_DISCOVERY_REQUESTS
+from radikopodcast.concurrency import ArchiveLimits
+from radikopodcast.concurrency import HostConcurrencyLimiters
 from radikopodcast.programaggregate.segment.gather import SiblingConsumingGather
+from radikopodcast.programaggregate.segment.retry import SegmentRetryBudget
 from radikopodcast.radiko_datetime import JST
 from radikopodcast.radiko_datetime import RadikoDatetime
+from radikopodcast.radikoapi.authorization import CachedMasterPlaylistClient
 
 if TYPE_CHECKING:
     from collections.abc import Generator
+    from collections.abc import Iterable
 
     from radikoplaylist.master_playlist import MasterPlaylist
 
@@ -30,7 +38,6 @@ if TYPE_CHECKING:
 MasterPlaylistRequestFactory = Callable[[str, int, int], MasterPlaylistRequest]
 
 _INTERVAL_SECONDS = 5
-_MAX_WORKERS = 3
 
 
 class MediaPlaylistText:
@@ -51,26 +58,42 @@ class MediaPlaylistText:
         matches = (match for url in self.analyze_urls() if (match := self.AAC_SEGMENT_PATTERN.search(url)))
         return [datetime.strptime(m.group(1), "%Y%m%d_%H%M%S").replace(tzinfo=JST) for m in matches]
 
-
-# Reason: docformatter's bug:
-# - The docformatter removes blank line against PEP8 (conflicts with Ruff (Black)) · Issue #350 · PyCQA/docformatter
-#   https://github.com/PyCQA/docformatter/issues/350
-async def fetch_media_playlist_text(master_playlist: MasterPlaylist) -> MediaPlaylistText:
-    """Fetch media playlist text from the URL in master_playlist using aiohttp."""  # noqa: D202
-
-    async with (
-        aiohttp.ClientSession() as session,
-        session.get(
-            master_playlist.media_playlist_url,
-            headers={k: v.decode() if isinstance(v, bytes) else v for k, v in master_playlist.headers.items()},
-            timeout=aiohttp.ClientTimeout(total=30),
-        ) as response,
-    ):
+    def analyze_segment_urls(self, base_url: str) -> dict[datetime, str]:
+        """Map segment datetimes to absolute AAC URLs, resolving relative URLs against base_url."""
+        urls = (urljoin(base_url, url) for url in self.analyze_urls())
+        matches = ((url, match) for url in urls if (match := self.AAC_SEGMENT_PATTERN.search(url)))
+        return {datetime.strptime(m.group(1), "%Y%m%d_%H%M%S").replace(tzinfo=JST): url for url, m in matches}
+
+
+def build_headers(master_playlist: MasterPlaylist) -> dict[str, str]:
+    """Decode the authorized headers of master_playlist so that aiohttp accepts them."""
+    return {k: v.decode() if isinstance(v, bytes) else v for k, v in master_playlist.headers.items()}
+
+
+async def fetch_media_playlist_text(
+    master_playlist: MasterPlaylist,
+    session: aiohttp.ClientSession | None = None,
+) -> MediaPlaylistText:
+    """Fetch media playlist text from the URL in master_playlist using aiohttp.
+
+    Args:
+        master_playlist: Master playlist which holds the media playlist URL and authorized headers.
+        session: Session to reuse pooled connections. A new session is created and closed when omitted.
+    """
+    async with AsyncExitStack() as stack:
+        if session is None:
+            session = await stack.enter_async_context(aiohttp.ClientSession())
+        response = await stack.enter_async_context(
+            session.get(
+                master_playlist.media_playlist_url,
+                headers=build_headers(master_playlist),
+                timeout=aiohttp.ClientTimeout(total=30),
+            ),
+        )
         response.raise_for_status()
         return MediaPlaylistText(await response.text())
 
 
-# Reason: Top-level function required for pickling in ProcessTaskPoolExecutor; all context must be explicit args.
 async def get_segment_datetimes(  # noqa: PLR0913, PLR0917 pylint: disable=too-many-arguments, too-many-positional-arguments
     station_id: str,
     start_at: int,
@@ -78,16 +101,29 @@ async def get_segment_datetimes(  # noqa: PLR0913, PLR0917 pylint: disable=too-m
     area_id: str,
     radiko_session: str,
     request_factory: MasterPlaylistRequestFactory,
+    host_limiters: HostConcurrencyLimiters | None = None,
 ) -> list[datetime]:
     """Fetch media playlist and return the segment datetimes parsed from AAC URLs."""
+    host_limiters = host_limiters or HostConcurrencyLimiters(DEFAULT_MAX_DISCOVERY_REQUESTS)
     master_playlist_request = request_factory(station_id, start_at, end_at)
-    master_playlist = MasterPlaylistClient.get(master_playlist_request, area_id=area_id, radiko_session=radiko_session)
-    text = await fetch_media_playlist_text(master_playlist)
+    # Reason: To keep the event loop running while requesting by requests, which blocks.
+    master_playlist = await asyncio.to_thread(
+        CachedMasterPlaylistClient.get,
+        master_playlist_request,
+        area_id=area_id,
+        radiko_session=radiko_session,
+    )
+    async with host_limiters.acquire(master_playlist.media_playlist_url):
+        text = await fetch_media_playlist_text(master_playlist)
     return text.analyze_segment_datetimes()
 
 
 class SegmentsDiscovery:
-    """Discovers all segment datetimes for a program via the time-free endpoint."""
+    """Discovers all segment datetimes for a program via the time-free endpoint.
+
+    Requests run concurrently in the process of the program, up to the limit shared by all in-flight programs.
+    Each request is retried by the retry budget of the program, without holding the limit while it waits to retry.
+    """
 
     def __init__(
         self,
@@ -95,21 +131,28 @@ class SegmentsDiscovery:
         area_id: str,
         radiko_session: str,
         request_factory: MasterPlaylistRequestFactory = TimeFree30DayMasterPlaylistRequest,
+        *,
+        limits: ArchiveLimits | None = None,
     ) -> None:
         self.program = program
         self.area_id = area_id
         self.radiko_session = radiko_session
         self.request_factory = request_factory
+        self.limits = limits or ArchiveLimits.create_local()
+        dt_start, dt_end = self.get_program_range()
+        self.retry_budget = SegmentRetryBudget.create(int((dt_end - dt_start).total_seconds()) // _INTERVAL_SECONDS)
         self.logger = getLogger(__name__)
 
     async def discover_all_segments(self) -> list[datetime]:
         results = await self.gather_segment_datetimes()
         return sorted({dt for result in results for dt in result})
 
+    def get_program_range(self) -> tuple[datetime, datetime]:
+        return RadikoDatetime.decode(self.program.ft_string), RadikoDatetime.decode(self.program.to_string)
+
     def create_chunks(self) -> list[tuple[datetime, datetime]]:
         """Create chunks of the program's time range to query for segments in parallel."""
-        dt_start = datetime.strptime(self.program.ft_string, RadikoDatetime.FORMAT_CODE).replace(tzinfo=JST)
-        dt_end = datetime.strptime(self.program.to_string, RadikoDatetime.FORMAT_CODE).replace(tzinfo=JST)
+        dt_start, dt_end = self.get_program_range()
         chunk = timedelta(seconds=_INTERVAL_SECONDS)
         chunks: list[tuple[datetime, datetime]] = []
         current = dt_start
@@ -120,19 +163,93 @@ class SegmentsDiscovery:
         return chunks
 
     async def gather_segment_datetimes(self) -> list[list[datetime]]:
-        """Fetch segment datetimes for all chunks in parallel using ProcessTaskPoolExecutor."""
-        chunks = self.create_chunks()
-        with ProcessTaskPoolExecutor(max_workers=_MAX_WORKERS, cancel_tasks_when_shutdown=True) as executor:
-            awaitables = {
-                executor.create_process_task(
-                    get_segment_datetimes,
-                    self.program.station_id,
-                    int(start.strftime(RadikoDatetime.FORMAT_CODE)),
-                    int(end.strftime(RadikoDatetime.FORMAT_CODE)),
-                    self.area_id,
-                    self.radiko_session,
-                    self.request_factory,
-                )
-                for start, end in chunks
-            }
-            return await SiblingConsumingGather(awaitables).run()
+        """Fetch segment datetimes for all chunks in parallel."""
+        return await self.gather_ranges(self.create_chunks())
+
+    async def gather_ranges(self, ranges: list[tuple[datetime, datetime]]) -> list[list[datetime]]:
+        """Fetch segment datetimes listed by the media playlist of each range in parallel."""
+        return await SiblingConsumingGather(self.get_segment_datetimes(start, end) for start, end in ranges).run()
+
+    async def get_segment_datetimes(self, start: datetime, end: datetime) -> list[datetime]:
+        return await self.retry_budget.run(start, partial(self.request_segment_datetimes, start, end))
+
+    async def request_segment_datetimes(self, start: datetime, end: datetime) -> list[datetime]:
+        async with self.limits.discovery_requests.acquire():
+            return await get_segment_datetimes(
+                self.program.station_id,
+                int(start.strftime(RadikoDatetime.FORMAT_CODE)),
+                int(end.strftime(RadikoDatetime.FORMAT_CODE)),
+                self.area_id,
+                self.radiko_session,
+                self.request_factory,
+                self.limits.hosts,
+            )
+
+
+class SegmentCoverage:
+    """Tracks which parts of a time range are covered by the segments found so far.
+
+    Each segment covers 5 seconds from its datetime.
+    """
+
+    def __init__(self, start: datetime, end: datetime) -> None:
+        self.start = start
+        self.end = end
+        self.segment_dts: set[datetime] = set()
+
+    def add(self, segment_dts: Iterable[datetime]) -> None:
+        self.segment_dts.update(dt for dt in segment_dts if self.overlaps(dt, self.start, self.end))
+
+    @staticmethod
+    def overlaps(segment_dt: datetime, start: datetime, end: datetime) -> bool:
+        return segment_dt < end and start < segment_dt + timedelta(seconds=_INTERVAL_SECONDS)
+
+    def find_gaps(self, start: datetime, end: datetime) -> list[tuple[datetime, datetime]]:
+        """Return the parts of start..end that no segment covers."""
+        gaps: list[tuple[datetime, datetime]] = []
+        current = start
+        for segment_dt in sorted(dt for dt in self.segment_dts if self.overlaps(dt, start, end)):
+            if current < segment_dt:
+                gaps.append((current, segment_dt))
+            current = max(current, segment_dt + timedelta(seconds=_INTERVAL_SECONDS))
+        if current < end:
+            gaps.append((current, end))
+        return gaps
+
+
+class SegmentsCoverageDiscovery(SegmentsDiscovery):
+    """Discovers segments by probing only the parts of the program not covered by returned segments yet.
+
+    Since a single media playlist usually lists many segments, the first request for the whole program covers most of
+    it. When a request returns no segment in its range, the range is bisected until it gets narrower than a segment.
+    """
+
+    async def discover_all_segments(self) -> list[datetime]:
+        coverage = SegmentCoverage(*self.get_program_range())
+        gaps = [(coverage.start, coverage.end)]
+        count_request = 0
+        while gaps:
+            count_request += len(gaps)
+            results = await self.gather_ranges(gaps)
+            for result in results:
+                coverage.add(result)
+            gaps = [
+                next_gap for gap, result in zip(gaps, results) for next_gap in self.next_gaps(coverage, gap, result)
+            ]
+        self.logger.debug("Discovered %d segments by %d requests", len(coverage.segment_dts), count_request)
+        return sorted(coverage.segment_dts)
+
+    @staticmethod
+    def next_gaps(
+        coverage: SegmentCoverage,
+        gap: tuple[datetime, datetime],
+        result: list[datetime],
+    ) -> list[tuple[datetime, datetime]]:
+        """Return the ranges to probe next for the gap which was requested and returned the result."""
+        start, end = gap
+        if any(SegmentCoverage.overlaps(dt, start, end) for dt in result):
+            return coverage.find_gaps(start, end)
+        if end - start <= timedelta(seconds=_INTERVAL_SECONDS):
+            return []
+        middle = start + timedelta(seconds=(end - start).total_seconds() // 2)
+        return [(start, middle), (middle, end)]
@@ -0,0 +1,48 @@
+# Copyright (C) 2026 Master
+"""Factory for the segment discovery mode selected by configuration."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from typing import ClassVar
+
+from radikopodcast.programaggregate.segment.discovery import SegmentsCoverageDiscovery
+from radikopodcast.programaggregate.segment.discovery import SegmentsDiscovery
+
+if TYPE_CHECKING:
+    from radikopodcast.concurrency import ArchiveLimits
+    from radikopodcast.database.models import Program
+    from radikopodcast.programaggregate.segment.discovery import MasterPlaylistRequestFactory
+
+SEGMENT_DISCOVERY_CHUNK = "chunk"
+SEGMENT_DISCOVERY_COVERAGE = "coverage"
+
+
+class SegmentsDiscoveryFactory:
+    """Factory for the segment discovery mode.
+
+    - chunk: Requests a media playlist for every 5-second chunk of the program
+    - coverage: Requests media playlists only for the parts not covered by the segments found so far
+    """
+
+    MODES: ClassVar[dict[str, type[SegmentsDiscovery]]] = {
+        SEGMENT_DISCOVERY_CHUNK: SegmentsDiscovery,
+        SEGMENT_DISCOVERY_COVERAGE: SegmentsCoverageDiscovery,
+    }
+
+    def __init__(self, mode: str = SEGMENT_DISCOVERY_CHUNK) -> None:
+        if mode not in self.MODES:
+            message = f"Unknown segment discovery: {mode=}, choose from {sorted(self.MODES)}"
+            raise ValueError(message)
+        self.mode = mode
+
+    def create(
+        self,
+        program: Program,
+        area_id: str,
+        radiko_session: str,
+        request_factory: MasterPlaylistRequestFactory,
+        *,
+        limits: ArchiveLimits | None = None,
+    ) -> SegmentsDiscovery:
+        return self.MODES[self.mode](program, area_id, radiko_session, request_factory, limits=limits)
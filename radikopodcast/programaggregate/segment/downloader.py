@@ -3,59 +3,155 @@
 
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime
 from datetime import timedelta
+from functools import partial
+from itertools import chain
 from logging import getLogger
 from typing import TYPE_CHECKING
+from typing import ClassVar
 
 import ffmpeg
-from asynccpu import ProcessTaskPoolExecutor
-from radikoplaylist import MasterPlaylistClient
 from radikoplaylist import TimeFree30DayMasterPlaylistRequest
 
+from radikopodcast.concurrency import ArchiveLimits
+from radikopodcast.metrics import FFMPEG_RUN_SECONDS
+from radikopodcast.metrics import METRICS
+from radikopodcast.metrics import SEGMENT_BYTES_WRITTEN
+from radikopodcast.metrics import SEGMENTS_DOWNLOADED
 from radikopodcast.programaggregate.segment.gather import SiblingConsumingGather
+from radikopodcast.programaggregate.segment.retry import SegmentRetryBudget
 from radikopodcast.radiko_datetime import RadikoDatetime
+from radikopodcast.radikoapi.authorization import CachedMasterPlaylistClient
+from radikopodcast.tracing import TRACER
 
 if TYPE_CHECKING:
+    from collections.abc import Awaitable
+    from collections.abc import Callable
+
     import anyio
 
     from radikopodcast.programaggregate.segment.directory import SegmentDirectory
     from radikopodcast.programaggregate.segment.discovery import MasterPlaylistRequestFactory
+    from radikopodcast.programaggregate.segment.muxer import SegmentReorderBuffer
 
-_MAX_WORKERS = 3
 _SEGMENT_DURATION_SECONDS = 5
 
 
-class SegmentsDownloader:
-    """Downloads segments in parallel using ffmpeg and ProcessTaskPoolExecutor."""
+class SegmentsDownloaderBase:
+    """Base class of segment downloaders which write every segment into segment_dir.
+
+    Segments already completed in the manifest of segment_dir are skipped, and each segment is recorded in the
+    manifest as soon as it is written.
+    When streaming, each segment starts downloading only after it enters the window of the reorder buffer, and is
+    passed to the reorder buffer as soon as it is written.
+    Downloads run concurrently in the process of the program, up to the limit shared by all in-flight programs.
+    Each segment is retried by the retry budget of the program, without holding the limit while it waits to retry.
+    """
+
+    SUFFIX = ".m4a"
 
-    def __init__(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    def __init__(  # noqa: PLR0913 pylint: disable=too-many-arguments, too-many-positional-arguments
         self,
         station_id: str,
         area_id: str,
         radiko_session: str,
         segment_dir: SegmentDirectory,
         request_factory: MasterPlaylistRequestFactory = TimeFree30DayMasterPlaylistRequest,
+        *,
+        limits: ArchiveLimits | None = None,
     ) -> None:
         self.station_id = station_id
         self.area_id = area_id
         self.radiko_session = radiko_session
         self.segment_dir = segment_dir
         self.request_factory = request_factory
+        self.limits = limits or ArchiveLimits.create_local()
+        self.retry_budget = SegmentRetryBudget()
         self.logger = getLogger(__name__)
 
     async def download(self, segment_dts: list[datetime]) -> anyio.Path:
-        with ProcessTaskPoolExecutor(max_workers=_MAX_WORKERS, cancel_tasks_when_shutdown=True) as executor:
-            awaitables = [executor.create_process_task(self.download_segment, dt) for dt in segment_dts]
-            await SiblingConsumingGather(awaitables).run()
+        """Download missing segments and return the path of the concat list file."""
+        self.retry_budget = SegmentRetryBudget.create(len(segment_dts))
+        await self.download_missing(await self.find_missing(segment_dts))
         return await self.segment_dir.create_segment_list_file()
 
+    async def stream(self, segment_dts: list[datetime], reorder_buffer: SegmentReorderBuffer) -> None:
+        """Download missing segments, passing every segment to reorder_buffer as soon as it is available."""
+        self.retry_budget = SegmentRetryBudget.create(len(segment_dts))
+        missing_segment_dts = await self.find_missing(segment_dts)
+        completed_segment_dts = sorted(set(segment_dts) - set(missing_segment_dts))
+        await SiblingConsumingGather(
+            chain(
+                [self.download_missing(missing_segment_dts, reorder_buffer)],
+                (self.pass_completed(reorder_buffer, dt) for dt in completed_segment_dts),
+            ),
+        ).run()
+
+    async def find_missing(self, segment_dts: list[datetime]) -> list[datetime]:
+        missing_segment_dts = await self.segment_dir.manifest.find_missing(segment_dts)
+        self.logger.debug("Resume %d/%d segments", len(missing_segment_dts), len(segment_dts))
+        return missing_segment_dts
+
+    async def download_missing(
+        self,
+        segment_dts: list[datetime],
+        reorder_buffer: SegmentReorderBuffer | None = None,
+    ) -> None:
+        raise NotImplementedError
+
+    async def record_completed(
+        self,
+        segment_dt: datetime,
+        download: Callable[[], Awaitable[None]],
+        reorder_buffer: SegmentReorderBuffer | None,
+    ) -> None:
+        """Download the segment by download, then record it in the manifest."""
+        if reorder_buffer is not None:
+            await reorder_buffer.wait_turn(segment_dt)
+        with TRACER.span("download_segment", segment=RadikoDatetime.encode(segment_dt)):
+            await self.retry_budget.run(segment_dt, partial(self.download_limited, download))
+        path = self.get_segment_path(segment_dt)
+        await self.segment_dir.manifest.record_completed(segment_dt, path)
+        METRICS.inc(SEGMENTS_DOWNLOADED)
+        METRICS.inc(SEGMENT_BYTES_WRITTEN, self.segment_dir.manifest.completed[segment_dt].size)
+        if reorder_buffer is not None:
+            await reorder_buffer.put(segment_dt, path)
+
+    async def download_limited(self, download: Callable[[], Awaitable[None]]) -> None:
+        async with self.limits.segment_downloads.acquire():
+            await download()
+
+    async def pass_completed(self, reorder_buffer: SegmentReorderBuffer, segment_dt: datetime) -> None:
+        await reorder_buffer.wait_turn(segment_dt)
+        await reorder_buffer.put(segment_dt, self.get_segment_path(segment_dt))
+
+    def get_segment_path(self, segment_dt: datetime) -> anyio.Path:
+        return self.segment_dir.get_segment_path(segment_dt, self.SUFFIX)
+
+
+class SegmentsDownloader(SegmentsDownloaderBase):
+    """Downloads segments in parallel by ffmpeg, which runs in a thread for each segment."""
+
+    OUTPUT_OPTIONS: ClassVar[dict[str, str]] = {"f": "mp4", "movflags": "+faststart"}
+
+    async def download_missing(
+        self,
+        segment_dts: list[datetime],
+        reorder_buffer: SegmentReorderBuffer | None = None,
+    ) -> None:
+        await SiblingConsumingGather(
+            self.record_completed(dt, partial(self.download_segment, dt), reorder_buffer) for dt in segment_dts
+        ).run()
+
     async def download_segment(self, segment_dt: datetime) -> None:
-        """Download one 5-second segment as an .m4a file into segment_dir."""
+        """Download one 5-second segment into segment_dir by ffmpeg, which runs in a thread."""
         start_at = int(segment_dt.strftime(RadikoDatetime.FORMAT_CODE))
         end_at = int((segment_dt + timedelta(seconds=4)).strftime(RadikoDatetime.FORMAT_CODE))
         master_playlist_request = self.request_factory(self.station_id, start_at, end_at)
-        master_playlist = MasterPlaylistClient.get(
+        master_playlist = await asyncio.to_thread(
+            CachedMasterPlaylistClient.get,
             master_playlist_request,
             area_id=self.area_id,
             radiko_session=self.radiko_session,
@@ -70,10 +166,19 @@ class SegmentsDownloader:
         )
         stream = ffmpeg.output(
             stream,
-            str(self.segment_dir.get_segment_path(segment_dt)),
-            f="mp4",
+            str(self.get_segment_path(segment_dt)),
             c="copy",
-            movflags="+faststart",
             t=_SEGMENT_DURATION_SECONDS,
+            **self.OUTPUT_OPTIONS,
         )
-        ffmpeg.run(stream)
+        async with self.limits.hosts.acquire(master_playlist.media_playlist_url):
+            with METRICS.time(FFMPEG_RUN_SECONDS, purpose="segment"):
+                # Reason: To overwrite the segment file which was partially written before the archive was interrupted.
+                await asyncio.to_thread(ffmpeg.run, stream, overwrite_output=True)
+
+
+class SegmentsAdtsDownloader(SegmentsDownloader):
+    """Downloads segments as raw ADTS by ffmpeg, which the streaming muxer can concatenate byte by byte."""
+
+    SUFFIX = ".aac"
+    OUTPUT_OPTIONS: ClassVar[dict[str, str]] = {"f": "adts"}
@@ -0,0 +1,59 @@
+# Copyright (C) 2026 Master
+"""Factory for the segment downloader engine selected by configuration."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from typing import ClassVar
+
+from radikopodcast.programaggregate.segment.downloader import SegmentsAdtsDownloader
+from radikopodcast.programaggregate.segment.downloader import SegmentsDownloader
+from radikopodcast.programaggregate.segment.fetcher import SegmentsFetcher
+
+if TYPE_CHECKING:
+    from radikopodcast.concurrency import ArchiveLimits
+    from radikopodcast.programaggregate.segment.directory import SegmentDirectory
+    from radikopodcast.programaggregate.segment.discovery import MasterPlaylistRequestFactory
+    from radikopodcast.programaggregate.segment.downloader import SegmentsDownloaderBase
+
+SEGMENT_DOWNLOADER_FFMPEG = "ffmpeg"
+SEGMENT_DOWNLOADER_AIOHTTP = "aiohttp"
+
+
+class SegmentsDownloaderFactory:
+    """Factory for the segment downloader engine.
+
+    - ffmpeg: Spawns one ffmpeg process per segment
+    - aiohttp: Fetches raw AAC segments in-process over pooled connections
+
+    When streaming, the engine writes raw ADTS segments which the streaming muxer can concatenate.
+    """
+
+    ENGINES: ClassVar[dict[str, type[SegmentsDownloaderBase]]] = {
+        SEGMENT_DOWNLOADER_FFMPEG: SegmentsDownloader,
+        SEGMENT_DOWNLOADER_AIOHTTP: SegmentsFetcher,
+    }
+    STREAMING_ENGINES: ClassVar[dict[str, type[SegmentsDownloaderBase]]] = {
+        SEGMENT_DOWNLOADER_FFMPEG: SegmentsAdtsDownloader,
+        SEGMENT_DOWNLOADER_AIOHTTP: SegmentsFetcher,
+    }
+
+    def __init__(self, engine: str = SEGMENT_DOWNLOADER_FFMPEG, *, streaming: bool = False) -> None:
+        if engine not in self.ENGINES:
+            message = f"Unknown segment downloader: {engine=}, choose from {sorted(self.ENGINES)}"
+            raise ValueError(message)
+        self.engine = engine
+        self.engines = self.STREAMING_ENGINES if streaming else self.ENGINES
+
+    def create(  # noqa: PLR0913 pylint: disable=too-many-arguments, too-many-positional-arguments
+        self,
+        station_id: str,
+        area_id: str,
+        radiko_session: str,
+        segment_dir: SegmentDirectory,
+        request_factory: MasterPlaylistRequestFactory,
+        *,
+        limits: ArchiveLimits | None = None,
+    ) -> SegmentsDownloaderBase:
+        engine = self.engines[self.engine]
+        return engine(station_id, area_id, radiko_session, segment_dir, request_factory, limits=limits)
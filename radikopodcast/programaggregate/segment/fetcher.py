@@ -0,0 +1,136 @@
+# Copyright (C) 2026 Master
+"""Native segment fetcher which downloads AAC segments in-process over pooled aiohttp connections."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from functools import partial
+from typing import TYPE_CHECKING
+
+import aiohttp
+from radikoplaylist.exceptions import BadHttpStatusCodeError
+from radikoplaylist.exceptions import NoAvailableUrlError
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+from radikopodcast.programaggregate.segment.discovery import build_headers
+from radikopodcast.programaggregate.segment.discovery import fetch_media_playlist_text
+from radikopodcast.programaggregate.segment.downloader import SegmentsDownloaderBase
+from radikopodcast.programaggregate.segment.gather import SiblingConsumingGather
+from radikopodcast.radiko_datetime import RadikoDatetime
+from radikopodcast.radikoapi.authorization import CachedMasterPlaylistClient
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from radikoplaylist.master_playlist import MasterPlaylist
+
+    from radikopodcast.programaggregate.segment.discovery import MasterPlaylistRequestFactory
+    from radikopodcast.programaggregate.segment.muxer import SegmentReorderBuffer
+
+_MAX_CONNECTIONS = 8
+_SEGMENT_DURATION_SECONDS = 5
+_TIMEOUT_SECONDS = 30
+
+
+class SegmentUrlResolver:
+    """Resolves AAC segment URLs, requesting a new media playlist only for segments not listed yet.
+
+    A media playlist requested from a segment until the end of the program usually lists many following segments, so
+    most segments are resolved without any additional round-trip.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self,
+        station_id: str,
+        area_id: str,
+        radiko_session: str,
+        request_factory: MasterPlaylistRequestFactory,
+        end_at: datetime,
+    ) -> None:
+        self.station_id = station_id
+        self.area_id = area_id
+        self.radiko_session = radiko_session
+        self.request_factory = request_factory
+        self.end_at = end_at
+        self.urls: dict[datetime, str] = {}
+        self.master_playlist: MasterPlaylist | None = None
+        self.lock = asyncio.Lock()
+
+    async def resolve(self, session: aiohttp.ClientSession, segment_dt: datetime) -> tuple[str, MasterPlaylist]:
+        """Return the AAC URL of segment_dt and the master playlist that holds the headers to request it."""
+        async with self.lock:
+            if segment_dt not in self.urls:
+                await self._fetch(session, segment_dt)
+            url = self.urls.get(segment_dt)
+            if url is None or self.master_playlist is None:
+                message = f"No segment URL found for {segment_dt.isoformat()} on {self.station_id}"
+                raise NoAvailableUrlError(message)
+            return url, self.master_playlist
+
+    async def _fetch(self, session: aiohttp.ClientSession, start_at: datetime) -> None:
+        master_playlist_request = self.request_factory(
+            self.station_id,
+            int(RadikoDatetime.encode(start_at)),
+            int(RadikoDatetime.encode(self.end_at)),
+        )
+        # Reason: To keep downloads of other segments running while requesting by requests, which blocks.
+        self.master_playlist = await asyncio.to_thread(
+            CachedMasterPlaylistClient.get,
+            master_playlist_request,
+            area_id=self.area_id,
+            radiko_session=self.radiko_session,
+        )
+        text = await fetch_media_playlist_text(self.master_playlist, session)
+        self.urls.update(text.analyze_segment_urls(self.master_playlist.media_playlist_url))
+
+
+class SegmentsFetcher(SegmentsDownloaderBase):
+    """Downloads raw AAC segments in-process instead of spawning ffmpeg for each segment."""
+
+    SUFFIX = ".aac"
+
+    async def download_missing(
+        self,
+        segment_dts: list[datetime],
+        reorder_buffer: SegmentReorderBuffer | None = None,
+    ) -> None:
+        if segment_dts:
+            connector = aiohttp.TCPConnector(limit=_MAX_CONNECTIONS)
+            timeout = aiohttp.ClientTimeout(total=_TIMEOUT_SECONDS)
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                resolver = SegmentUrlResolver(
+                    self.station_id,
+                    self.area_id,
+                    self.radiko_session,
+                    self.request_factory,
+                    max(segment_dts) + timedelta(seconds=_SEGMENT_DURATION_SECONDS),
+                )
+                await SiblingConsumingGather(
+                    self.record_completed(dt, partial(self.download_segment, session, resolver, dt), reorder_buffer)
+                    for dt in segment_dts
+                ).run()
+
+    async def download_segment(
+        self,
+        session: aiohttp.ClientSession,
+        resolver: SegmentUrlResolver,
+        segment_dt: datetime,
+    ) -> None:
+        """Download one AAC segment and write its bytes into segment_dir as they are."""
+        url, master_playlist = await resolver.resolve(session, segment_dt)
+        async with self.limits.hosts.acquire(url):
+            data = await self.fetch(session, url, master_playlist)
+        await self.get_segment_path(segment_dt).write_bytes(data)
+
+    @staticmethod
+    async def fetch(session: aiohttp.ClientSession, url: str, master_playlist: MasterPlaylist) -> bytes:
+        """Fetch segment bytes, raising the same errors as the rest of the archiving pipeline."""
+        try:
+            async with session.get(url, headers=build_headers(master_playlist)) as response:
+                response.raise_for_status()
+                return await response.read()
+        except aiohttp.ClientResponseError as error:
+            raise BadHttpStatusCodeError("failed in " + url + ".") from error
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as error:
+            raise RequestsConnectionError("failed in " + url + ".") from error
@@ -7,9 +7,9 @@ import asyncio
 from typing import TYPE_CHECKING
 from typing import Generic
 from typing import TypeVar
-from typing import cast
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
     from collections.abc import Awaitable
     from collections.abc import Iterable
 
@@ -19,22 +19,62 @@ T = TypeVar("T")
 class SiblingConsumingGather(Generic[T]):
     """Gathers awaitables, consuming every sibling's result when one fails.
 
+    Awaitables are taken from the iterable lazily, keeping at most max_in_flight of them in flight, so that memory
+    stays flat however many awaitables the iterable yields.
     Prevents "Future exception was never retrieved" warnings: when one awaitable fails, siblings are cancelled and
     their results are consumed before the original exception is re-raised.
+    Awaitables which haven't been taken yet are closed without being awaited.
     """
 
-    def __init__(self, awaitables: Iterable[Awaitable[T]]) -> None:
-        self.futures = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    DEFAULT_MAX_IN_FLIGHT = 64
+
+    def __init__(self, awaitables: Iterable[Awaitable[T]], max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> None:
+        if max_in_flight < 1:
+            message = f"{max_in_flight=}"
+            raise ValueError(message)
+        self.awaitables = enumerate(awaitables)
+        self.max_in_flight = max_in_flight
+        self.futures: dict[asyncio.Future[T], int] = {}
 
     async def run(self) -> list[T]:
-        """Gather the futures, re-raising the first exception after draining siblings."""
+        """Gather the results in the order of the awaitables, re-raising the first exception after draining siblings."""
+        results = {index: result async for index, result in self.stream_with_index()}
+        return [results[index] for index in range(len(results))]
+
+    async def stream(self) -> AsyncIterator[T]:
+        """Yield results as they complete, re-raising the first exception after draining siblings."""
+        async for _, result in self.stream_with_index():
+            yield result
+
+    async def stream_with_index(self) -> AsyncIterator[tuple[int, T]]:
+        """Yield results as they complete with the index of their awaitable."""
         try:
-            return cast("list[T]", await asyncio.gather(*self.futures))
+            self._fill()
+            while self.futures:
+                done, _ = await asyncio.wait(self.futures, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    index = self.futures.pop(future)
+                    yield index, future.result()
+                self._fill()
         except BaseException:
             self._cancel_siblings()
             await asyncio.gather(*self.futures, return_exceptions=True)
+            self._close_pending()
             raise
 
+    def _fill(self) -> None:
+        while len(self.futures) < self.max_in_flight:
+            item = next(self.awaitables, None)
+            if item is None:
+                return
+            index, awaitable = item
+            self.futures[asyncio.ensure_future(awaitable)] = index
+
     def _cancel_siblings(self) -> None:
         for future in self.futures:
             future.cancel()
+
+    def _close_pending(self) -> None:
+        for _, awaitable in self.awaitables:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
@@ -0,0 +1,105 @@
+# Copyright (C) 2026 Master
+"""Manifest of the segments discovered and completed in a segment directory, to resume interrupted archives."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import asdict
+from dataclasses import dataclass
+from logging import getLogger
+from typing import TYPE_CHECKING
+from typing import Any
+
+from radikopodcast.radiko_datetime import RadikoDatetime
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from datetime import datetime
+
+    import anyio
+
+
+@dataclass(frozen=True)
+class CompletedSegment:
+    """Segment file which was completely written."""
+
+    file: str
+    size: int
+    sha256: str
+
+    @classmethod
+    async def create(cls, path: anyio.Path) -> CompletedSegment:
+        data = await path.read_bytes()
+        return cls(path.name, len(data), hashlib.sha256(data).hexdigest())
+
+    async def verify(self, directory: anyio.Path) -> bool:
+        """Return whether the segment file still exists with the same size and checksum."""
+        path = directory / self.file
+        if not await path.exists() or (await path.stat()).st_size != self.size:
+            return False
+        return hashlib.sha256(await path.read_bytes()).hexdigest() == self.sha256
+
+
+class SegmentManifest:
+    """Append-only manifest of the segments discovered and completed in a segment directory.
+
+    Each record is a JSON line, so that the records written before the process was killed survive, and a record
+    truncated by the kill is just ignored.
+    """
+
+    FILE_NAME = "manifest.jsonl"
+
+    def __init__(self, directory: anyio.Path) -> None:
+        self.directory = directory
+        self.path = directory / self.FILE_NAME
+        # Reason: pylint bug, see: https://github.com/PyCQA/pylint/issues/3882
+        # pylint: disable=unsubscriptable-object
+        self.discovered: list[datetime] | None = None
+        self.completed: dict[datetime, CompletedSegment] = {}
+        self.logger = getLogger(__name__)
+
+    async def load(self) -> None:
+        if not await self.path.exists():
+            return
+        for line in (await self.path.read_text(encoding="utf-8")).splitlines():
+            self.apply_line(line)
+        self.logger.debug(
+            "Loaded manifest: %d discovered, %d completed",
+            len(self.discovered or []),
+            len(self.completed),
+        )
+
+    def apply_line(self, line: str) -> None:
+        try:
+            self.apply(json.loads(line))
+        except (ValueError, TypeError, KeyError):
+            self.logger.warning("Ignored broken manifest record: %s", line)
+
+    def apply(self, record: dict[str, Any]) -> None:
+        if "discovered" in record:
+            self.discovered = [RadikoDatetime.decode(string) for string in record["discovered"]]
+            return
+        segment_dt = RadikoDatetime.decode(record.pop("completed"))
+        self.completed[segment_dt] = CompletedSegment(**record)
+
+    async def record_discovered(self, segment_dts: Iterable[datetime]) -> None:
+        self.discovered = sorted(segment_dts)
+        await self.append({"discovered": [RadikoDatetime.encode(dt) for dt in self.discovered]})
+
+    async def record_completed(self, segment_dt: datetime, path: anyio.Path) -> None:
+        completed_segment = await CompletedSegment.create(path)
+        self.completed[segment_dt] = completed_segment
+        await self.append({"completed": RadikoDatetime.encode(segment_dt), **asdict(completed_segment)})
+
+    async def find_missing(self, segment_dts: Iterable[datetime]) -> list[datetime]:
+        """Return segments which are not completed yet or whose file is lost or broken."""
+        return [dt for dt in segment_dts if not await self.is_completed(dt)]
+
+    async def is_completed(self, segment_dt: datetime) -> bool:
+        completed_segment = self.completed.get(segment_dt)
+        return completed_segment is not None and await completed_segment.verify(self.directory)
+
+    async def append(self, record: dict[str, Any]) -> None:
+        async with await self.path.open("a", encoding="utf-8") as file:
+            await file.write(json.dumps(record) + "\n")
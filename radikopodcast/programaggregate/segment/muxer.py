@@ -0,0 +1,126 @@
+# Copyright (C) 2026 Master
+"""Streaming muxer which remuxes segments into the output file while the rest of segments are downloading."""
+
+from __future__ import annotations
+
+import asyncio
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+import ffmpeg
+from typing_extensions import Self
+
+if TYPE_CHECKING:
+    from datetime import datetime
+    from types import TracebackType
+
+    import anyio
+
+SEGMENT_MUXER_CONCAT = "concat"
+SEGMENT_MUXER_STREAM = "stream"
+SEGMENT_MUXERS = (SEGMENT_MUXER_CONCAT, SEGMENT_MUXER_STREAM)
+_WINDOW_SIZE = 24
+
+
+class SegmentStreamMuxer:
+    """Context manager of a long-lived ffmpeg process which remuxes ADTS segments written into its stdin.
+
+    The partially written output file is removed when the context exits by an error, so that the next attempt doesn't
+    fail by FileExistsError.
+    """
+
+    def __init__(self, out_file: anyio.Path) -> None:
+        self.out_file = out_file
+        self.process: asyncio.subprocess.Process | None = None
+        self.logger = getLogger(__name__)
+
+    def build_command(self) -> list[str]:
+        stream = ffmpeg.input("pipe:", f="aac")
+        stream = ffmpeg.output(stream, str(self.out_file), f="mp4", c="copy", movflags="+faststart")
+        # Reason: The confirmation prompt to overwrite would read segment bytes from stdin.
+        #         The output file is already confirmed not to exist by OutputDirectory.get_output_file_path().
+        return ffmpeg.compile(stream, overwrite_output=True)  # type: ignore[no-any-return]
+
+    async def __aenter__(self) -> Self:
+        command = self.build_command()
+        self.logger.debug("Start muxer: %s", command)
+        self.process = await asyncio.create_subprocess_exec(*command, stdin=asyncio.subprocess.PIPE)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        _exc_val: BaseException | None,
+        _exc_tb: TracebackType | None,
+    ) -> None:
+        process = self.get_process()
+        if exc_type is not None:
+            process.kill()
+            await process.wait()
+            await self.out_file.unlink(missing_ok=True)
+            return
+        self.get_stdin().close()
+        if await process.wait() != 0:
+            await self.out_file.unlink(missing_ok=True)
+            command = "ffmpeg"
+            raise ffmpeg.Error(command, None, None)
+
+    async def consume(self, path: anyio.Path) -> None:
+        """Write the segment file into the muxer, then remove it to keep the disk usage within the reorder window."""
+        stdin = self.get_stdin()
+        stdin.write(await path.read_bytes())
+        await stdin.drain()
+        await path.unlink()
+
+    def get_process(self) -> asyncio.subprocess.Process:
+        if self.process is None:
+            message = "Muxer is not started"
+            raise RuntimeError(message)
+        return self.process
+
+    def get_stdin(self) -> asyncio.StreamWriter:
+        stdin = self.get_process().stdin
+        if stdin is None:
+            message = "Stdin of muxer is not piped"
+            raise RuntimeError(message)
+        return stdin
+
+
+class SegmentReorderBuffer:
+    """Bounded buffer which passes segments completed out of order to the muxer in timestamp order.
+
+    A segment is allowed to start downloading only while it is within window_size segments from the next segment to
+    mux, so that at most about window_size segment files wait in the segment directory at the same time.
+    """
+
+    def __init__(
+        self,
+        segment_dts: list[datetime],
+        muxer: SegmentStreamMuxer,
+        window_size: int = _WINDOW_SIZE,
+    ) -> None:
+        self.indexes = {segment_dt: index for index, segment_dt in enumerate(sorted(segment_dts))}
+        self.muxer = muxer
+        self.window_size = window_size
+        self.next_index = 0
+        self.ready: dict[int, anyio.Path] = {}
+        self.condition = asyncio.Condition()
+
+    async def wait_turn(self, segment_dt: datetime) -> None:
+        """Wait until segment_dt enters the reorder window."""
+        index = self.indexes[segment_dt]
+        async with self.condition:
+            await self.condition.wait_for(lambda: index < self.next_index + self.window_size)
+
+    async def put(self, segment_dt: datetime, path: anyio.Path) -> None:
+        """Put the completed segment, then pass every contiguous segment from the head of the window to the muxer."""
+        async with self.condition:
+            self.ready[self.indexes[segment_dt]] = path
+            while self.next_index in self.ready:
+                await self.muxer.consume(self.ready.pop(self.next_index))
+                self.next_index += 1
+            self.condition.notify_all()
+
+    @property
+    def is_complete(self) -> bool:
+        return self.next_index == len(self.indexes)
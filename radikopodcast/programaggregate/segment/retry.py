@@ -0,0 +1,89 @@
+# Copyright (C) 2026 Master
+"""Retry of segment requests with jittered exponential backoff, bounded by a budget for each program."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from logging import getLogger
+from typing import TYPE_CHECKING
+from typing import TypeVar
+
+import aiohttp
+import ffmpeg
+from radikoplaylist.exceptions import HttpRequestError
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+from radikopodcast.logging_pipeline import SampledLogger
+from radikopodcast.metrics import METRICS
+from radikopodcast.metrics import SEGMENT_RETRIES
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+    from collections.abc import Callable
+    from datetime import datetime
+
+T = TypeVar("T")
+
+# Reason: NoAvailableUrlError is not retried since it doesn't change until the station changes its playlist.
+RETRYABLE_ERRORS = (HttpRequestError, RequestsConnectionError, ffmpeg.Error)
+# Errors which the next attempt of the program may not raise, including ones which the budget gave up on, and ones of
+# aiohttp which requests of media playlists raise as they are
+TRANSIENT_ERRORS = (*RETRYABLE_ERRORS, aiohttp.ClientError, asyncio.TimeoutError)
+
+
+class SegmentRetryBudget:
+    """Retries each segment request up to MAX_ATTEMPTS times, drawing retries from the budget of the program.
+
+    Each retry waits for a random delay up to the exponential backoff (full jitter), so that retries of siblings
+    which failed together don't hit the host at the same time again.
+    The error is raised to the archive workflow only when the segment runs out of attempts or the program runs out of
+    the budget, so that one flaky segment doesn't throw away the other segments.
+    Retries are logged every LOG_INTERVAL, since siblings fail together while the host is down.
+    """
+
+    MAX_ATTEMPTS = 5
+    BASE_DELAY_SECONDS = 1.0
+    MAX_DELAY_SECONDS = 30.0
+    BUDGET_RATIO = 0.05
+    MIN_BUDGET = 10
+    LOG_INTERVAL = 10
+
+    def __init__(self, budget: int = MIN_BUDGET) -> None:
+        self.remaining = budget
+        self.logger = SampledLogger(getLogger(__name__), self.LOG_INTERVAL)
+
+    @classmethod
+    def create(cls, count_segment: int) -> SegmentRetryBudget:
+        """Create the budget in proportion to the number of segments of the program."""
+        return cls(max(cls.MIN_BUDGET, int(count_segment * cls.BUDGET_RATIO)))
+
+    async def run(self, segment_dt: datetime, function: Callable[[], Awaitable[T]]) -> T:
+        """Await function, calling it again after the backoff while the attempts and the budget remain."""
+        attempt = 1
+        while True:
+            try:
+                return await function()
+            # Reason: The overhead is negligible compared with the request.
+            except RETRYABLE_ERRORS as error:  # noqa: PERF203
+                if attempt >= self.MAX_ATTEMPTS or self.remaining <= 0:
+                    raise
+                self.remaining -= 1
+                METRICS.inc(SEGMENT_RETRIES)
+                delay = self.compute_delay(attempt)
+                self.logger.warning(
+                    "Retry segment %s in %.1fs (attempt %d/%d, %d retries left for the program): %s",
+                    segment_dt.isoformat(),
+                    delay,
+                    attempt,
+                    self.MAX_ATTEMPTS,
+                    self.remaining,
+                    error,
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    @classmethod
+    def compute_delay(cls, attempt: int) -> float:
+        # Reason: Jitter doesn't need cryptographic randomness.
+        return random.uniform(0, min(cls.MAX_DELAY_SECONDS, cls.BASE_DELAY_SECONDS * 2 ** (attempt - 1)))  # noqa: S311
@@ -3,20 +3,38 @@
 
 from __future__ import annotations
 
+import asyncio
 from logging import getLogger
 from typing import TYPE_CHECKING
 
 import ffmpeg
 
+from radikopodcast.concurrency import ArchiveLimits
+from radikopodcast.metrics import FFMPEG_RUN_SECONDS
+from radikopodcast.metrics import METRICS
+from radikopodcast.metrics import SEGMENTS_DISCOVERED
 from radikopodcast.programaggregate.base import RadikoProgramAggregateToArchive
 from radikopodcast.programaggregate.segment.directory import SegmentDirectory
-from radikopodcast.programaggregate.segment.discovery import SegmentsDiscovery
-from radikopodcast.programaggregate.segment.downloader import SegmentsDownloader
+from radikopodcast.programaggregate.segment.discovery_factory import SEGMENT_DISCOVERY_CHUNK
+from radikopodcast.programaggregate.segment.discovery_factory import SegmentsDiscoveryFactory
+from radikopodcast.programaggregate.segment.downloader_factory import SEGMENT_DOWNLOADER_FFMPEG
+from radikopodcast.programaggregate.segment.downloader_factory import SegmentsDownloaderFactory
+from radikopodcast.programaggregate.segment.muxer import SEGMENT_MUXER_CONCAT
+from radikopodcast.programaggregate.segment.muxer import SEGMENT_MUXER_STREAM
+from radikopodcast.programaggregate.segment.muxer import SEGMENT_MUXERS
+from radikopodcast.programaggregate.segment.muxer import SegmentReorderBuffer
+from radikopodcast.programaggregate.segment.muxer import SegmentStreamMuxer
+from radikopodcast.tracing import TRACER
 
 if TYPE_CHECKING:
+    from datetime import datetime
+
+    import anyio
+
     from radikopodcast.database.models import Program
     from radikopodcast.output_directory import OutputDirectory
     from radikopodcast.programaggregate.segment.discovery import MasterPlaylistRequestFactory
+    from radikopodcast.programaggregate.segment.downloader import SegmentsDownloaderBase
 
 
 class RadikoProgramAggregateToArchiveSlowApi(RadikoProgramAggregateToArchive):
@@ -25,39 +43,87 @@ class RadikoProgramAggregateToArchiveSlowApi(RadikoProgramAggregateToArchive):
     Uses segment-by-segment download: discovers all 5-second segments in parallel,
     downloads each one independently, then concatenates into a single .m4a file.
     The request_factory controls which playlist API type (type=b or type=c) is used.
+    The segment_downloader selects the engine which downloads each segment (see SegmentsDownloaderFactory),
+    and the segment_discovery selects how to find the segments (see SegmentsDiscoveryFactory).
+    The segment_muxer selects whether to concatenate segments after all of them are downloaded ("concat"),
+    or to stream each segment into a long-lived ffmpeg as soon as it is downloaded ("stream").
+    The limits bound discovery requests and segment downloads together with other in-flight programs.
     """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913 pylint: disable=too-many-arguments
         self,
         program: Program,
         output_directory: OutputDirectory,
         radiko_session: str,
         request_factory: MasterPlaylistRequestFactory,
+        *,
+        segment_downloader: str = SEGMENT_DOWNLOADER_FFMPEG,
+        segment_discovery: str = SEGMENT_DISCOVERY_CHUNK,
+        segment_muxer: str = SEGMENT_MUXER_CONCAT,
+        limits: ArchiveLimits | None = None,
     ) -> None:
         super().__init__(program, output_directory)
         self.logger = getLogger(__name__)
+        if segment_muxer not in SEGMENT_MUXERS:
+            message = f"Unknown segment muxer: {segment_muxer=}, choose from {sorted(SEGMENT_MUXERS)}"
+            raise ValueError(message)
         self.radiko_session = radiko_session
         self.request_factory = request_factory
+        self.streaming = segment_muxer == SEGMENT_MUXER_STREAM
+        self.segments_downloader_factory = SegmentsDownloaderFactory(segment_downloader, streaming=self.streaming)
+        self.segments_discovery_factory = SegmentsDiscoveryFactory(segment_discovery)
+        self.limits = limits or ArchiveLimits.create_local()
 
     async def archive(self) -> None:
-        """Archive a program via segment-by-segment download and ffmpeg concatenation."""
+        """Archive a program via segment-by-segment download and ffmpeg concatenation or streaming."""
         out_file = await self.output_directory.get_output_file_path(self.program)
         area_id = self.program.area_id
         if not area_id:
             message = f"{self.program.area_id=}"
             raise ValueError(message)
         async with SegmentDirectory(self.output_directory, self.program) as segment_dir:
-            segment_discovery = SegmentsDiscovery(self.program, area_id, self.radiko_session, self.request_factory)
-            downloader = SegmentsDownloader(
+            downloader = self.segments_downloader_factory.create(
                 self.program.station_id,
                 area_id,
                 self.radiko_session,
                 segment_dir,
                 self.request_factory,
+                limits=self.limits,
             )
-            all_segment_dts = await segment_discovery.discover_all_segments()
+            with TRACER.span("discover_segments") as span:
+                all_segment_dts = await self.discover(segment_dir, area_id)
+                span.set_attribute("segments", len(all_segment_dts))
             self.logger.debug("Discovered %d segments for %s", len(all_segment_dts), self.program.title)
-            input_list_path = await downloader.download(all_segment_dts)
+            if self.streaming:
+                with TRACER.span("download_and_mux_segments"):
+                    await self.stream(downloader, all_segment_dts, out_file)
+                return
+            with TRACER.span("download_segments"):
+                input_list_path = await downloader.download(all_segment_dts)
             stream = ffmpeg.input(str(input_list_path), f="concat", safe=0)
             stream = ffmpeg.output(stream, str(out_file), f="mp4", c="copy", movflags="+faststart")
-            ffmpeg.run(stream)
+            with METRICS.time(FFMPEG_RUN_SECONDS, purpose="concat"), TRACER.span("concat"):
+                # Reason: To keep the heartbeat and other coroutines of the process running while ffmpeg concatenates.
+                await asyncio.to_thread(ffmpeg.run, stream)
+
+    @staticmethod
+    async def stream(downloader: SegmentsDownloaderBase, segment_dts: list[datetime], out_file: anyio.Path) -> None:
+        """Mux each segment into out_file in timestamp order as soon as it is downloaded."""
+        async with SegmentStreamMuxer(out_file) as muxer:
+            await downloader.stream(segment_dts, SegmentReorderBuffer(segment_dts, muxer))
+
+    async def discover(self, segment_dir: SegmentDirectory, area_id: str) -> list[datetime]:
+        """Discover all segments, or reuse the ones recorded in the manifest by the interrupted attempt."""
+        if segment_dir.manifest.discovered is not None:
+            return segment_dir.manifest.discovered
+        segment_discovery = self.segments_discovery_factory.create(
+            self.program,
+            area_id,
+            self.radiko_session,
+            self.request_factory,
+            limits=self.limits,
+        )
+        segment_dts = await segment_discovery.discover_all_segments()
+        METRICS.inc(SEGMENTS_DISCOVERED, len(segment_dts))
+        await segment_dir.manifest.record_discovered(segment_dts)
+        return segment_dts
@@ -7,9 +7,13 @@ from typing import TYPE_CHECKING
 
 from radikoplaylist import TimeFree30DayMasterPlaylistRequest
 
+from radikopodcast.programaggregate.segment.discovery_factory import SEGMENT_DISCOVERY_CHUNK
+from radikopodcast.programaggregate.segment.downloader_factory import SEGMENT_DOWNLOADER_FFMPEG
+from radikopodcast.programaggregate.segment.muxer import SEGMENT_MUXER_CONCAT
 from radikopodcast.programaggregate.slowapi import RadikoProgramAggregateToArchiveSlowApi
 
 if TYPE_CHECKING:
+    from radikopodcast.concurrency import ArchiveLimits
     from radikopodcast.database.models import Program
     from radikopodcast.output_directory import OutputDirectory
 
@@ -21,5 +25,24 @@ class RadikoProgramAggregateToArchiveTimeFree30(RadikoProgramAggregateToArchiveS
     for 30-day timefree access.
     """
 
-    def __init__(self, program: Program, output_directory: OutputDirectory, radiko_session: str) -> None:
-        super().__init__(program, output_directory, radiko_session, TimeFree30DayMasterPlaylistRequest)
+    def __init__(  # noqa: PLR0913 pylint: disable=too-many-arguments
+        self,
+        program: Program,
+        output_directory: OutputDirectory,
+        radiko_session: str,
+        *,
+        segment_downloader: str = SEGMENT_DOWNLOADER_FFMPEG,
+        segment_discovery: str = SEGMENT_DISCOVERY_CHUNK,
+        segment_muxer: str = SEGMENT_MUXER_CONCAT,
+        limits: ArchiveLimits | None = None,
+    ) -> None:
+        super().__init__(
+            program,
+            output_directory,
+            radiko_session,
+            TimeFree30DayMasterPlaylistRequest,
+            segment_downloader=segment_downloader,
+            segment_discovery=segment_discovery,
+            segment_muxer=segment_muxer,
+            limits=limits,
+        )
@@ -8,6 +8,8 @@ from datetime import timezone
 
 JST = timezone(timedelta(hours=+9), "JST")
 HOUR_BORDER_OF_RADIKO_DATE = 5
+# Time from the end of a program until its time-free playlist becomes available
+TIME_FREE_AVAILABILITY_DELAY = timedelta(minutes=10)
 
 
 class RadikoDatetime:
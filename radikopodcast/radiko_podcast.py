@@ -5,24 +5,49 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from contextlib import AsyncExitStack
+from functools import partial
 from logging import LogRecord
 from typing import TYPE_CHECKING
 from typing import Any
 from typing import Callable
 
-from asynccpu import ProcessTaskPoolExecutor
+from yamldataclassconfig.utility import resolve_path
 
 from radikopodcast import CONFIG
+from radikopodcast.archive_priority import ArchivePriorityQueue
+from radikopodcast.archive_scheduler import ArchiveScheduler
 from radikopodcast.archive_workflow import RadikoArchiveWorkflow
+from radikopodcast.crash_recovery import CrashRecovery
+from radikopodcast.database.models import Program
 from radikopodcast.database.program_schedule import ProgramSchedule
+from radikopodcast.dispatch_caps import DispatchCaps
+from radikopodcast.logging_pipeline import LoggingPipeline
+from radikopodcast.metrics import HOST_CONCURRENCY_WINDOW
+from radikopodcast.metrics import HOST_LATENCY_SECONDS
+from radikopodcast.metrics import IN_FLIGHT_PROGRAMS
+from radikopodcast.metrics import METRICS
+from radikopodcast.metrics import PROGRAMS
+from radikopodcast.metrics import QUEUE_DEPTH
+from radikopodcast.metrics_server import MetricsServer
+from radikopodcast.node_lease import NodeLeases
 from radikopodcast.output_directory import OutputDirectory
 from radikopodcast.programaggregate.factory import RadikoProgramAggregateToArchiveFactory
 from radikopodcast.programaggregate.normal import TIME_TO_FORCE_TERMINATION
+from radikopodcast.radiko_datetime import RadikoDatetime
+from radikopodcast.tracing import TRACER
+from radikopodcast.wakeup import ArchiveWakeup
+from radikopodcast.wakeup import ConfigWatcher
 
 if TYPE_CHECKING:
     import queue
+    from asyncio import Future
+    from datetime import datetime
     from pathlib import Path
 
+    from radikopodcast.archive_priority import ArchiveDeadline
+    from radikopodcast.tracing import Span
+
 
 class RadikoPodcast:
     """Main class."""
@@ -36,48 +61,227 @@ class RadikoPodcast:
         queue: queue.Queue[LogRecord] | None = None,
         configurer: Callable[[], Any] | None = None,
     ) -> None:
-        logging.basicConfig(level=logging.DEBUG)
         CONFIG.load(path_to_configuration)
+        self.logging_pipeline = LoggingPipeline(CONFIG.log_level, queue)
+        self.configurer = configurer
+        self.path_to_configuration = resolve_path(path_to_configuration or CONFIG.FILE_PATH)
+        if CONFIG.trace_path is not None:
+            TRACER.path = resolve_path(CONFIG.trace_path)
         output_directory = OutputDirectory()
         program_aggregate_factory = RadikoProgramAggregateToArchiveFactory(
             output_directory,
             time_to_force_termination=time_to_force_termination,
             radiko_session=CONFIG.radiko_session,
+            segment_downloader=CONFIG.segment_downloader,
+            segment_discovery=CONFIG.segment_discovery,
+            segment_muxer=CONFIG.segment_muxer,
         )
+        self.program_aggregate_factory = program_aggregate_factory
         self.radiko_archiver = RadikoArchiveWorkflow(
             program_aggregate_factory,
             stop_if_file_exists=CONFIG.stop_if_file_exists,
         )
-        self.queue = queue
-        self.configurer = configurer
         self.program_schedule = ProgramSchedule(area_id=CONFIG.area_id, radiko_session=CONFIG.radiko_session)
+        # IDs of programs which are claimed and not finished yet
+        self.in_flight: set[int] = set()
+        self.dispatch_caps = DispatchCaps(
+            max_programs_per_station=CONFIG.max_programs_per_station,
+            max_programs_per_host=CONFIG.max_programs_per_host,
+        )
+        # Estimated datetimes when in-flight programs finish, to project deadline misses
+        self.busy_until: dict[int, datetime] = {}
+        # Root spans of in-flight programs, which the spans in the child processes are linked to
+        self.spans: dict[int, Span] = {}
+        self.node_leases = NodeLeases(CONFIG.node_id)
+        self.crash_recovery = CrashRecovery(output_directory, owner=self.node_leases.owner)
+        self.wakeup = ArchiveWakeup(ConfigWatcher(self.path_to_configuration))
+        # Revalidation of host classes running in a thread, see: revalidate_in_background()
+        self.revalidation: Future[None] | None = None
         self.logger = logging.getLogger(__name__)
 
     def run(self) -> None:
         """Run the podcast archiver."""
-        try:
-            asyncio.run(self.archive_repeatedly())
-        except Exception:
-            self.logger.exception("Unexpected error raised!")
-            raise
+        with self.logging_pipeline:
+            try:
+                asyncio.run(self.archive_repeatedly())
+            except Exception:
+                self.logger.exception("Unexpected error raised!")
+                raise
 
     async def archive_repeatedly(self) -> None:
         """Archive programs repeatedly on a schedule."""
-        with ProcessTaskPoolExecutor(
-            max_workers=CONFIG.number_process,
-            cancel_tasks_when_shutdown=True,
-            queue=self.queue,
-            configurer=self.configurer,
-        ) as executor:
+        with self.create_archive_scheduler() as archive_scheduler:
+            self.program_aggregate_factory.limits = archive_scheduler.get_limits()
+            self.crash_recovery.recover()
+            async with AsyncExitStack() as exit_stack:
+                if CONFIG.metrics_port is not None:
+                    await exit_stack.enter_async_context(
+                        MetricsServer(
+                            CONFIG.metrics_port,
+                            samples=archive_scheduler.metrics_queue,
+                            collect=self.collect_metrics,
+                        ),
+                    )
+                await self.archive_until_interrupted(archive_scheduler)
+
+    def create_archive_scheduler(self) -> ArchiveScheduler:
+        """Create the scheduler whose child processes log through the queue of the running logging pipeline."""
+        return ArchiveScheduler(
+            max_programs=CONFIG.number_process,
+            max_discovery_requests=CONFIG.max_discovery_requests,
+            max_segment_downloads=CONFIG.max_segment_downloads,
+            queue=self.logging_pipeline.queue,
+            configurer=self.logging_pipeline.create_configurer(self.configurer),
+            metrics=CONFIG.metrics_port is not None,
+            trace_path=TRACER.path,
+        )
+
+    async def archive_until_interrupted(self, archive_scheduler: ArchiveScheduler) -> None:
+        """Archive programs until interrupted, keeping the leases and recovering crashed programs meanwhile."""
+        tasks = [
+            asyncio.ensure_future(self.node_leases.run_heartbeat(self.in_flight.copy)),
+            asyncio.ensure_future(self.crash_recovery.run_periodically(self.wakeup.wake, self.in_flight.copy)),
+        ]
+        try:
             while True:
-                self.program_schedule.download_if_program_has_not_been_downloaded()
-                for program in self.program_schedule.search(CONFIG.keywords):
-                    self.logger.debug("Start: program.title = %s", program.title)
-                    # Reason: pylint bug. pylint: disable=no-member
-                    executor.create_process_task(self.radiko_archiver.execute, program)
-                    self.logger.debug("Finish: program.title = %s", program.title)
-                await self.sleep(180)
-
-    @staticmethod
-    async def sleep(second: float) -> None:
-        await asyncio.sleep(second)
+                self.archive(archive_scheduler)
+                await self.sleep_until_next_search()
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.node_leases.resign()
+
+    def collect_metrics(self) -> None:
+        """Set gauges which are computed on each scrape."""
+        for status, count in Program.count_by_status().items():
+            METRICS.set(PROGRAMS, count, status=status.name.lower())
+        METRICS.set(IN_FLIGHT_PROGRAMS, len(self.in_flight))
+        for stats in self.program_aggregate_factory.limits.hosts.get_stats():
+            METRICS.set(HOST_CONCURRENCY_WINDOW, stats.window, host=stats.host)
+            if stats.latency is not None:
+                METRICS.set(HOST_LATENCY_SECONDS, stats.latency, host=stats.host)
+
+    def archive(self, archive_scheduler: ArchiveScheduler) -> None:
+        """Refresh the schedule when this node is the leader, then dispatch programs to archive."""
+        if self.node_leases.elect():
+            self.program_schedule.download_if_program_has_not_been_downloaded()
+        programs = self.program_schedule.search(CONFIG.keywords, RadikoDatetime.now_jst())
+        # Reason: To route programs in child processes by local lookup instead of HTTP requests.
+        self.revalidate_in_background(programs)
+        self.dispatch(archive_scheduler, programs)
+
+    def revalidate_in_background(self, programs: list[Program]) -> None:
+        """Revalidate expired host classes in a thread, so that dispatch and the heartbeat don't wait for probes.
+
+        Programs dispatched before their stations are revalidated are routed by their child processes.
+        """
+        if self.revalidation is not None and not self.revalidation.done():
+            return
+        host_classifier = self.program_aggregate_factory.host_classifier
+        self.revalidation = asyncio.ensure_future(asyncio.to_thread(host_classifier.revalidate_expired, programs))
+        self.revalidation.add_done_callback(self.log_revalidation_error)
+
+    def log_revalidation_error(self, future: Future[None]) -> None:
+        """Log the error which the revalidation raised, since nothing awaits it."""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.logger.error("Failed to revalidate host classes", exc_info=error)
+
+    def dispatch(self, archive_scheduler: ArchiveScheduler, programs: list[Program]) -> None:
+        """Dispatch programs in the order of their deadline, up to the processes which are free."""
+        now = RadikoDatetime.now_jst()
+        priority_queue = ArchivePriorityQueue(
+            number_process=CONFIG.number_process,
+            timefree30=bool(CONFIG.radiko_session),
+        )
+        priority_queue.push_all((program for program in programs if program.id not in self.in_flight), now)
+        self.warn_projected_misses(priority_queue, now)
+        archive_deadlines = self.select(priority_queue)
+        METRICS.set(QUEUE_DEPTH, len(priority_queue))
+        costs = {archive_deadline.program.id: archive_deadline.cost for archive_deadline in archive_deadlines}
+        claimed_programs = self.claim([archive_deadline.program for archive_deadline in archive_deadlines])
+        for program_id in costs.keys() - {program.id for program in claimed_programs}:
+            self.dispatch_caps.release(program_id)
+        for program in claimed_programs:
+            self.logger.debug("Start: program.title = %s", program.title)
+            self.busy_until[program.id] = now + costs[program.id]
+            span = self.spans[program.id] = TRACER.start(
+                "archive_program",
+                program_id=program.id,
+                station_id=program.station_id,
+                ft=program.ft_string,
+            )
+            future = archive_scheduler.create_process_task(self.radiko_archiver.execute, program, span.context)
+            future.add_done_callback(partial(self.release, program.id))
+            self.logger.debug("Finish: program.title = %s", program.title)
+
+    def select(self, priority_queue: ArchivePriorityQueue) -> list[ArchiveDeadline]:
+        """Pop programs up to the free processes, deferring the programs over the caps of station or host."""
+        archive_deadlines: list[ArchiveDeadline] = []
+        while priority_queue and len(self.in_flight) + len(archive_deadlines) < CONFIG.number_process:
+            archive_deadline = priority_queue.pop()
+            if self.dispatch_caps.acquire(archive_deadline.program):
+                archive_deadlines.append(archive_deadline)
+                continue
+            # Reason: All programs in the queue may be deferred, and ft_string formats the datetime.
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(
+                    "Deferred: %s %s %s",
+                    archive_deadline.program.station_id,
+                    archive_deadline.program.ft_string,
+                    archive_deadline.program.title,
+                )
+        return archive_deadlines
+
+    def warn_projected_misses(self, priority_queue: ArchivePriorityQueue, now: datetime) -> None:
+        for miss in priority_queue.project_misses(now, self.busy_until.values()):
+            self.logger.warning(
+                "Projected to miss the deadline: %s %s %s (deadline: %s, estimated cost: %s)",
+                miss.program.station_id,
+                miss.program.ft_string,
+                miss.program.title,
+                miss.deadline.isoformat(),
+                miss.cost,
+            )
+
+    def claim(self, programs: list[Program]) -> list[Program]:
+        """Claim programs which are not in flight, so that each program is queued only once."""
+        claimed_programs = Program.claim(
+            (program.id for program in programs if program.id not in self.in_flight),
+            lease_owner=self.node_leases.owner,
+            lease_expires_at=self.node_leases.lease_expires_at(),
+        )
+        self.in_flight.update(program.id for program in claimed_programs)
+        return claimed_programs
+
+    def release(self, program_id: int, future: Future[Any]) -> None:
+        span = self.spans.pop(program_id, None)
+        if span is not None:
+            TRACER.end(span, None if future.cancelled() else future.exception())
+        self.in_flight.discard(program_id)
+        self.busy_until.pop(program_id, None)
+        self.dispatch_caps.release(program_id)
+        # Reason: To search the program again at its retry deadline when it failed.
+        self.wakeup.wake()
+
+    async def sleep_until_next_search(self) -> None:
+        """Sleep until the next moment when search may find a program, or the configuration changes."""
+        next_search_at = self.program_schedule.next_search_at(
+            CONFIG.keywords,
+            RadikoDatetime.now_jst(),
+            refresh=self.node_leases.is_leader,
+        )
+        self.logger.debug("Sleep until %s", next_search_at)
+        if await self.wakeup.sleep_until(next_search_at):
+            self.reload_configuration()
+
+    def reload_configuration(self) -> None:
+        """Reload the configuration, which changes keywords to search, other settings change when restarted."""
+        self.logger.info("Reload configuration: %s", self.path_to_configuration)
+        try:
+            CONFIG.load(self.path_to_configuration)
+        # Reason: To keep archiving with the current configuration until the file gets fixed.
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.logger.warning("Failed to reload configuration: %s", self.path_to_configuration, exc_info=True)
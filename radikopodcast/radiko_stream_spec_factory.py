@@ -6,22 +6,33 @@ from typing import TYPE_CHECKING
 
 # noinspection PyPackageRequirements
 import ffmpeg
-from radikoplaylist import MasterPlaylistClient
 from radikoplaylist import TimeFreeMasterPlaylistRequest
 
+from radikopodcast.radikoapi.authorization import CachedMasterPlaylistClient
+
 if TYPE_CHECKING:
     from asyncffmpeg import StreamSpec
 
     from radikopodcast.database.models import Program
     from radikopodcast.output_directory import OutputDirectory
+    from radikopodcast.radikoapi.authorization import ExpiringMasterPlaylist
 
 
 class RadikoStreamSpecFactory:
-    """Stream spec factory."""
+    """Stream spec factory.
+
+    The master_playlist is reused when it is given and has not expired, otherwise requested again.
+    """
 
-    def __init__(self, program: "Program", output_directory: "OutputDirectory") -> None:
+    def __init__(
+        self,
+        program: "Program",
+        output_directory: "OutputDirectory",
+        master_playlist: "ExpiringMasterPlaylist | None" = None,
+    ) -> None:
         self.program = program
         self.output_directory = output_directory
+        self.master_playlist = master_playlist
         if not self.program.area_id:
             message = f"{self.program.area_id=}"
             raise ValueError(message)
@@ -30,12 +41,7 @@ class RadikoStreamSpecFactory:
 
     async def create(self) -> "StreamSpec":
         """Create and return the FFmpeg StreamSpec for this program."""
-        master_playlist_request = TimeFreeMasterPlaylistRequest(
-            self.program.station_id,
-            int(self.program.ft_string),
-            int(self.program.to_string),
-        )
-        master_playlist = MasterPlaylistClient.get(master_playlist_request, area_id=self.area_id)
+        master_playlist = self.get_master_playlist()
         stream = ffmpeg.input(master_playlist.media_playlist_url, headers=master_playlist.headers, copytb="1")
         return ffmpeg.output(
             stream,
@@ -44,3 +50,15 @@ class RadikoStreamSpecFactory:
             f="mp4",
             c="copy",
         )
+
+    def get_master_playlist(self) -> "ExpiringMasterPlaylist":
+        if self.master_playlist is not None and not self.master_playlist.is_expired():
+            self.logger.debug("Reuse master playlist: %s", self.master_playlist.media_playlist_url)
+            return self.master_playlist
+        master_playlist_request = TimeFreeMasterPlaylistRequest(
+            self.program.station_id,
+            int(self.program.ft_string),
+            int(self.program.to_string),
+        )
+        self.master_playlist = CachedMasterPlaylistClient.get(master_playlist_request, area_id=self.area_id)
+        return self.master_playlist
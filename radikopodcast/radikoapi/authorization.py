@@ -0,0 +1,207 @@
+# Copyright (C) 2026 Master
+"""Authorization of radiko API cached in the database to share between processes."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from http import HTTPStatus
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+import requests
+from radikoplaylist import MasterPlaylistClient
+from radikoplaylist.authorization import Authorization
+from radikoplaylist.exceptions import BadHttpStatusCodeError
+from radikoplaylist.exceptions import HttpRequestTimeoutError
+from radikoplaylist.exceptions import NoAvailableUrlError
+from radikoplaylist.master_playlist import MasterPlaylist
+from requests import Timeout
+
+from radikopodcast.database.models import AuthToken
+from radikopodcast.exceptions import UnauthorizedError
+from radikopodcast.metrics import MASTER_PLAYLIST_SECONDS
+from radikopodcast.metrics import METRICS
+from radikopodcast.tracing import TRACER
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from radikoplaylist.master_playlist_request import MasterPlaylistRequest
+
+
+@dataclass(frozen=True)
+class AuthorizedHeaders:
+    """Authorized headers and when they expire."""
+
+    headers: dict[str, str | bytes]
+    expires_at: datetime
+
+
+class ExpiringMasterPlaylist(MasterPlaylist):
+    """Master playlist which can be reused until the headers to request its media playlist expire."""
+
+    def __init__(self, media_playlist_url: str, headers: dict[str, str | bytes], expires_at: datetime) -> None:
+        super().__init__(media_playlist_url, headers)
+        self.expires_at = expires_at
+
+    def is_expired(self) -> bool:
+        """Return whether the headers expire before the request finishes, on the same margin as AuthTokenCache."""
+        return AuthTokenCache.now() + AuthTokenCache.TIME_TO_REFRESH >= self.expires_at
+
+
+class AuthTokenCache:
+    """Cache of authorized headers keyed by the area ID and the radiko_session.
+
+    Headers are refreshed proactively when they are about to expire, by only one process which takes the lock, so
+    that requests never use headers which expire on the way.
+    The cookie of the radiko_session isn't stored, since the database may be shared between nodes, and is added back
+    from the radiko_session of the cache when headers are restored.
+    """
+
+    COOKIE = "Cookie"
+
+    TIME_TO_LIVE = timedelta(minutes=30)
+    TIME_TO_REFRESH = timedelta(minutes=5)
+    TIME_TO_LOCK = timedelta(seconds=30)
+    POLLING_INTERVAL_SECONDS = 0.5
+
+    def __init__(self, area_id: str, radiko_session: str | None = None) -> None:
+        self.area_id = area_id
+        self.radiko_session = radiko_session
+        self.token_id = hashlib.sha256(f"{area_id}\n{radiko_session or ''}".encode()).hexdigest()
+        self.logger = getLogger(__name__)
+
+    def get(self) -> AuthorizedHeaders:
+        """Return cached headers, or authorize when they are about to expire."""
+        while True:
+            now = self.now()
+            auth_token = AuthToken.find(self.token_id)
+            if self.is_valid(auth_token, now + self.TIME_TO_REFRESH):
+                return self.decode(auth_token)
+            if AuthToken.lock(self.token_id, self.area_id, now, now + self.TIME_TO_LOCK):
+                return self.refresh()
+            # Reason: Another process is refreshing, keep using current headers until they really expire.
+            if self.is_valid(auth_token, now):
+                return self.decode(auth_token)
+            time.sleep(self.POLLING_INTERVAL_SECONDS)
+
+    def refresh(self) -> AuthorizedHeaders:
+        try:
+            headers = Authorization(area_id=self.area_id, radiko_session=self.radiko_session).auth()
+        except BaseException:
+            AuthToken.unlock(self.token_id)
+            raise
+        expires_at = self.now() + self.TIME_TO_LIVE
+        AuthToken.save(self.token_id, self.encode(headers), expires_at)
+        self.logger.debug("Refreshed auth token: area_id=%s", self.area_id)
+        return AuthorizedHeaders(headers, expires_at)
+
+    def expire(self) -> None:
+        """Expire cached headers, for example, when radiko rejected them."""
+        AuthToken.expire(self.token_id)
+
+    @staticmethod
+    def is_valid(auth_token: AuthToken | None, at: datetime) -> bool:
+        return (
+            auth_token is not None
+            and auth_token.headers is not None
+            and auth_token.expires_at is not None
+            and auth_token.expires_at > at
+        )
+
+    @staticmethod
+    def now() -> datetime:
+        # Reason: SQLite doesn't store timezone.
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+    @classmethod
+    def encode(cls, headers: dict[str, str | bytes]) -> str:
+        """Encode headers except the cookie into JSON, keeping which values are bytes (X-Radiko-Partialkey)."""
+        return json.dumps(
+            {
+                "str": {key: value for key, value in headers.items() if isinstance(value, str) and key != cls.COOKIE},
+                "bytes": {
+                    key: base64.b64encode(value).decode("ascii")
+                    for key, value in headers.items()
+                    if isinstance(value, bytes)
+                },
+            },
+        )
+
+    def decode(self, auth_token: AuthToken | None) -> AuthorizedHeaders:
+        if auth_token is None or auth_token.headers is None or auth_token.expires_at is None:
+            message = f"{auth_token=}"
+            raise ValueError(message)
+        encoded = json.loads(auth_token.headers)
+        headers: dict[str, str | bytes] = dict(encoded["str"])
+        headers.update({key: base64.b64decode(value) for key, value in encoded["bytes"].items()})
+        if self.radiko_session:
+            # Reason: The same cookie as radikoplaylist.authorization.Authorization.auth() adds.
+            headers[self.COOKIE] = f"radiko_session={self.radiko_session}"
+        return AuthorizedHeaders(headers, auth_token.expires_at)
+
+
+class CachedMasterPlaylistClient(MasterPlaylistClient):
+    """MasterPlaylistClient which reuses authorized headers cached by AuthTokenCache.
+
+    The master playlist is returned with the expiry of its headers, so that callers can reuse it until it expires.
+    """
+
+    TIMEOUT_SECONDS = 5.0
+
+    @classmethod
+    def get(
+        cls,
+        master_playlist_request: MasterPlaylistRequest,
+        *,
+        area_id: str = Authorization.ARIA_ID_DEFAULT,
+        radiko_session: str | None = None,
+    ) -> ExpiringMasterPlaylist:
+        auth_token_cache = AuthTokenCache(area_id, radiko_session)
+        with METRICS.time(MASTER_PLAYLIST_SECONDS), TRACER.span("master_playlist"):
+            authorized_headers = auth_token_cache.get()
+            try:
+                url_master_playlist = cls._get_url(master_playlist_request, authorized_headers.headers)
+            except UnauthorizedError:
+                # Reason: Cached headers may be revoked by radiko before they expire.
+                auth_token_cache.expire()
+                authorized_headers = auth_token_cache.get()
+                url_master_playlist = cls._get_url(master_playlist_request, authorized_headers.headers)
+        return ExpiringMasterPlaylist(url_master_playlist, authorized_headers.headers, authorized_headers.expires_at)
+
+    @classmethod
+    def _get_url(cls, master_playlist_request: MasterPlaylistRequest, headers: Mapping[str, str | bytes]) -> str:
+        """Return the URL of the media playlist, raising UnauthorizedError only when radiko rejected the headers.
+
+        Other errors, for example, 404 and 5xx, don't mean the headers are revoked, which are shared by all processes.
+        """
+        url = master_playlist_request.build_url(headers)
+        try:
+            response = requests.get(url=url, headers=headers, timeout=cls.TIMEOUT_SECONDS)
+        except Timeout as error:
+            message = f"failed in {url}."
+            raise HttpRequestTimeoutError(message) from error
+        if response.status_code in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN):
+            message = f"failed in {url}: {response.status_code}"
+            raise UnauthorizedError(message)
+        if response.status_code != HTTPStatus.OK:
+            message = f"failed in {url}: {response.status_code}"
+            raise BadHttpStatusCodeError(message)
+        return cls.parse_media_playlist_url(url, response.text)
+
+    @staticmethod
+    def parse_media_playlist_url(url: str, text: str) -> str:
+        """Return the first URI of the master playlist as MasterPlaylistClient does."""
+        uris = (line.strip() for line in text.splitlines() if line.strip() and not line.startswith("#"))
+        media_playlist_url = next(uris, None)
+        if media_playlist_url is None:
+            message = f"No media playlist in {url}"
+            raise NoAvailableUrlError(message)
+        return media_playlist_url
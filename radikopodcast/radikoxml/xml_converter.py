@@ -34,7 +34,7 @@ class XmlConverter(Generic[T]):
     def to_model(self) -> list[T]:
         """Convert XML data to a list of SQLAlchemy models."""
         list_model = list(filter(lambda x: x is not None, self.comprehension_notation()))
-        self.logger.debug(list_model)
+        self.logger.debug("Converted %d models", len(list_model))
         # Reason: mypy's bug, see: https://github.com/python/mypy/issues/6847
         return list_model  # type: ignore[return-value]
 
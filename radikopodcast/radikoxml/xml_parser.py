@@ -27,6 +27,18 @@ if TYPE_CHECKING:
 T = TypeVar("T")
 
 
+class XmlErrorCollector(MultipleErrorCollector[XmlParseError]):
+    """Collects errors as XmlParseError, serializing the element into the message only when an error is raised."""
+
+    def __init__(self, message: str, element: Element, list_error: list[XmlParseError]) -> None:
+        super().__init__(XmlParseError, message, list_error)
+        self.element = element
+
+    def raise_as_error_class(self, exc_value: BaseException) -> None:
+        message = f"{self.message} XML: {XmlParser.to_string(self.element)}"
+        raise self.error_class(message) from exc_value
+
+
 class XmlParser:
     """Abstract XML parser."""
 
@@ -38,9 +50,9 @@ class XmlParser:
         """This method validates data."""
         return bool(self.list_error)
 
-    def stock_error(self, method: Callable[[], T], message: str) -> T | None:
-        """Collect any XmlParseError raised by method into list_error."""
-        with MultipleErrorCollector(XmlParseError, message, self.list_error):
+    def stock_error(self, method: Callable[[], T], message: str, element: Element) -> T | None:
+        """Collect any error raised by method into list_error as XmlParseError with the XML of the element."""
+        with XmlErrorCollector(message, element, self.list_error):
             return method()
         return None
 
@@ -99,14 +111,11 @@ class XmlParserProgram(XmlParser):
 
     @property
     def validate(self) -> bool:
-        self.stock_error(lambda: self.id, f"Invalid id. XML: {self.to_string(self.element_tree_program)}")
-        self.stock_error(lambda: self.ft, f"Invalid ft. XML: {self.to_string(self.element_tree_program)}")
-        self.stock_error(lambda: self.to, f"Invalid to. XML: {self.to_string(self.element_tree_program)}")
-        self.stock_error(lambda: self.title, f"Invalid title. XML: {self.to_string(self.element_tree_program)}")
-        self.stock_error(
-            lambda: self.station_id,
-            f"Invalid station id. XML: {self.to_string(self.element_tree_station)}",
-        )
+        self.stock_error(lambda: self.id, "Invalid id.", self.element_tree_program)
+        self.stock_error(lambda: self.ft, "Invalid ft.", self.element_tree_program)
+        self.stock_error(lambda: self.to, "Invalid to.", self.element_tree_program)
+        self.stock_error(lambda: self.title, "Invalid title.", self.element_tree_program)
+        self.stock_error(lambda: self.station_id, "Invalid station id.", self.element_tree_station)
         return super().validate
 
 
@@ -145,6 +154,6 @@ class XmlParserStation(XmlParser):
 
     @property
     def validate(self) -> bool:
-        self.stock_error(lambda: self.id, f"Invalid id. XML: {self.to_string(self.element_tree_station)}")
-        self.stock_error(lambda: self.name, f"Invalid name. XML: {self.to_string(self.element_tree_station)}")
+        self.stock_error(lambda: self.id, "Invalid id.", self.element_tree_station)
+        self.stock_error(lambda: self.name, "Invalid name.", self.element_tree_station)
         return super().validate
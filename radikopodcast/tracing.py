@@ -0,0 +1,153 @@
+# Copyright (C) 2026 Master
+"""Tracing spans of the stages of archives, written as OpenTelemetry (OTLP/JSON) lines into a local file."""
+
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+# Reason: Values of Span.kind and Status.code in OTLP.
+SPAN_KIND_INTERNAL = 1
+STATUS_CODE_ERROR = 2
+SCOPE_NAME = "radikopodcast"
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    """IDs which link a span to its trace and its parent, which can be passed to child processes."""
+
+    trace_id: str
+    span_id: str
+
+
+@dataclass
+class Span:
+    """Span of a stage, which is written when it ends."""
+
+    name: str
+    context: SpanContext
+    parent_span_id: str | None
+    start_time_unix_nano: int = field(default_factory=time.time_ns)
+    attributes: dict[str, str | int] = field(default_factory=dict)
+    error: str | None = None
+
+    def set_attribute(self, key: str, value: str | int) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self, end_time_unix_nano: int) -> dict[str, Any]:
+        span: dict[str, Any] = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_time_unix_nano),
+            "endTimeUnixNano": str(end_time_unix_nano),
+            "attributes": to_otlp_attributes(self.attributes),
+        }
+        if self.parent_span_id is not None:
+            span["parentSpanId"] = self.parent_span_id
+        if self.error is not None:
+            span["status"] = {"code": STATUS_CODE_ERROR, "message": self.error}
+        return span
+
+
+def to_otlp_attributes(attributes: dict[str, str | int]) -> list[dict[str, Any]]:
+    return [
+        {"key": key, "value": {"intValue": str(value)} if isinstance(value, int) else {"stringValue": value}}
+        for key, value in attributes.items()
+    ]
+
+
+CURRENT_SPAN: ContextVar[SpanContext | None] = ContextVar("CURRENT_SPAN", default=None)
+
+
+class Tracer:
+    """Writes spans into the file at path, or does nothing while path is None.
+
+    Each span is one line of OTLP/JSON ExportTraceServiceRequest, which OpenTelemetry Collector reads by its
+    otlpjson file receiver, and each line is written by one append so that processes can write into the same file.
+    The current span is kept in ContextVar, so that spans started in tasks and threads are linked to the span which
+    started them, and spans in child processes are linked by passing SpanContext as the parent.
+    """
+
+    def __init__(self) -> None:
+        self.path: Path | None = None
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, *, parent: SpanContext | None = None, **attributes: str | int) -> Iterator[Span]:
+        """Time the block as a span, which is a child of parent or of the current span."""
+        span = self.start(name, parent=parent, **attributes)
+        token = CURRENT_SPAN.set(span.context)
+        try:
+            yield span
+        except BaseException as error:
+            span.error = repr(error)
+            raise
+        finally:
+            CURRENT_SPAN.reset(token)
+            self.end(span)
+
+    def start(self, name: str, *, parent: SpanContext | None = None, **attributes: str | int) -> Span:
+        parent = parent or CURRENT_SPAN.get()
+        trace_id = secrets.token_hex(16) if parent is None else parent.trace_id
+        return Span(
+            name,
+            SpanContext(trace_id, secrets.token_hex(8)),
+            None if parent is None else parent.span_id,
+            attributes=dict(attributes),
+        )
+
+    def end(self, span: Span, error: BaseException | None = None) -> None:
+        if error is not None:
+            span.error = repr(error)
+        if self.path is None:
+            return
+        line = json.dumps(self.to_request(span.to_otlp(time.time_ns())), separators=(",", ":")) + "\n"
+        with self.lock, self.path.open("a", encoding="utf-8") as file:
+            file.write(line)
+
+    @staticmethod
+    def to_request(span: dict[str, Any]) -> dict[str, Any]:
+        resource = to_otlp_attributes({"service.name": SCOPE_NAME, "process.pid": os.getpid()})
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": resource},
+                    "scopeSpans": [{"scope": {"name": SCOPE_NAME}, "spans": [span]}],
+                },
+            ],
+        }
+
+
+TRACER = Tracer()
+
+
+class TracingConfigurer:
+    """Configurer of the child processes which writes their spans into the file at path.
+
+    The configurer given by the caller of the pool runs after that.
+    """
+
+    def __init__(self, path: Path, configurer: Callable[[], Any] | None = None) -> None:
+        self.path = path
+        self.configurer = configurer
+
+    def __call__(self) -> None:
+        TRACER.path = self.path
+        if self.configurer is not None:
+            self.configurer()
@@ -0,0 +1,91 @@
+# Copyright (C) 2026 Master
+"""Wake-up of the archive loop at the next moment when it has something to do."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from radikopodcast.radiko_datetime import RadikoDatetime
+
+if TYPE_CHECKING:
+    from datetime import datetime
+    from pathlib import Path
+
+
+class ConfigWatcher:
+    """Detects changes of the configuration file by its modification time."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.modified_at = self.stat()
+
+    def stat(self) -> int | None:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def has_changed(self) -> bool:
+        """Return whether the file changed since the previous call."""
+        modified_at = self.stat()
+        has_changed = modified_at != self.modified_at
+        self.modified_at = modified_at
+        return has_changed
+
+
+class ArchiveWakeup:
+    """Sleeps until the given moment, or until wake() is called or the configuration file changes.
+
+    The configuration file is checked by its modification time every CONFIG_POLLING_INTERVAL_SECONDS, which doesn't
+    query the database. The sleep is capped by MAX_SLEEP in case that the moment was computed from stale records.
+    """
+
+    CONFIG_POLLING_INTERVAL_SECONDS = 10.0
+    MAX_SLEEP = timedelta(hours=1)
+
+    def __init__(self, config_watcher: ConfigWatcher | None = None) -> None:
+        self.config_watcher = config_watcher
+        self.event: tuple[asyncio.AbstractEventLoop, asyncio.Event] | None = None
+        self.woken = False
+
+    def wake(self) -> None:
+        """Wake the sleep immediately, or the next sleep when it isn't sleeping."""
+        self.woken = True
+        if self.event is not None:
+            self.event[1].set()
+
+    async def sleep_until(self, moment: datetime | None) -> bool:
+        """Sleep until moment, or MAX_SLEEP when moment is None.
+
+        Returns:
+            Whether the sleep was woken by the change of the configuration file.
+        """
+        duration = (
+            self.MAX_SLEEP
+            if moment is None
+            else min(self.MAX_SLEEP, max(timedelta(), moment - RadikoDatetime.now_jst()))
+        )
+        deadline = time.monotonic() + duration.total_seconds()
+        event = self.get_event()
+        if self.woken:
+            event.set()
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                await asyncio.wait_for(event.wait(), min(remaining, self.CONFIG_POLLING_INTERVAL_SECONDS))
+            except asyncio.TimeoutError:
+                if self.config_watcher is not None and self.config_watcher.has_changed():
+                    return True
+                continue
+            break
+        event.clear()
+        self.woken = False
+        return False
+
+    def get_event(self) -> asyncio.Event:
+        loop = asyncio.get_running_loop()
+        if self.event is None or self.event[0] is not loop:
+            self.event = (loop, asyncio.Event())
+        return self.event[1]
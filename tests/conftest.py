@@ -28,8 +28,9 @@ from sqlalchemy import text
 from radikopodcast.database.models import Program
 from radikopodcast.database.session_manager import SessionManager
 from radikopodcast.radiko_datetime import JST
+from radikopodcast.radikoapi.authorization import CachedMasterPlaylistClient
+from radikopodcast.radikoapi.authorization import ExpiringMasterPlaylist
 from radikopodcast.radikoxml.xml_converter import XmlConverterProgram
-from tests.test_radiko_stream_spec_factory import MasterPlaylist
 from tests.testlibraries.database_for_test import DatabaseForTest
 
 if TYPE_CHECKING:
@@ -227,8 +228,8 @@ def _mock_requests_program_week(resource_path_root: Path, requests_mock: Mocker,
 
 @pytest.fixture
 def mock_master_playlist_client(mocker: MockFixture) -> MagicMock:
-    """Mock MasterPlaylistClient.get()."""
-    master_playlist = MasterPlaylist(
+    """Mock MasterPlaylistClient.get() and CachedMasterPlaylistClient.get()."""
+    master_playlist = ExpiringMasterPlaylist(
         "https://radiko.jp/v2/api/ts/playlist.m3u8",
         {
             "Accept": "*/*",
@@ -242,9 +243,11 @@ def mock_master_playlist_client(mocker: MockFixture) -> MagicMock:
             "X-Radiko-Partialkey": b"ZTFlZjJmZDY2YzMyMjA5ZA==",
             "X-Radiko-User": "dummy_user",
         },
+        datetime(2100, 1, 1),  # noqa: DTZ001
     )
     mock_get = mocker.MagicMock(return_value=master_playlist)
     mocker.patch.object(MasterPlaylistClient, "get", mock_get)
+    mocker.patch.object(CachedMasterPlaylistClient, "get", mock_get)
     # Reason: The MagicMock's responsible.
     return mock_get  # type: ignore[no-any-return]
 
@@ -3,9 +3,14 @@
 
 import pytest
 import sqlalchemy
+from sqlalchemy import select
 
 from radikopodcast import Session
 from radikopodcast.database.database import Database
+from radikopodcast.database.models import Keyword
+from radikopodcast.database.models import Program
+from radikopodcast.database.session_manager import SessionManager
+from radikopodcast.database.title_search import TitleSearch
 
 
 class TestDatabase:
@@ -30,6 +35,15 @@ class TestDatabase:
         column_names = {column["name"] for column in sqlalchemy.inspect(engine).get_columns("programs")}
         assert "archive_retry_count" in column_names
 
+    @staticmethod
+    @pytest.mark.usefixtures("database_session_with_schema")
+    def test_migrate_database_table() -> None:
+        """Database should create tables introduced after the database file was created."""
+        Session.execute(sqlalchemy.text("DROP TABLE auth_tokens"))
+        Session.commit()
+        Database()
+        assert sqlalchemy.inspect(Session.get_bind()).has_table("auth_tokens")
+
     @staticmethod
     @pytest.mark.usefixtures("database_session_with_schema")
     def test_migrate_database_idempotent() -> None:
@@ -39,3 +53,40 @@ class TestDatabase:
         engine = Session.get_bind()
         column_names = [column["name"] for column in sqlalchemy.inspect(engine).get_columns("programs")]
         assert column_names.count("archive_retry_count") == 1
+
+    @staticmethod
+    @pytest.mark.usefixtures("database_session_with_schema")
+    def test_migrate_database_station_columns() -> None:
+        """Database should add the host class columns to a pre-upgrade stations table."""
+        Session.execute(sqlalchemy.text("ALTER TABLE stations DROP COLUMN host_confidence"))
+        Session.commit()
+        Database()
+        engine = Session.get_bind()
+        column_names = {column["name"] for column in sqlalchemy.inspect(engine).get_columns("stations")}
+        assert {"host_class", "host_classified_at", "host_confidence", "playlist_host"} <= column_names
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_migrate_normalized_titles() -> None:
+        """Database should normalize titles ingested before, and replace the index of raw titles."""
+        assert Program.find(["Passion"]) != []
+        Session.execute(sqlalchemy.text("UPDATE programs SET title_normalized = NULL"))
+        for trigger in ("insert", "delete", "update"):
+            Session.execute(sqlalchemy.text(f"DROP TRIGGER {TitleSearch.TABLE}_{trigger}"))
+        Session.execute(sqlalchemy.text(f"DROP TABLE {TitleSearch.TABLE}"))
+        Session.execute(
+            sqlalchemy.text(
+                "CREATE VIRTUAL TABLE programs_title_fts "
+                "USING fts5(title, content='programs', content_rowid='id', tokenize='trigram')",
+            ),
+        )
+        Session.commit()
+        Database()
+        inspector = sqlalchemy.inspect(Session.get_bind())
+        assert inspector.has_table(TitleSearch.TABLE)
+        assert not inspector.has_table("programs_title_fts")
+        with SessionManager() as session:
+            assert list(session.scalars(select(Keyword.keyword))) == []
+            titles_normalized = set(session.scalars(select(Program.title_normalized)))
+        assert "roppongi passion pit" in titles_normalized
+        assert [program.title for program in Program.find(["Passion"])] == ["ROPPONGI PASSION PIT"]
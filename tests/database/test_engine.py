@@ -0,0 +1,73 @@
+# Copyright (C) 2026 Master
+"""Tests for engine.py."""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from radikopodcast.database.engine import LAZY_ENGINE
+from radikopodcast.database.engine import LazyEngine
+from radikopodcast.database.engine import LazyEngineSession
+from radikopodcast.database.engine import SQLitePragmas
+from radikopodcast.database.engine import create_database_engine
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+    from pytest_mock import MockFixture
+
+
+class TestCreateDatabaseEngine:
+    """Tests for create_database_engine()."""
+
+    @staticmethod
+    def test_sqlite_pragmas(tmp_path: Path) -> None:
+        """SQLite connections should open in WAL mode with the tuned pragmas."""
+        engine = create_database_engine(f"sqlite:///{tmp_path / 'programs.db'}")
+        synchronous_normal = 1
+        with engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert connection.execute(text("PRAGMA synchronous")).scalar() == synchronous_normal
+            assert connection.execute(text("PRAGMA busy_timeout")).scalar() == SQLitePragmas.BUSY_TIMEOUT_MILLISECONDS
+            assert connection.execute(text("PRAGMA mmap_size")).scalar() == SQLitePragmas.MMAP_SIZE
+        engine.dispose()
+
+    @staticmethod
+    def test_fork_guard(tmp_path: Path, mocker: MockFixture) -> None:
+        """Connection pooled by another process should be replaced by a new connection."""
+        engine = create_database_engine(f"sqlite:///{tmp_path / 'programs.db'}")
+        with engine.connect() as connection:
+            parent_connection = connection.connection.dbapi_connection
+        with engine.connect() as connection:
+            assert connection.connection.dbapi_connection is parent_connection
+        mocker.patch("os.getpid", return_value=os.getpid() + 1)
+        with engine.connect() as connection:
+            assert connection.connection.dbapi_connection is not parent_connection
+            assert connection.execute(text("SELECT 1")).scalar() == 1
+        engine.dispose()
+
+
+class TestLazyEngineSession:
+    """Tests for LazyEngineSession."""
+
+    @staticmethod
+    def test_get_bind(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Session should bind the engine of the URL at the first use, then reuse it."""
+        monkeypatch.chdir(tmp_path)
+        urls = iter([None, "sqlite:///other.db"])
+        lazy_engine = LazyEngine(lambda: next(urls))
+        session_factory = sessionmaker(class_=LazyEngineSession, info={LAZY_ENGINE: lazy_engine})
+        assert lazy_engine.engine is None
+        with session_factory() as session:
+            session.execute(text("CREATE TABLE programs (id INTEGER)"))
+            session.commit()
+        with session_factory() as session:
+            assert session.get_bind() is lazy_engine.engine
+        assert (tmp_path / "programs.db").exists()
+        assert not (tmp_path / "other.db").exists()
+        lazy_engine.get().dispose()
@@ -1,13 +1,28 @@
 # Copyright (C) 2026 Master
 """Test for models.py."""
 
+import sqlite3
 from collections.abc import Callable
 from datetime import date
+from datetime import datetime
+from datetime import timedelta
+from xml.etree.ElementTree import Element  # nosec B405
 
 import pytest
+from pytest_mock import MockFixture
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.session import Session as SQLAlchemySession
 
+from radikopodcast import Session
 from radikopodcast.database.models import ArchiveStatusId
+from radikopodcast.database.models import Keyword
 from radikopodcast.database.models import Program
+from radikopodcast.database.models import ProgramKeyword
+from radikopodcast.database.session_manager import SessionManager
+from radikopodcast.node_lease import NodeLeases
+from radikopodcast.radiko_datetime import JST
+from radikopodcast.radikoxml.xml_converter import XmlConverterProgram
 
 MAX_RETRY_COUNT = 5
 
@@ -42,20 +57,97 @@ class TestProgram:
         """Method: mark_archivable() should update database record as status: archivable."""
         program = find_program_by_keyword("ROPPONGI PASSION PIT")
         assert program.archive_status == ArchiveStatusId.ARCHIVABLE
-        program.mark_archiving()
+        Program.claim([program.id])
         program = find_program_by_keyword("ROPPONGI PASSION PIT")
         assert program.archive_status == ArchiveStatusId.ARCHIVING
         program.mark_archivable()
         program = find_program_by_keyword("ROPPONGI PASSION PIT")
         assert program.archive_status == ArchiveStatusId.ARCHIVABLE
 
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_mark_compare_and_swap(find_program_by_keyword: Callable[[str], Program]) -> None:
+        """Method should mark the program only from the statuses which the new status can be marked from."""
+        program = find_program_by_keyword("ROPPONGI PASSION PIT")
+        assert not program.mark_archived()
+        assert program.archive_status == ArchiveStatusId.ARCHIVABLE.value
+        # Reason: Archivable programs become archiving only by claim().
+        assert not program.mark_archiving()
+        Program.claim([program.id])
+        assert program.mark_archiving()
+        assert program.mark_archived()
+        assert program.archive_status == ArchiveStatusId.ARCHIVED.value
+        assert not program.mark_archivable()
+        assert find_program_by_keyword("ROPPONGI PASSION PIT").archive_status == ArchiveStatusId.ARCHIVED.value
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    @pytest.mark.parametrize("update_returning", [True, False])
+    def test_mark_lease_owner(
+        mocker: MockFixture,
+        find_program_by_keyword: Callable[[str], Program],
+        *,
+        update_returning: bool,
+    ) -> None:
+        """The archive which lost its program should not update it after another owner claimed it again."""
+        mocker.patch.object(Session.get_bind().dialect, "update_returning", new=update_returning)
+        program = find_program_by_keyword("ROPPONGI PASSION PIT")
+        (lost_program,) = Program.claim([program.id], lease_owner="first")
+        assert lost_program.lease_owner == "first"
+        later = NodeLeases.now() + timedelta(hours=1)
+        (stale_program,) = Program.find_stale(later, later)
+        assert stale_program.take_over(later)
+        assert stale_program.mark_retry_or_failed(MAX_RETRY_COUNT) == 1
+        (claimed_program,) = Program.claim([program.id], lease_owner="second")
+        assert not lost_program.mark_archiving()
+        assert not lost_program.mark_suspended()
+        assert not lost_program.mark_failed()
+        assert not lost_program.mark_archived()
+        assert lost_program.mark_retry_or_failed(MAX_RETRY_COUNT) is None
+        assert Program.mark_all([program.id], ArchiveStatusId.ARCHIVABLE, lease_owner="first") == set()
+        found = find_program_by_keyword("ROPPONGI PASSION PIT")
+        assert found.archive_status == ArchiveStatusId.ARCHIVING.value
+        assert found.lease_owner == "second"
+        assert found.archive_retry_count == 1
+        assert claimed_program.mark_archived()
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    @pytest.mark.parametrize("update_returning", [True, False])
+    def test_mark_all(mocker: MockFixture, *, update_returning: bool) -> None:
+        """Method should mark the programs by one UPDATE, returning only the marked programs."""
+        mocker.patch.object(Session.get_bind().dialect, "update_returning", new=update_returning)
+        programs = Program.find(["ROPPONGI PASSION PIT", "ZAPPA"])
+        program_ids = [program.id for program in programs]
+        Program.claim([programs[0].id])
+        assert Program.mark_all(program_ids, ArchiveStatusId.SUSPENDED) == {programs[0].id}
+        assert Program.mark_all(program_ids, ArchiveStatusId.ARCHIVABLE) == {programs[0].id}
+        assert [program.id for program in Program.find(["ROPPONGI PASSION PIT", "ZAPPA"])] == program_ids
+        assert Program.mark_all([], ArchiveStatusId.ARCHIVABLE) == set()
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_mark_retry_or_failed_without_returning(
+        find_program_by_keyword: Callable[[str], Program],
+        mocker: MockFixture,
+    ) -> None:
+        """Method should select the incremented retry count when the database doesn't support UPDATE ... RETURNING."""
+        mocker.patch.object(Session.get_bind().dialect, "update_returning", new=False)
+        program = find_program_by_keyword("ROPPONGI PASSION PIT")
+        assert program.mark_retry_or_failed(MAX_RETRY_COUNT) is None
+        Program.claim([program.id])
+        assert program.mark_retry_or_failed(MAX_RETRY_COUNT) == 1
+        assert program.archive_retry_count == 1
+
     @staticmethod
     @pytest.mark.usefixtures("record_program")
     def test_mark_retry_or_failed(find_program_by_keyword: Callable[[str], Program]) -> None:
         """Method should requeue the program as archivable while retries remain."""
         program = find_program_by_keyword("ROPPONGI PASSION PIT")
         assert program.archive_retry_count == 0
+        Program.claim([program.id])
         assert program.mark_retry_or_failed(MAX_RETRY_COUNT) == 1
+        assert program.mark_retry_or_failed(MAX_RETRY_COUNT) is None
         program = find_program_by_keyword("ROPPONGI PASSION PIT")
         assert program.archive_status == ArchiveStatusId.ARCHIVABLE.value
         assert program.archive_retry_count == 1
@@ -67,7 +159,140 @@ class TestProgram:
         """Method should mark the program failed once retries are exhausted."""
         program = find_program_by_keyword("ROPPONGI PASSION PIT")
         for _ in range(MAX_RETRY_COUNT - 1):
+            Program.claim([program.id])
             program.mark_retry_or_failed(MAX_RETRY_COUNT)
+        Program.claim([program.id])
         assert program.mark_retry_or_failed(MAX_RETRY_COUNT) == MAX_RETRY_COUNT
         program = find_program_by_keyword("ROPPONGI PASSION PIT")
         assert program.archive_status == ArchiveStatusId.FAILED.value
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_claim() -> None:
+        """Method should claim only archivable programs, once, in the given order."""
+        programs = Program.find(["ROPPONGI PASSION PIT", "ZAPPA"])
+        program_ids = [program.id for program in reversed(programs)]
+        claimed_programs = Program.claim(program_ids)
+        assert [program.id for program in claimed_programs] == program_ids
+        assert all(program.archive_status == ArchiveStatusId.ARCHIVING.value for program in claimed_programs)
+        assert claimed_programs[0].title is not None
+        assert Program.claim(program_ids) == []
+        assert Program.find(["ROPPONGI PASSION PIT", "ZAPPA"]) == []
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_claim_without_returning(mocker: MockFixture) -> None:
+        """Method should claim programs one by one when the database doesn't support UPDATE ... RETURNING."""
+        mocker.patch.object(Session.get_bind().dialect, "update_returning", new=False)
+        programs = Program.find(["ROPPONGI PASSION PIT", "ZAPPA"])
+        program_ids = [program.id for program in programs]
+        assert [program.id for program in Program.claim(program_ids)] == program_ids
+        assert Program.claim(program_ids) == []
+
+    @staticmethod
+    def test_claim_empty() -> None:
+        assert Program.claim([]) == []
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_find_now(find_program_by_keyword: Callable[[str], Program]) -> None:
+        """Method should exclude programs which aren't available yet or whose retry is backing off."""
+        keywords = ["ROPPONGI PASSION PIT"]
+        assert Program.find(keywords, datetime(2021, 1, 17, 0, 9, tzinfo=JST)) == []
+        now = datetime(2021, 1, 17, 0, 10, tzinfo=JST)
+        program = find_program_by_keyword("ROPPONGI PASSION PIT")
+        assert [found.id for found in Program.find(keywords, now)] == [program.id]
+        Program.claim([program.id])
+        program.mark_retry_or_failed(MAX_RETRY_COUNT, now + timedelta(minutes=3))
+        assert Program.find(keywords, now) == []
+        assert [found.id for found in Program.find(keywords, now + timedelta(minutes=3))] == [program.id]
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_find_next_archivable_at(find_program_by_keyword: Callable[[str], Program]) -> None:
+        """Method should return the earliest availability or retry deadline after now."""
+        keywords = ["ROPPONGI PASSION PIT"]
+        now = datetime(2021, 1, 16, 23, 30, tzinfo=JST)
+        assert Program.find_next_archivable_at(keywords, now) == datetime(2021, 1, 17, 0, 10, tzinfo=JST)
+        now = datetime(2021, 1, 17, 1, 0, tzinfo=JST)
+        assert Program.find_next_archivable_at(keywords, now) is None
+        retry_at = now + timedelta(minutes=3)
+        program = find_program_by_keyword("ROPPONGI PASSION PIT")
+        Program.claim([program.id])
+        program.mark_retry_or_failed(MAX_RETRY_COUNT, retry_at)
+        assert Program.find_next_archivable_at(keywords, now) == retry_at
+
+    @staticmethod
+    def test_delete(record_program: SQLAlchemySession) -> None:
+        """Programs before the boundary date should be deleted along with their keyword matches, and be committed."""
+        assert Program.find(["PASSION"]) != []
+        record_program.rollback()
+        Program.delete(date(2021, 1, 16))
+        with SessionManager() as session:
+            assert session.scalars(select(ProgramKeyword.program_id)).all() != []
+        Program.delete(date(2021, 1, 17))
+        with SessionManager() as session:
+            assert session.scalars(select(Program.id)).all() == []
+            assert session.scalars(select(ProgramKeyword.program_id)).all() == []
+
+
+class TestKeyword:
+    """Test for Keyword."""
+
+    @staticmethod
+    def test_match_ingested(database_session_with_schema: SQLAlchemySession, element_tree_program: Element) -> None:
+        """Programs should be matched against the registered keywords when they are ingested."""
+        Keyword.register(["PASSION"])
+        Program.save_all(XmlConverterProgram(date(2021, 1, 16), element_tree_program, "JP13").to_model())
+        programs = Program.find(["PASSION"])
+        assert [program.title for program in programs] == ["ROPPONGI PASSION PIT"]
+        program_ids = list(database_session_with_schema.scalars(select(ProgramKeyword.program_id)))
+        assert program_ids == [program.id for program in programs]
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    @pytest.mark.parametrize(("count_busy", "expected_keywords"), [(2, ["PASSION"]), (3, [])])
+    def test_register_busy(
+        mocker: MockFixture,
+        caplog: pytest.LogCaptureFixture,
+        *,
+        count_busy: int,
+        expected_keywords: list[str],
+    ) -> None:
+        """Registration should be retried when the database is locked, and given up without raising after that."""
+        add_all = Keyword.add_all
+        busy_errors = [
+            OperationalError("INSERT INTO keywords", {}, sqlite3.OperationalError("database is locked"))
+            for _ in range(count_busy)
+        ]
+
+        def add_all_after_busy(session: SQLAlchemySession, keywords: list[str]) -> None:
+            if busy_errors:
+                raise busy_errors.pop()
+            add_all(session, keywords)
+
+        mocker.patch.object(Keyword, "add_all", side_effect=add_all_after_busy)
+        Keyword.register(["PASSION"])
+        with SessionManager() as session:
+            assert session.scalars(select(Keyword.keyword)).all() == expected_keywords
+        assert ("given up" in caplog.text) == (not expected_keywords)
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_register_error(mocker: MockFixture) -> None:
+        """Errors other than the locked database should be raised."""
+        error = OperationalError("INSERT INTO keywords", {}, sqlite3.OperationalError("no such table: keywords"))
+        mocker.patch.object(Keyword, "add_all", side_effect=error)
+        with pytest.raises(OperationalError):
+            Keyword.register(["PASSION"])
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_remove_except(record_program: SQLAlchemySession) -> None:
+        """Keywords no longer searched should be removed along with their matches."""
+        zappa_ids = [program.id for program in Program.find(["ZAPPA"])]
+        assert Program.find(["PASSION"]) != []
+        record_program.rollback()
+        Keyword.remove_except(["ZAPPA"])
+        assert list(record_program.scalars(select(Keyword.keyword))) == ["ZAPPA"]
+        assert list(record_program.scalars(select(ProgramKeyword.program_id))) == zappa_ids
@@ -1,8 +1,11 @@
 # Copyright (C) 2026 Master
 """Test for Database."""
 
+from __future__ import annotations
+
 from datetime import datetime
 
+import pytest
 from freezegun import freeze_time
 
 from radikopodcast.database.program_schedule import ProgramSchedule
@@ -22,3 +25,44 @@ class TestDatabase:
     @staticmethod
     def test_has_downloaded() -> None:
         assert not ProgramSchedule().has_downloaded(datetime(2021, 1, 7, 0, 0, 0, tzinfo=JST))
+
+    @staticmethod
+    @pytest.mark.usefixtures("database_session", "_mock_requests_station")
+    @pytest.mark.parametrize(
+        ("last_updated", "now", "expected"),
+        [
+            (None, datetime(2021, 1, 7, 0, 0, tzinfo=JST), datetime(2021, 1, 7, 0, 0, tzinfo=JST)),
+            (None, datetime(2021, 1, 7, 5, 3, tzinfo=JST), datetime(2021, 1, 7, 5, 16, tzinfo=JST)),
+            (
+                datetime(2021, 1, 7, 4, 0, tzinfo=JST),
+                datetime(2021, 1, 7, 4, 30, tzinfo=JST),
+                datetime(2021, 1, 7, 5, 16, tzinfo=JST),
+            ),
+            (
+                datetime(2021, 1, 7, 5, 16, tzinfo=JST),
+                datetime(2021, 1, 7, 12, 0, tzinfo=JST),
+                datetime(2021, 1, 8, 5, 16, tzinfo=JST),
+            ),
+            (
+                datetime(2021, 1, 7, 5, 16, tzinfo=JST),
+                datetime(2021, 1, 9, 12, 0, tzinfo=JST),
+                datetime(2021, 1, 9, 12, 0, tzinfo=JST),
+            ),
+        ],
+    )
+    def test_next_refresh_at(last_updated: datetime | None, now: datetime, expected: datetime) -> None:
+        """Method should return when has_downloaded() turns False, skipping the margin after radiko updates."""
+        program_schedule = ProgramSchedule()
+        program_schedule.last_updated = last_updated
+        next_refresh_at = program_schedule.next_refresh_at(now)
+        assert next_refresh_at == expected
+        assert not program_schedule.has_downloaded(next_refresh_at)
+
+    @staticmethod
+    @pytest.mark.usefixtures("database_session_with_schema", "_mock_requests_station")
+    def test_next_search_at_without_refresh() -> None:
+        """Method should ignore the next refresh when this node doesn't refresh the schedule."""
+        program_schedule = ProgramSchedule()
+        now = datetime(2021, 1, 7, 0, 0, tzinfo=JST)
+        assert program_schedule.next_search_at(["ROPPONGI PASSION PIT"], now) == now
+        assert program_schedule.next_search_at(["ROPPONGI PASSION PIT"], now, refresh=False) is None
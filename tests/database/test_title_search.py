@@ -0,0 +1,65 @@
+# Copyright (C) 2026 Master
+"""Tests for title_search.py."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+import sqlalchemy
+from sqlalchemy import text
+
+from radikopodcast import Session
+from radikopodcast.database.database import Database
+from radikopodcast.database.models import Program
+from radikopodcast.database.session_manager import SessionManager
+from radikopodcast.database.title_search import TitleSearch
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm.session import Session as SQLAlchemySession
+
+
+class TestTitleSearch:
+    """Tests for TitleSearch."""
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_find() -> None:
+        """Program.find() should find programs by the index, and by LIKE for short keywords."""
+        with SessionManager() as session:
+            assert TitleSearch.exists(session)
+        programs = Program.find(["roppongi passion", 'PIT"'])
+        assert [program.title for program in programs] == ["ROPPONGI PASSION PIT"]
+        assert {program.title for program in Program.find(["ZA"])} >= {"ZAPPA"}
+        assert Program.find(["NOT BROADCAST"]) == []
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_sync(record_program: SQLAlchemySession) -> None:
+        """Index should follow updates and deletes of normalized titles."""
+        record_program.execute(text("UPDATE programs SET title_normalized = 'renamed show' WHERE title = 'ZAPPA'"))
+        record_program.commit()
+        assert Program.find(["ZAPPA"]) == []
+        assert [program.title for program in Program.find(["RENAMED"])] == ["ZAPPA"]
+        record_program.execute(text("DELETE FROM programs WHERE title_normalized = 'renamed show'"))
+        record_program.commit()
+        assert Program.find(["RENAMED"]) == []
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_migrate(record_program: SQLAlchemySession) -> None:
+        """Database should create the indexes and index the titles of the existing programs."""
+        record_program.execute(text(f"DROP TABLE {TitleSearch.TABLE}"))
+        record_program.execute(text("DROP INDEX ix_programs_archive_status_ft"))
+        record_program.commit()
+        Database()
+        inspector = sqlalchemy.inspect(Session.get_bind())
+        assert "ix_programs_archive_status_ft" in {index["name"] for index in inspector.get_indexes("programs")}
+        assert [program.title for program in Program.find(["PASSION"])] == ["ROPPONGI PASSION PIT"]
+
+    @staticmethod
+    def test_match_not_indexed() -> None:
+        """Condition should fall back to LIKE when the index isn't available."""
+        condition = TitleSearch.match(["PASSION"], Program.id, Program.title, indexed=False)
+        assert "LIKE" in str(condition)
+        assert TitleSearch.TABLE not in str(condition)
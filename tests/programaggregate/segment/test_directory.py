@@ -0,0 +1,48 @@
+# Copyright (C) 2026 Master
+"""Tests for directory.py."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import aiohttp
+import ffmpeg
+import pytest
+
+from radikopodcast.output_directory import OutputDirectory
+from radikopodcast.programaggregate.segment.directory import SegmentDirectory
+
+if TYPE_CHECKING:
+    from radikopodcast.database.models import Program
+
+
+class TestSegmentDirectory:
+    """Tests for SegmentDirectory."""
+
+    @staticmethod
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("execution_environment")
+    @pytest.mark.parametrize(
+        "error",
+        [aiohttp.ClientPayloadError(), asyncio.TimeoutError(), ffmpeg.Error("ffmpeg", b"", b"")],
+    )
+    async def test_keep_on_transient_error(model_program: Program, error: Exception) -> None:
+        """The directory should be kept to resume when the archive workflow requeues the program."""
+        segment_dir = SegmentDirectory(OutputDirectory(), model_program)
+        with pytest.raises(type(error)):
+            async with segment_dir:
+                raise error
+        assert await segment_dir.path.exists()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("execution_environment")
+    async def test_remove_on_error(model_program: Program) -> None:
+        """The directory should be removed when the error isn't resumable."""
+        segment_dir = SegmentDirectory(OutputDirectory(), model_program)
+        message = "error"
+        with pytest.raises(ValueError, match=message):
+            async with segment_dir:
+                raise ValueError(message)
+        assert not await segment_dir.path.exists()
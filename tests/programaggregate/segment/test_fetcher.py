@@ -0,0 +1,224 @@
+# Copyright (C) 2026 Master
+"""Tests for fetcher.py."""
+
+from __future__ import annotations
+
+import sys
+from datetime import datetime
+from textwrap import dedent
+from typing import TYPE_CHECKING
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+
+import aiohttp
+import anyio
+import pytest
+from radikoplaylist import TimeFreeMasterPlaylistRequest
+from radikoplaylist.exceptions import BadHttpStatusCodeError
+from radikoplaylist.exceptions import NoAvailableUrlError
+
+from radikopodcast.output_directory import OutputDirectory
+from radikopodcast.programaggregate.segment.directory import SegmentDirectory
+from radikopodcast.programaggregate.segment.downloader import SegmentsAdtsDownloader
+from radikopodcast.programaggregate.segment.downloader import SegmentsDownloader
+from radikopodcast.programaggregate.segment.downloader_factory import SEGMENT_DOWNLOADER_AIOHTTP
+from radikopodcast.programaggregate.segment.downloader_factory import SegmentsDownloaderFactory
+from radikopodcast.programaggregate.segment.fetcher import SegmentsFetcher
+from radikopodcast.programaggregate.segment.muxer import SegmentReorderBuffer
+from radikopodcast.programaggregate.segment.muxer import SegmentStreamMuxer
+from radikopodcast.programaggregate.segment.retry import SegmentRetryBudget
+from radikopodcast.radiko_datetime import JST
+
+if TYPE_CHECKING:
+    from pytest_mock import MockFixture
+
+    from radikopodcast.database.models import Program
+
+_PLAYLIST_TEXT = dedent("""\
+    #EXTM3U
+    #EXTINF:5,
+    segments/20210116_050000_FMJ_001.aac
+    #EXTINF:5,
+    https://example.com/segments/20210116_050005_FMJ_001.aac
+    #EXT-X-ENDLIST
+""")
+_SEGMENT_DTS = [datetime(2021, 1, 16, 5, 0, 0, tzinfo=JST), datetime(2021, 1, 16, 5, 0, 5, tzinfo=JST)]
+
+
+def create_mock_response(url: str) -> AsyncMock:
+    mock_response = AsyncMock()
+    mock_response.raise_for_status = MagicMock()
+    mock_response.text = AsyncMock(return_value=_PLAYLIST_TEXT)
+    mock_response.read = AsyncMock(return_value=url.encode())
+    mock_response.__aenter__ = AsyncMock(return_value=mock_response)
+    mock_response.__aexit__ = AsyncMock(return_value=False)
+    return mock_response
+
+
+@pytest.fixture
+def mock_aiohttp_session(mocker: MockFixture) -> MagicMock:
+    """Mock aiohttp.ClientSession to return a canned media playlist and the URL as segment bytes."""
+    mock_session = MagicMock()
+    mock_session.get.side_effect = lambda url, **_kwargs: create_mock_response(url)
+    mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+    mock_session.__aexit__ = AsyncMock(return_value=False)
+    mocker.patch("radikopodcast.programaggregate.segment.fetcher.aiohttp.TCPConnector")
+    mocker.patch("radikopodcast.programaggregate.segment.fetcher.aiohttp.ClientSession", return_value=mock_session)
+    return mock_session
+
+
+class TestSegmentsFetcher:
+    """Tests for SegmentsFetcher."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("execution_environment", "mock_aiohttp_session")
+    async def test_download(self, model_program: Program, mock_master_playlist_client: MagicMock) -> None:
+        """Should resolve the media playlist once and write every segment as raw AAC."""
+        async with SegmentDirectory(OutputDirectory(), model_program) as segment_dir:
+            fetcher = SegmentsFetcher("FMJ", "JP13", "", segment_dir, TimeFreeMasterPlaylistRequest)
+            input_list_path = await fetcher.download(_SEGMENT_DTS)
+            assert await input_list_path.read_text(encoding="utf-8") == (
+                "file '20210116050000.aac'\nfile '20210116050005.aac'"
+            )
+            assert await segment_dir.get_segment_path(_SEGMENT_DTS[0], ".aac").read_bytes() == (
+                b"https://radiko.jp/v2/api/ts/segments/20210116_050000_FMJ_001.aac"
+            )
+        mock_master_playlist_client.assert_called_once()
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("execution_environment")
+    async def test_download_resume(
+        self,
+        model_program: Program,
+        mock_master_playlist_client: MagicMock,
+        mock_aiohttp_session: MagicMock,
+    ) -> None:
+        """Should download only the segments which the manifest doesn't record as completed."""
+        async with SegmentDirectory(OutputDirectory(), model_program) as segment_dir:
+            completed_path = segment_dir.get_segment_path(_SEGMENT_DTS[0], ".aac")
+            await completed_path.write_bytes(b"completed")
+            await segment_dir.manifest.record_completed(_SEGMENT_DTS[0], completed_path)
+            fetcher = SegmentsFetcher("FMJ", "JP13", "", segment_dir, TimeFreeMasterPlaylistRequest)
+            await fetcher.download(_SEGMENT_DTS)
+            assert await completed_path.read_bytes() == b"completed"
+            assert await segment_dir.manifest.find_missing(_SEGMENT_DTS) == []
+        mock_master_playlist_client.assert_called_once()
+        requested_urls = [call.args[0] for call in mock_aiohttp_session.get.call_args_list]
+        assert not any(url.endswith("20210116_050000_FMJ_001.aac") for url in requested_urls)
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("execution_environment", "mock_aiohttp_session", "mock_master_playlist_client")
+    async def test_stream(self, mocker: MockFixture, model_program: Program) -> None:
+        """Should pass the completed segments and the downloaded segments to the muxer in timestamp order."""
+        code = "import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, open('output/out.m4a', 'wb'))"
+        mocker.patch.object(SegmentStreamMuxer, "build_command", return_value=[sys.executable, "-c", code])
+        async with SegmentDirectory(OutputDirectory(), model_program) as segment_dir:
+            completed_path = segment_dir.get_segment_path(_SEGMENT_DTS[1], ".aac")
+            await completed_path.write_bytes(b"completed")
+            await segment_dir.manifest.record_completed(_SEGMENT_DTS[1], completed_path)
+            fetcher = SegmentsFetcher("FMJ", "JP13", "", segment_dir, TimeFreeMasterPlaylistRequest)
+            async with SegmentStreamMuxer(anyio.Path("output/out.m4a")) as muxer:
+                await fetcher.stream(_SEGMENT_DTS, SegmentReorderBuffer(_SEGMENT_DTS, muxer))
+            assert [path async for path in segment_dir.path.glob("*.aac")] == []
+        assert await anyio.Path("output/out.m4a").read_bytes() == (
+            b"https://radiko.jp/v2/api/ts/segments/20210116_050000_FMJ_001.aaccompleted"
+        )
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("execution_environment", "mock_aiohttp_session", "mock_master_playlist_client")
+    async def test_download_not_listed(self, model_program: Program) -> None:
+        """Should raise NoAvailableUrlError when the media playlist doesn't list the segment."""
+        async with SegmentDirectory(OutputDirectory(), model_program) as segment_dir:
+            fetcher = SegmentsFetcher("FMJ", "JP13", "", segment_dir, TimeFreeMasterPlaylistRequest)
+            with pytest.raises(NoAvailableUrlError):
+                await fetcher.download([datetime(2021, 1, 16, 5, 0, 10, tzinfo=JST)])
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("execution_environment", "mock_master_playlist_client")
+    async def test_download_bad_http_status(
+        self,
+        mocker: MockFixture,
+        model_program: Program,
+        mock_aiohttp_session: MagicMock,
+    ) -> None:
+        """Should convert HTTP errors of aiohttp into BadHttpStatusCodeError to requeue the program."""
+        mocker.patch.object(SegmentRetryBudget, "BASE_DELAY_SECONDS", 0.0)
+
+        def get(url: str, **_kwargs: object) -> AsyncMock:
+            mock_response = create_mock_response(url)
+            if url.endswith(".aac"):
+                mock_response.raise_for_status.side_effect = aiohttp.ClientResponseError(MagicMock(), (), status=404)
+            return mock_response
+
+        mock_aiohttp_session.get.side_effect = get
+        async with SegmentDirectory(OutputDirectory(), model_program) as segment_dir:
+            fetcher = SegmentsFetcher("FMJ", "JP13", "", segment_dir, TimeFreeMasterPlaylistRequest)
+            with pytest.raises(BadHttpStatusCodeError):
+                await fetcher.download(_SEGMENT_DTS)
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("execution_environment", "mock_master_playlist_client")
+    async def test_download_retry(
+        self,
+        mocker: MockFixture,
+        model_program: Program,
+        mock_aiohttp_session: MagicMock,
+    ) -> None:
+        """Should retry only the flaky segment, keeping the other segments."""
+        mocker.patch.object(SegmentRetryBudget, "BASE_DELAY_SECONDS", 0.0)
+        failed_urls: set[str] = set()
+
+        def get(url: str, **_kwargs: object) -> AsyncMock:
+            mock_response = create_mock_response(url)
+            if url.endswith("20210116_050005_FMJ_001.aac") and url not in failed_urls:
+                failed_urls.add(url)
+                mock_response.raise_for_status.side_effect = aiohttp.ClientResponseError(MagicMock(), (), status=503)
+            return mock_response
+
+        mock_aiohttp_session.get.side_effect = get
+        async with SegmentDirectory(OutputDirectory(), model_program) as segment_dir:
+            fetcher = SegmentsFetcher("FMJ", "JP13", "", segment_dir, TimeFreeMasterPlaylistRequest)
+            await fetcher.download(_SEGMENT_DTS)
+            assert await segment_dir.manifest.find_missing(_SEGMENT_DTS) == []
+        requested_urls = [call.args[0] for call in mock_aiohttp_session.get.call_args_list]
+        assert sum(url.endswith("20210116_050000_FMJ_001.aac") for url in requested_urls) == 1
+        expected_count = 2
+        assert sum(url.endswith("20210116_050005_FMJ_001.aac") for url in requested_urls) == expected_count
+
+
+class TestSegmentsDownloaderFactory:
+    """Tests for SegmentsDownloaderFactory."""
+
+    @staticmethod
+    @pytest.mark.usefixtures("execution_environment")
+    def test_create(model_program: Program) -> None:
+        segment_dir = SegmentDirectory(OutputDirectory(), model_program)
+        assert isinstance(
+            SegmentsDownloaderFactory().create("FMJ", "JP13", "", segment_dir, TimeFreeMasterPlaylistRequest),
+            SegmentsDownloader,
+        )
+        assert isinstance(
+            SegmentsDownloaderFactory(SEGMENT_DOWNLOADER_AIOHTTP).create(
+                "FMJ",
+                "JP13",
+                "",
+                segment_dir,
+                TimeFreeMasterPlaylistRequest,
+            ),
+            SegmentsFetcher,
+        )
+        assert isinstance(
+            SegmentsDownloaderFactory(streaming=True).create(
+                "FMJ",
+                "JP13",
+                "",
+                segment_dir,
+                TimeFreeMasterPlaylistRequest,
+            ),
+            SegmentsAdtsDownloader,
+        )
+
+    @staticmethod
+    def test_unknown_engine() -> None:
+        with pytest.raises(ValueError, match="gstreamer"):
+            SegmentsDownloaderFactory("gstreamer")
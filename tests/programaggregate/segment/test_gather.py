@@ -4,11 +4,18 @@
 from __future__ import annotations
 
 import asyncio
+import inspect
+from typing import TYPE_CHECKING
+from typing import Any
 
 import pytest
 
 from radikopodcast.programaggregate.segment.gather import SiblingConsumingGather
 
+if TYPE_CHECKING:
+    from collections.abc import Coroutine
+    from collections.abc import Generator
+
 
 class TestSiblingConsumingGather:
     """Tests for SiblingConsumingGather."""
@@ -52,3 +59,60 @@ class TestSiblingConsumingGather:
         task.cancel()
         with pytest.raises(asyncio.CancelledError):
             await task
+
+    @pytest.mark.asyncio
+    async def test_run_bounded(self) -> None:
+        """Should take awaitables lazily, keeping at most max_in_flight of them in flight, and keep the order."""
+        max_in_flight = 3
+        count_created = 0
+        count_finished = 0
+
+        async def value(number: int) -> int:
+            nonlocal count_finished
+            await asyncio.sleep(0.01 * (number % 2))
+            count_finished += 1
+            return number
+
+        def create_awaitables() -> Generator[Coroutine[Any, Any, int]]:
+            nonlocal count_created
+            for number in range(10):
+                assert count_created - count_finished < max_in_flight
+                count_created += 1
+                yield value(number)
+
+        assert await SiblingConsumingGather(create_awaitables(), max_in_flight).run() == list(range(10))
+
+    @pytest.mark.asyncio
+    async def test_stream(self) -> None:
+        """Should yield results as they complete."""
+
+        async def value(number: int) -> int:
+            await asyncio.sleep(0.01 * number)
+            return number
+
+        assert [result async for result in SiblingConsumingGather([value(2), value(0), value(1)]).stream()] == [
+            0,
+            1,
+            2,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_run_closes_pending(self) -> None:
+        """Should close the awaitables which haven't been taken yet when one fails."""
+
+        async def fail() -> None:
+            message = "boom"
+            raise ValueError(message)
+
+        async def never_awaited() -> None:
+            pass
+
+        pending = [never_awaited() for _ in range(3)]
+        with pytest.raises(ValueError, match="boom"):
+            await SiblingConsumingGather([fail(), *pending], max_in_flight=1).run()
+        assert all(inspect.getcoroutinestate(coroutine) == inspect.CORO_CLOSED for coroutine in pending)
+
+    @staticmethod
+    def test_invalid_max_in_flight() -> None:
+        with pytest.raises(ValueError, match="max_in_flight=0"):
+            SiblingConsumingGather([], 0)
@@ -0,0 +1,75 @@
+# Copyright (C) 2026 Master
+"""Tests for manifest.py."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import anyio
+import pytest
+
+from radikopodcast.programaggregate.segment.manifest import SegmentManifest
+from radikopodcast.radiko_datetime import JST
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_SEGMENT_DTS = [datetime(2021, 1, 16, 5, 0, 0, tzinfo=JST), datetime(2021, 1, 16, 5, 0, 5, tzinfo=JST)]
+
+
+class TestSegmentManifest:
+    """Tests for SegmentManifest."""
+
+    @pytest.mark.asyncio
+    async def test_load(self, tmp_path: Path) -> None:
+        """Records should survive reloading from the directory."""
+        directory = anyio.Path(tmp_path)
+        manifest = SegmentManifest(directory)
+        await manifest.record_discovered(reversed(_SEGMENT_DTS))
+        segment_path = directory / "20210116050000.aac"
+        await segment_path.write_bytes(b"segment")
+        await manifest.record_completed(_SEGMENT_DTS[0], segment_path)
+
+        loaded = SegmentManifest(directory)
+        await loaded.load()
+        assert loaded.discovered == _SEGMENT_DTS
+        assert loaded.completed[_SEGMENT_DTS[0]].size == len(b"segment")
+        assert await loaded.find_missing(_SEGMENT_DTS) == [_SEGMENT_DTS[1]]
+
+    @pytest.mark.asyncio
+    async def test_load_no_manifest(self, tmp_path: Path) -> None:
+        manifest = SegmentManifest(anyio.Path(tmp_path))
+        await manifest.load()
+        assert manifest.discovered is None
+        assert await manifest.find_missing(_SEGMENT_DTS) == _SEGMENT_DTS
+
+    @pytest.mark.asyncio
+    async def test_load_truncated_record(self, tmp_path: Path) -> None:
+        """The record truncated when the process was killed should be ignored."""
+        directory = anyio.Path(tmp_path)
+        manifest = SegmentManifest(directory)
+        await manifest.record_discovered(_SEGMENT_DTS)
+        await manifest.append({"completed": "20210116050000", "file": "20210116050000.aac", "size": 7})
+        async with await manifest.path.open("a", encoding="utf-8") as file:
+            await file.write('{"completed": "2021011605')
+
+        loaded = SegmentManifest(directory)
+        await loaded.load()
+        assert loaded.discovered == _SEGMENT_DTS
+        assert loaded.completed == {}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("content", [b"segmenT", b"segment!", None])
+    async def test_find_missing_broken_file(self, tmp_path: Path, content: bytes | None) -> None:
+        """Segments whose file was modified or lost should be downloaded again."""
+        directory = anyio.Path(tmp_path)
+        manifest = SegmentManifest(directory)
+        segment_path = directory / "20210116050000.aac"
+        await segment_path.write_bytes(b"segment")
+        await manifest.record_completed(_SEGMENT_DTS[0], segment_path)
+        if content is None:
+            await segment_path.unlink()
+        else:
+            await segment_path.write_bytes(content)
+        assert await manifest.find_missing(_SEGMENT_DTS) == _SEGMENT_DTS
@@ -0,0 +1,120 @@
+# Copyright (C) 2026 Master
+"""Tests for muxer.py."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from datetime import datetime
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+import anyio
+import ffmpeg
+import pytest
+
+from radikopodcast.programaggregate.segment.muxer import SegmentReorderBuffer
+from radikopodcast.programaggregate.segment.muxer import SegmentStreamMuxer
+from radikopodcast.radiko_datetime import JST
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockFixture
+
+_SEGMENT_DTS = [datetime(2021, 1, 16, 5, 0, 0, tzinfo=JST) + timedelta(seconds=5 * index) for index in range(4)]
+
+
+def cat_command(out_file: Path, exit_code: int = 0) -> list[str]:
+    """Command which writes stdin into out_file instead of ffmpeg."""
+    code = f"import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, open({str(out_file)!r}, 'wb')); sys.exit({exit_code})"
+    return [sys.executable, "-c", code]
+
+
+class FakeMuxer(SegmentStreamMuxer):
+    """Muxer which records the names of consumed segment files."""
+
+    def __init__(self) -> None:
+        super().__init__(anyio.Path("out.m4a"))
+        self.consumed: list[str] = []
+
+    async def consume(self, path: anyio.Path) -> None:
+        self.consumed.append(path.name)
+
+
+class TestSegmentReorderBuffer:
+    """Tests for SegmentReorderBuffer."""
+
+    @pytest.mark.asyncio
+    async def test_put(self) -> None:
+        """Segments completed out of order should be passed to the muxer in timestamp order."""
+        muxer = FakeMuxer()
+        reorder_buffer = SegmentReorderBuffer(list(reversed(_SEGMENT_DTS)), muxer)
+        for index in [2, 0, 3]:
+            await reorder_buffer.put(_SEGMENT_DTS[index], anyio.Path(f"{index}.aac"))
+        assert muxer.consumed == ["0.aac"]
+        await reorder_buffer.put(_SEGMENT_DTS[1], anyio.Path("1.aac"))
+        assert muxer.consumed == ["0.aac", "1.aac", "2.aac", "3.aac"]
+        assert reorder_buffer.is_complete
+
+    @pytest.mark.asyncio
+    async def test_wait_turn(self) -> None:
+        """Segments beyond the window should wait until the head of the window is muxed."""
+        reorder_buffer = SegmentReorderBuffer(_SEGMENT_DTS, FakeMuxer(), window_size=2)
+        await reorder_buffer.wait_turn(_SEGMENT_DTS[1])
+        waiting = asyncio.ensure_future(reorder_buffer.wait_turn(_SEGMENT_DTS[2]))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        await reorder_buffer.put(_SEGMENT_DTS[1], anyio.Path("1.aac"))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        await reorder_buffer.put(_SEGMENT_DTS[0], anyio.Path("0.aac"))
+        await asyncio.wait_for(waiting, timeout=1)
+
+
+class TestSegmentStreamMuxer:
+    """Tests for SegmentStreamMuxer."""
+
+    @pytest.mark.asyncio
+    async def test_consume(self, mocker: MockFixture, tmp_path: Path) -> None:
+        """Segments should be written into the muxer in order and removed."""
+        out_file = tmp_path / "out.m4a"
+        mocker.patch.object(SegmentStreamMuxer, "build_command", return_value=cat_command(out_file))
+        paths = [anyio.Path(tmp_path / f"{index}.aac") for index in range(2)]
+        for index, path in enumerate(paths):
+            await path.write_bytes(f"segment{index}".encode())
+        async with SegmentStreamMuxer(anyio.Path(out_file)) as muxer:
+            for path in paths:
+                await muxer.consume(path)
+        assert out_file.read_bytes() == b"segment0segment1"
+        assert not any([await path.exists() for path in paths])
+
+    @pytest.mark.asyncio
+    async def test_error(self, mocker: MockFixture, tmp_path: Path) -> None:
+        """The partially written output file should be removed to retry."""
+        out_file = tmp_path / "out.m4a"
+        mocker.patch.object(SegmentStreamMuxer, "build_command", return_value=cat_command(out_file))
+
+        async def fail() -> None:
+            async with SegmentStreamMuxer(anyio.Path(out_file)):
+                await asyncio.sleep(0.1)
+                raise RuntimeError
+
+        with pytest.raises(RuntimeError):
+            await fail()
+        assert not out_file.exists()
+
+    @pytest.mark.asyncio
+    async def test_ffmpeg_error(self, mocker: MockFixture, tmp_path: Path) -> None:
+        out_file = tmp_path / "out.m4a"
+        mocker.patch.object(SegmentStreamMuxer, "build_command", return_value=cat_command(out_file, exit_code=1))
+        with pytest.raises(ffmpeg.Error):
+            async with SegmentStreamMuxer(anyio.Path(out_file)):
+                pass
+        assert not out_file.exists()
+
+    @staticmethod
+    def test_build_command() -> None:
+        command = SegmentStreamMuxer(anyio.Path("out.m4a")).build_command()
+        assert command[:5] == ["ffmpeg", "-f", "aac", "-i", "pipe:"]
+        assert command[-2:] == ["out.m4a", "-y"]
@@ -0,0 +1,92 @@
+# Copyright (C) 2026 Master
+"""Tests for retry.py."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import pytest
+from radikoplaylist.exceptions import BadHttpStatusCodeError
+from radikoplaylist.exceptions import NoAvailableUrlError
+
+from radikopodcast.programaggregate.segment.retry import SegmentRetryBudget
+from radikopodcast.radiko_datetime import JST
+
+if TYPE_CHECKING:
+    from pytest_mock import MockFixture
+
+_SEGMENT_DT = datetime(2021, 1, 16, 5, 0, 0, tzinfo=JST)
+
+
+class FlakyRequest:
+    """Request which fails with error for the first count_failure calls."""
+
+    def __init__(self, count_failure: int, error: Exception) -> None:
+        self.count_failure = count_failure
+        self.error = error
+        self.count_call = 0
+
+    async def __call__(self) -> str:
+        self.count_call += 1
+        if self.count_call <= self.count_failure:
+            raise self.error
+        return "segment"
+
+
+@pytest.fixture(autouse=True)
+def _no_delay(mocker: MockFixture) -> None:
+    mocker.patch.object(SegmentRetryBudget, "BASE_DELAY_SECONDS", 0.0)
+
+
+class TestSegmentRetryBudget:
+    """Tests for SegmentRetryBudget."""
+
+    @pytest.mark.asyncio
+    async def test_run(self) -> None:
+        """The segment should be retried until it succeeds, drawing retries from the budget."""
+        retry_budget = SegmentRetryBudget()
+        request = FlakyRequest(2, BadHttpStatusCodeError())
+        assert await retry_budget.run(_SEGMENT_DT, request) == "segment"
+        expected_call_count = 3
+        assert request.count_call == expected_call_count
+        assert retry_budget.remaining == SegmentRetryBudget.MIN_BUDGET - 2
+
+    @pytest.mark.asyncio
+    async def test_run_max_attempts(self) -> None:
+        """The error should be raised when the segment runs out of attempts."""
+        request = FlakyRequest(SegmentRetryBudget.MAX_ATTEMPTS, BadHttpStatusCodeError())
+        with pytest.raises(BadHttpStatusCodeError):
+            await SegmentRetryBudget().run(_SEGMENT_DT, request)
+        assert request.count_call == SegmentRetryBudget.MAX_ATTEMPTS
+
+    @pytest.mark.asyncio
+    async def test_run_budget(self) -> None:
+        """The error should be raised when the program runs out of the budget."""
+        retry_budget = SegmentRetryBudget(1)
+        assert await retry_budget.run(_SEGMENT_DT, FlakyRequest(1, BadHttpStatusCodeError())) == "segment"
+        request = FlakyRequest(1, BadHttpStatusCodeError())
+        with pytest.raises(BadHttpStatusCodeError):
+            await retry_budget.run(_SEGMENT_DT, request)
+        assert request.count_call == 1
+
+    @pytest.mark.asyncio
+    async def test_run_not_retryable(self) -> None:
+        request = FlakyRequest(1, NoAvailableUrlError())
+        with pytest.raises(NoAvailableUrlError):
+            await SegmentRetryBudget().run(_SEGMENT_DT, request)
+        assert request.count_call == 1
+
+    @staticmethod
+    def test_create() -> None:
+        assert SegmentRetryBudget.create(10).remaining == SegmentRetryBudget.MIN_BUDGET
+        expected_budget = 70
+        assert SegmentRetryBudget.create(1400).remaining == expected_budget
+
+    @staticmethod
+    @pytest.mark.parametrize(("attempt", "max_delay"), [(1, 1.0), (3, 4.0), (10, 30.0)])
+    def test_compute_delay(mocker: MockFixture, attempt: int, max_delay: float) -> None:
+        mocker.patch.object(SegmentRetryBudget, "BASE_DELAY_SECONDS", 1.0)
+        mock_uniform = mocker.patch("radikopodcast.programaggregate.segment.retry.random.uniform", return_value=0.5)
+        assert SegmentRetryBudget.compute_delay(attempt) == 0.5  # noqa: PLR2004
+        mock_uniform.assert_called_once_with(0, max_delay)
@@ -0,0 +1,140 @@
+# Copyright (C) 2026 Master
+"""Tests for host_classifier.py."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+import pytest
+from radikoplaylist.exceptions import BadHttpStatusCodeError
+from sqlalchemy import insert
+
+from radikopodcast.database.models import Station
+from radikopodcast.output_directory import OutputDirectory
+from radikopodcast.programaggregate.factory import RadikoProgramAggregateToArchiveFactory
+from radikopodcast.programaggregate.host_classifier import HOST_CLASS_FAST
+from radikopodcast.programaggregate.host_classifier import HOST_CLASS_SLOW
+from radikopodcast.programaggregate.host_classifier import StationHostClassifier
+from radikopodcast.programaggregate.slowapi import RadikoProgramAggregateToArchiveSlowApi
+
+if TYPE_CHECKING:
+    from unittest.mock import MagicMock
+
+    from sqlalchemy.orm import Session as SQLAlchemySession
+
+    from radikopodcast.database.models import Program
+
+
+@pytest.fixture
+def record_station(database_session_with_schema: SQLAlchemySession) -> SQLAlchemySession:
+    """Prepare the station of model_program."""
+    database_session_with_schema.execute(insert(Station).values(id="FMJ", name="J-WAVE"))
+    database_session_with_schema.commit()
+    return database_session_with_schema
+
+
+def get_station() -> Station:
+    station = Station.find("FMJ")
+    assert station is not None
+    return station
+
+
+@pytest.mark.usefixtures("record_station")
+class TestStationHostClassifier:
+    """Tests for StationHostClassifier."""
+
+    @staticmethod
+    def test_classify(model_program: Program, mock_master_playlist_client: MagicMock) -> None:
+        """The host class should be requested once, then looked up from the Station row."""
+        host_classifier = StationHostClassifier()
+        host_class, master_playlist = host_classifier.classify(model_program)
+        assert host_class == HOST_CLASS_FAST
+        assert master_playlist is mock_master_playlist_client.return_value
+        assert host_classifier.classify(model_program) == (HOST_CLASS_FAST, None)
+        mock_master_playlist_client.assert_called_once()
+        station = get_station()
+        assert station.host_class == HOST_CLASS_FAST
+        assert station.playlist_host == "radiko.jp"
+        assert station.host_confidence == 1
+
+    @staticmethod
+    @pytest.mark.usefixtures("mock_master_playlist_client")
+    def test_confidence(model_program: Program) -> None:
+        """The confidence should rise while the same class is observed, and reset when the class changed."""
+        host_classifier = StationHostClassifier()
+        for _ in range(StationHostClassifier.MAX_CONFIDENCE + 1):
+            host_classifier.revalidate(model_program)
+        assert get_station().host_confidence == StationHostClassifier.MAX_CONFIDENCE
+        Station.record_host_class(
+            "FMJ",
+            HOST_CLASS_SLOW,
+            StationHostClassifier.now(),
+            StationHostClassifier.MAX_CONFIDENCE,
+        )
+        assert get_station().host_confidence == 1
+
+    @staticmethod
+    @pytest.mark.usefixtures("mock_master_playlist_client")
+    def test_is_fresh(model_program: Program) -> None:
+        """The class should be reused longer as the confidence gets higher."""
+        host_classifier = StationHostClassifier()
+        host_classifier.revalidate(model_program)
+        host_classifier.revalidate(model_program)
+        station = get_station()
+        assert station.host_classified_at is not None
+        elapsed = station.host_classified_at + StationHostClassifier.TIME_TO_REVALIDATE * 1.5
+        assert StationHostClassifier.is_fresh(station, elapsed)
+        assert not StationHostClassifier.is_fresh(station, elapsed + StationHostClassifier.TIME_TO_REVALIDATE)
+
+    @staticmethod
+    def test_invalidate(model_program: Program, mock_master_playlist_client: MagicMock) -> None:
+        """The class should be revalidated on the next dispatch after a routing failure."""
+        host_classifier = StationHostClassifier()
+        host_classifier.classify(model_program)
+        host_classifier.invalidate(model_program)
+        assert get_station().host_confidence == 0
+        host_classifier.classify(model_program)
+        expected_call_count = 2
+        assert mock_master_playlist_client.call_count == expected_call_count
+
+    @staticmethod
+    def test_revalidate_expired(
+        model_program: Program,
+        model_program_area_id_none: Program,
+        mock_master_playlist_client: MagicMock,
+    ) -> None:
+        """Only expired stations should be revalidated, once for each station."""
+        host_classifier = StationHostClassifier()
+        host_classifier.revalidate_expired([model_program, model_program_area_id_none])
+        mock_master_playlist_client.assert_called_once()
+        host_classifier.revalidate_expired([model_program, model_program_area_id_none])
+        mock_master_playlist_client.assert_called_once()
+
+    @staticmethod
+    def test_revalidate_expired_error(model_program: Program, mock_master_playlist_client: MagicMock) -> None:
+        """Failure to revalidate should be left to the dispatch."""
+        mock_master_playlist_client.side_effect = BadHttpStatusCodeError
+        StationHostClassifier().revalidate_expired([model_program])
+        assert get_station().host_classified_at is None
+
+    @staticmethod
+    def test_find_latest_programs(model_program: Program, model_program_area_id_none: Program) -> None:
+        assert model_program_area_id_none.ft is not None
+        model_program_area_id_none.ft += timedelta(days=1)
+        latest_programs = StationHostClassifier.find_latest_programs([model_program_area_id_none, model_program])
+        assert latest_programs == {"FMJ": model_program_area_id_none}
+
+
+@pytest.mark.usefixtures("record_station", "execution_environment", "mock_ffmpeg_coroutine")
+class TestRadikoProgramAggregateToArchiveFactory:
+    """Tests for routing in RadikoProgramAggregateToArchiveFactory."""
+
+    @staticmethod
+    def test_create_slow(model_program: Program, mock_master_playlist_client: MagicMock) -> None:
+        """Programs of a station classified as slow should be routed by local lookup."""
+        mock_master_playlist_client.return_value.media_playlist_url = "https://example.com/playlist.m3u8"
+        factory = RadikoProgramAggregateToArchiveFactory(OutputDirectory())
+        for _ in range(2):
+            assert isinstance(factory.create(model_program), RadikoProgramAggregateToArchiveSlowApi)
+        mock_master_playlist_client.assert_called_once()
@@ -0,0 +1,174 @@
+# Copyright (C) 2026 Master
+"""Tests for authorization.py."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+import pytest
+from radikoplaylist import TimeFreeMasterPlaylistRequest
+from radikoplaylist.authorization import Authorization
+from radikoplaylist.exceptions import BadHttpStatusCodeError
+from radikoplaylist.exceptions import HttpRequestTimeoutError
+
+from radikopodcast.database.models import AuthToken
+from radikopodcast.exceptions import UnauthorizedError
+from radikopodcast.radikoapi.authorization import AuthTokenCache
+from radikopodcast.radikoapi.authorization import CachedMasterPlaylistClient
+
+if TYPE_CHECKING:
+    from unittest.mock import MagicMock
+
+    from pytest_mock import MockFixture
+    from requests_mock import Mocker
+
+HEADERS: dict[str, str | bytes] = {
+    "X-Radiko-AreaId": "JP13",
+    "X-Radiko-AuthToken": "HrUNR0zyrGseqvlPl1-khQ",
+    "X-Radiko-Partialkey": b"ZTFlZjJmZDY2YzMyMjA5ZA==",
+}
+
+MASTER_PLAYLIST_URL = "https://radiko.jp/v2/api/ts/playlist.m3u8"
+
+
+@pytest.fixture
+def mock_auth(mocker: MockFixture) -> MagicMock:
+    """Mock Authorization.auth() to count round-trips."""
+    return mocker.patch.object(Authorization, "auth", return_value=HEADERS)
+
+
+@pytest.mark.usefixtures("database_session_with_schema")
+class TestAuthTokenCache:
+    """Tests for AuthTokenCache."""
+
+    @staticmethod
+    def test_get(mock_auth: MagicMock) -> None:
+        """Headers should be authorized once and restored from the database, including bytes values."""
+        assert AuthTokenCache("JP13").get().headers == HEADERS
+        assert AuthTokenCache("JP13").get().headers == HEADERS
+        mock_auth.assert_called_once()
+
+    @staticmethod
+    def test_get_key(mock_auth: MagicMock) -> None:
+        """Headers should be cached for each area ID and radiko_session."""
+        AuthTokenCache("JP13").get()
+        AuthTokenCache("JP27").get()
+        AuthTokenCache("JP13", "session_token").get()
+        expected_call_count = 3
+        assert mock_auth.call_count == expected_call_count
+
+    @staticmethod
+    def test_get_refresh(mock_auth: MagicMock) -> None:
+        """Headers should be refreshed proactively when they are about to expire."""
+        auth_token_cache = AuthTokenCache("JP13")
+        auth_token_cache.get()
+        AuthToken.set(auth_token_cache.token_id, expires_at=AuthTokenCache.now() + AuthTokenCache.TIME_TO_REFRESH / 2)
+        auth_token_cache.get()
+        expected_call_count = 2
+        assert mock_auth.call_count == expected_call_count
+
+    @staticmethod
+    def test_get_locked(mock_auth: MagicMock) -> None:
+        """Current headers should be used while another process refreshes them."""
+        auth_token_cache = AuthTokenCache("JP13")
+        auth_token_cache.get()
+        now = AuthTokenCache.now()
+        AuthToken.set(auth_token_cache.token_id, expires_at=now + AuthTokenCache.TIME_TO_REFRESH / 2)
+        assert AuthToken.lock(auth_token_cache.token_id, "JP13", now, now + AuthTokenCache.TIME_TO_LOCK)
+        assert auth_token_cache.get().headers == HEADERS
+        mock_auth.assert_called_once()
+
+    @staticmethod
+    def test_get_cookie(mock_auth: MagicMock) -> None:
+        """The cookie of the radiko_session shouldn't be stored, but should be restored from the cache."""
+        mock_auth.return_value = {**HEADERS, "Cookie": "radiko_session=session_token"}
+        auth_token_cache = AuthTokenCache("JP13", "session_token")
+        auth_token_cache.get()
+        auth_token = AuthToken.find(auth_token_cache.token_id)
+        assert auth_token is not None
+        assert auth_token.headers is not None
+        assert "session_token" not in auth_token.headers
+        assert "Cookie" not in json.loads(auth_token.headers)["str"]
+        assert AuthTokenCache("JP13", "session_token").get().headers == mock_auth.return_value
+        mock_auth.assert_called_once()
+
+    @staticmethod
+    def test_get_error(mock_auth: MagicMock) -> None:
+        """The lock should be released when authorization failed."""
+        mock_auth.side_effect = HttpRequestTimeoutError
+        auth_token_cache = AuthTokenCache("JP13")
+        with pytest.raises(HttpRequestTimeoutError):
+            auth_token_cache.get()
+        mock_auth.side_effect = None
+        assert auth_token_cache.get().headers == HEADERS
+
+
+@pytest.mark.usefixtures("database_session_with_schema")
+class TestCachedMasterPlaylistClient:
+    """Tests for CachedMasterPlaylistClient."""
+
+    @staticmethod
+    def test_get(mocker: MockFixture, mock_auth: MagicMock) -> None:
+        mocker.patch.object(CachedMasterPlaylistClient, "_get_url", return_value="https://radiko.jp/playlist.m3u8")
+        request = TimeFreeMasterPlaylistRequest("FMJ", 20210116050000, 20210116060000)
+        for _ in range(2):
+            master_playlist = CachedMasterPlaylistClient.get(request, area_id="JP13")
+            assert master_playlist.media_playlist_url == "https://radiko.jp/playlist.m3u8"
+            assert master_playlist.headers == HEADERS
+        mock_auth.assert_called_once()
+
+    @staticmethod
+    def test_get_revoked(mocker: MockFixture, mock_auth: MagicMock) -> None:
+        """Cached headers should be refreshed when radiko rejected them."""
+        mock_get_url = mocker.patch.object(
+            CachedMasterPlaylistClient,
+            "_get_url",
+            side_effect=[UnauthorizedError, "https://radiko.jp/playlist.m3u8"],
+        )
+        request = TimeFreeMasterPlaylistRequest("FMJ", 20210116050000, 20210116060000)
+        assert CachedMasterPlaylistClient.get(request).media_playlist_url == "https://radiko.jp/playlist.m3u8"
+        expected_call_count = 2
+        assert mock_auth.call_count == expected_call_count
+        assert mock_get_url.call_count == expected_call_count
+
+    @staticmethod
+    def test_get_bad_status(mocker: MockFixture, mock_auth: MagicMock) -> None:
+        """Cached headers shouldn't be expired for every process by errors which don't mean they are revoked."""
+        mocker.patch.object(CachedMasterPlaylistClient, "_get_url", side_effect=BadHttpStatusCodeError)
+        request = TimeFreeMasterPlaylistRequest("FMJ", 20210116050000, 20210116060000)
+        with pytest.raises(BadHttpStatusCodeError):
+            CachedMasterPlaylistClient.get(request)
+        assert AuthTokenCache.is_valid(AuthToken.find(AuthTokenCache("JP13").token_id), AuthTokenCache.now())
+        mock_auth.assert_called_once()
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        ("status_code", "expected_error"),
+        [(401, UnauthorizedError), (403, UnauthorizedError), (404, BadHttpStatusCodeError)],
+    )
+    def test_get_url_error(
+        mocker: MockFixture,
+        requests_mock: Mocker,
+        status_code: int,
+        expected_error: type[Exception],
+    ) -> None:
+        """Only 401 and 403 should raise UnauthorizedError."""
+        mocker.patch.object(TimeFreeMasterPlaylistRequest, "build_url", return_value=MASTER_PLAYLIST_URL)
+        requests_mock.get(MASTER_PLAYLIST_URL, status_code=status_code)
+        request = TimeFreeMasterPlaylistRequest("FMJ", 20210116050000, 20210116060000)
+        with pytest.raises(expected_error) as excinfo:
+            # Reason: To test the protected method. pylint: disable=protected-access
+            CachedMasterPlaylistClient._get_url(request, HEADERS)  # noqa: SLF001
+        assert excinfo.type is expected_error
+
+    @staticmethod
+    def test_get_url(mocker: MockFixture, requests_mock: Mocker) -> None:
+        mocker.patch.object(TimeFreeMasterPlaylistRequest, "build_url", return_value=MASTER_PLAYLIST_URL)
+        requests_mock.get(
+            MASTER_PLAYLIST_URL,
+            text="#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=52973\nhttps://radiko.jp/playlist.m3u8\n",
+        )
+        request = TimeFreeMasterPlaylistRequest("FMJ", 20210116050000, 20210116060000)
+        # Reason: To test the protected method. pylint: disable=protected-access
+        assert CachedMasterPlaylistClient._get_url(request, HEADERS) == "https://radiko.jp/playlist.m3u8"  # noqa: SLF001
@@ -9,6 +9,19 @@ from radikopodcast.radikoxml.xml_parser import XmlParserProgram
 from radikopodcast.radikoxml.xml_parser import XmlParserStation
 
 
+class TestXmlParser:
+    """Tests for XmlParser."""
+
+    @staticmethod
+    def test_validate() -> None:
+        """XmlParser should collect errors with the XML of the element."""
+        xml_parser = XmlParserStation(ElementTree.fromstring("<station><id>TBS</id></station>", forbid_dtd=True))
+        assert xml_parser.validate
+        assert [str(error) for error in xml_parser.list_error] == [
+            "Invalid name. XML: <station><id>TBS</id></station>",
+        ]
+
+
 class TestXmlParserStation:
     """Tests for XmlParserStation."""
 
@@ -0,0 +1,111 @@
+# Copyright (C) 2026 Master
+"""Tests for archive_priority.py."""
+
+from __future__ import annotations
+
+import heapq
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from radikopodcast.archive_priority import ARCHIVE_KIND_TIMEFREE30
+from radikopodcast.archive_priority import ArchivePriorityQueue
+from radikopodcast.database.models import Program
+from radikopodcast.programaggregate.host_classifier import HOST_CLASS_FAST
+from radikopodcast.programaggregate.host_classifier import HOST_CLASS_SLOW
+from radikopodcast.radiko_datetime import JST
+
+
+class TestArchivePriorityQueue:
+    """Test for ArchivePriorityQueue."""
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        ("host_class", "timefree30", "now", "expected_kind", "expected_cost", "expected_deadline"),
+        [
+            (
+                HOST_CLASS_FAST,
+                False,
+                datetime(2021, 1, 17, 12, 0, tzinfo=JST),
+                HOST_CLASS_FAST,
+                timedelta(minutes=3),
+                datetime(2021, 1, 24, 5, 0, tzinfo=JST),
+            ),
+            (
+                None,
+                False,
+                datetime(2021, 1, 17, 12, 0, tzinfo=JST),
+                HOST_CLASS_SLOW,
+                timedelta(minutes=30),
+                datetime(2021, 1, 24, 5, 0, tzinfo=JST),
+            ),
+            (
+                HOST_CLASS_FAST,
+                True,
+                datetime(2021, 1, 17, 12, 0, tzinfo=JST),
+                HOST_CLASS_FAST,
+                timedelta(minutes=3),
+                datetime(2021, 2, 16, 5, 0, tzinfo=JST),
+            ),
+            (
+                HOST_CLASS_FAST,
+                True,
+                datetime(2021, 1, 25, 12, 0, tzinfo=JST),
+                ARCHIVE_KIND_TIMEFREE30,
+                timedelta(minutes=30),
+                datetime(2021, 2, 16, 5, 0, tzinfo=JST),
+            ),
+        ],
+    )
+    # Reason: Parameters of test. pylint: disable=too-many-arguments,too-many-positional-arguments
+    def test_estimate(  # noqa: PLR0913
+        model_program: Program,
+        host_class: str | None,
+        *,
+        timefree30: bool,
+        now: datetime,
+        expected_kind: str,
+        expected_cost: timedelta,
+        expected_deadline: datetime,
+    ) -> None:
+        """Method should estimate the cost by the host and the deadline by the time-free window."""
+        priority_queue = ArchivePriorityQueue(number_process=1, timefree30=timefree30)
+        archive_deadline = priority_queue.estimate(model_program, host_class, now)
+        assert archive_deadline.kind == expected_kind
+        assert archive_deadline.cost == expected_cost
+        assert archive_deadline.deadline == expected_deadline
+        assert archive_deadline.latest_start_at == expected_deadline - expected_cost
+
+    @staticmethod
+    def test_deadline_is_removal() -> None:
+        """The deadline should be the moment when ProgramSchedule removes the program."""
+        deadline = ArchivePriorityQueue(number_process=1).compute_deadline(datetime(2021, 1, 16, tzinfo=JST).date())
+        assert deadline == datetime(2021, 1, 24, 5, 0, tzinfo=JST)
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_push_all() -> None:
+        """Method should pop programs in the order of the least slack."""
+        programs = Program.find(["ZAPPA", "ROPPONGI PASSION PIT", "POP OF THE WORLD"])
+        priority_queue = ArchivePriorityQueue(number_process=1)
+        priority_queue.push_all(programs, datetime(2021, 1, 17, 12, 0, tzinfo=JST))
+        assert len(priority_queue) == len(programs)
+        popped = [priority_queue.pop() for _ in programs]
+        assert [archive_deadline.latest_start_at for archive_deadline in popped] == sorted(
+            archive_deadline.latest_start_at for archive_deadline in popped
+        )
+        # The longest program has the least slack since all programs are on the same date.
+        assert popped[0].program.title == "POP OF THE WORLD"
+
+    @staticmethod
+    def test_project_misses(model_program: Program) -> None:
+        """Method should return the programs which finish after the deadline when processed in order."""
+        now = datetime(2021, 1, 24, 4, 0, tzinfo=JST)
+        priority_queue = ArchivePriorityQueue(number_process=2)
+        archive_deadline = priority_queue.estimate(model_program, HOST_CLASS_SLOW, now)
+        for _ in range(3):
+            heapq.heappush(priority_queue.heap, archive_deadline)
+        assert priority_queue.project_misses(now) == []
+        assert priority_queue.project_misses(now, [now + timedelta(minutes=31)]) == [archive_deadline]
+        assert len(priority_queue.project_misses(now + timedelta(minutes=31))) == len(priority_queue)
@@ -0,0 +1,89 @@
+# Copyright (C) 2026 Master
+"""Tests for archive_scheduler.py."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+from radikopodcast.archive_scheduler import ArchiveScheduler
+from radikopodcast.metrics import METRICS
+from radikopodcast.metrics import SEGMENTS_DOWNLOADED
+from radikopodcast.metrics import Metrics
+from radikopodcast.tracing import TRACER
+from radikopodcast.tracing import SpanContext
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from radikopodcast.concurrency import ArchiveLimits
+
+
+async def acquire_segment_download(limits: ArchiveLimits) -> int:
+    async with limits.segment_downloads.acquire():
+        return os.getpid()
+
+
+async def record_segment_downloaded() -> None:
+    METRICS.inc(SEGMENTS_DOWNLOADED)
+
+
+async def trace_stage(parent: SpanContext) -> None:
+    with TRACER.span("stage", parent=parent):
+        pass
+
+
+class TestArchiveScheduler:
+    """Tests for ArchiveScheduler."""
+
+    @staticmethod
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(sys.platform == "win32", reason="test for Linux only")
+    async def test_create_process_task() -> None:
+        """Programs should run in child processes with the limits shared by the manager."""
+        with ArchiveScheduler(max_programs=2, max_segment_downloads=1) as archive_scheduler:
+            limits = archive_scheduler.get_limits()
+            pids = await asyncio.gather(
+                *(archive_scheduler.create_process_task(acquire_segment_download, limits) for _ in range(2)),
+            )
+        assert os.getpid() not in pids
+
+    @staticmethod
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(sys.platform == "win32", reason="test for Linux only")
+    async def test_metrics() -> None:
+        """Metrics of child processes should be aggregated through the queue served by the manager."""
+        with ArchiveScheduler(max_programs=2, metrics=True) as archive_scheduler:
+            await asyncio.gather(
+                *(archive_scheduler.create_process_task(record_segment_downloaded) for _ in range(2)),
+            )
+            assert archive_scheduler.metrics_queue is not None
+            metrics = Metrics()
+            metrics.drain(archive_scheduler.metrics_queue)
+        assert "radikopodcast_segments_downloaded_total 2.0" in metrics.render().splitlines()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(sys.platform == "win32", reason="test for Linux only")
+    async def test_trace_path(tmp_path: Path) -> None:
+        """Spans of child processes should be written into the file, linked to the span in the parent process."""
+        trace_path = tmp_path / "traces.jsonl"
+        parent = SpanContext("0" * 32, "1" * 16)
+        with ArchiveScheduler(max_programs=1, trace_path=trace_path) as archive_scheduler:
+            await archive_scheduler.create_process_task(trace_stage, parent)
+        span = json.loads(trace_path.read_text(encoding="utf-8"))["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        assert span["traceId"] == parent.trace_id
+        assert span["parentSpanId"] == parent.span_id
+
+    @staticmethod
+    def test_not_running() -> None:
+        archive_scheduler = ArchiveScheduler(max_programs=1)
+        with pytest.raises(RuntimeError):
+            archive_scheduler.get_limits()
+        with pytest.raises(RuntimeError):
+            archive_scheduler.create_process_task(acquire_segment_download)
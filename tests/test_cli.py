@@ -20,7 +20,7 @@ from radikopodcast.radiko_podcast import RadikoPodcast
 @freeze_time("2021-01-17 05:16:00", tz_offset=-9, tick=True)
 def test_command_line_interface(runner_in_isolated_filesystem: CliRunner) -> None:
     """Test CLI."""
-    with mock.patch.object(RadikoPodcast, "sleep", side_effect=KeyboardInterrupt):
+    with mock.patch.object(RadikoPodcast, "sleep_until_next_search", side_effect=KeyboardInterrupt):
         result = runner_in_isolated_filesystem.invoke(cli.radiko_podcast)
     assert result.output == ""
     # CTRL + C, 128 + SIGINT
@@ -38,7 +38,7 @@ def test_command_line_interface_error(
     caplog: pytest.LogCaptureFixture,
 ) -> None:
     """Test CLI when error."""
-    with mock.patch.object(RadikoPodcast, "sleep", side_effect=IOError):
+    with mock.patch.object(RadikoPodcast, "sleep_until_next_search", side_effect=IOError):
         result = runner_in_isolated_filesystem.invoke(cli.radiko_podcast)
     assert result.output == ""
     assert result.exit_code == 1
@@ -0,0 +1,331 @@
+# Copyright (C) 2026 Master
+"""Tests for concurrency.py."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import pickle
+import sys
+import threading
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+from radikoplaylist.exceptions import BadHttpStatusCodeError
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+from radikopodcast.concurrency import AdaptiveConcurrencyLimiter
+from radikopodcast.concurrency import ArchiveLimits
+from radikopodcast.concurrency import ArchiveManager
+from radikopodcast.concurrency import ConcurrencyLimiter
+from radikopodcast.concurrency import HostConcurrencyLimiters
+from radikopodcast.concurrency import SharedSlots
+from radikopodcast.concurrency import is_overloaded
+
+
+async def count_max_concurrency(limiters: list[ConcurrencyLimiter], count_task: int) -> int:
+    """Run count_task tasks on each limiter, and return the maximum number of tasks which ran at the same time."""
+    running = 0
+    max_running = 0
+
+    async def run(limiter: ConcurrencyLimiter) -> None:
+        nonlocal running, max_running
+        async with limiter.acquire():
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(run(limiter) for limiter in limiters for _ in range(count_task)))
+    return max_running
+
+
+class TestConcurrencyLimiter:
+    """Tests for ConcurrencyLimiter."""
+
+    @pytest.mark.asyncio
+    async def test_acquire(self) -> None:
+        """Should bound the concurrency in the process."""
+        expected_max_concurrency = 2
+        limiter = ConcurrencyLimiter(expected_max_concurrency)
+        assert await count_max_concurrency([limiter], 10) == expected_max_concurrency
+
+    @pytest.mark.asyncio
+    async def test_acquire_shared(self) -> None:
+        """Should bound the concurrency of all limiters sharing the semaphore."""
+        expected_max_concurrency = 2
+        semaphore = SharedSlots(expected_max_concurrency)
+        limiters = [ConcurrencyLimiter(expected_max_concurrency, semaphore) for _ in range(3)]
+        assert await count_max_concurrency(limiters, 5) == expected_max_concurrency
+        # Reason: To confirm every acquisition was released.
+        assert not semaphore.holders
+
+    @pytest.mark.asyncio
+    async def test_acquire_cancel(self) -> None:
+        """Should release the shared semaphore when the task is cancelled."""
+        semaphore = SharedSlots(1)
+        limiter = ConcurrencyLimiter(1, semaphore)
+
+        async def hold() -> None:
+            async with limiter.acquire():
+                await asyncio.sleep(3600)
+
+        task = asyncio.ensure_future(hold())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not semaphore.holders
+
+    @pytest.mark.asyncio
+    async def test_acquire_cancel_while_waiting(self) -> None:
+        """Should release the slot which the thread acquired after the task waiting for it was cancelled."""
+        semaphore = SharedSlots(1)
+        holder = os.getpid()
+        assert semaphore.acquire(holder, 0)
+        task = asyncio.ensure_future(count_max_concurrency([ConcurrencyLimiter(1, semaphore)], 1))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        semaphore.release(holder)
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.1)
+        assert not semaphore.holders
+
+    @pytest.mark.asyncio
+    async def test_acquire_reclaim(self) -> None:
+        """Should reclaim the slot which the killed process held, instead of waiting for it forever."""
+        process = await asyncio.create_subprocess_exec(sys.executable, "-c", "")
+        await process.wait()
+        semaphore = SharedSlots(1)
+        assert semaphore.acquire(process.pid, 0)
+        assert await count_max_concurrency([ConcurrencyLimiter(1, semaphore)], 2) == 1
+        assert not semaphore.holders
+
+    def test_invalid_limit(self) -> None:
+        with pytest.raises(ValueError, match="limit=0"):
+            ConcurrencyLimiter(0)
+
+    def test_pickle(self) -> None:
+        """The local semaphore should be created again in the process which the limiter is passed to."""
+        limiter = ConcurrencyLimiter(1)
+        asyncio.run(count_max_concurrency([limiter], 1))
+        assert limiter.local_semaphore is not None
+        unpickled_limiter = pickle.loads(pickle.dumps(limiter))  # noqa: S301
+        assert unpickled_limiter.local_semaphore is None
+        assert asyncio.run(count_max_concurrency([unpickled_limiter], 2)) == 1
+
+
+class TestArchiveLimits:
+    """Tests for ArchiveLimits."""
+
+    def test_create_shared(self) -> None:
+        """Limits should share semaphores served by the manager even after they are passed to another process."""
+        with ArchiveManager() as manager:
+            # Reason: The manager releases semaphores when the original proxies are garbage collected.
+            original_limits = ArchiveLimits.create_shared(manager, 1, 2)
+            limits = pickle.loads(pickle.dumps(original_limits))  # noqa: S301
+            assert asyncio.run(count_max_concurrency([limits.discovery_requests], 3)) == 1
+            expected_max_concurrency = 2
+            assert asyncio.run(count_max_concurrency([limits.segment_downloads], 3)) == expected_max_concurrency
+
+
+def create_response_error(status: int) -> BadHttpStatusCodeError:
+    """Create the error which SegmentsFetcher raises for status."""
+    error = BadHttpStatusCodeError("failed in https://example.com/segment.aac.")
+    error.__cause__ = aiohttp.ClientResponseError(MagicMock(), (), status=status)
+    return error
+
+
+@pytest.mark.parametrize(
+    ("error", "expected"),
+    [
+        (create_response_error(429), True),
+        (create_response_error(503), True),
+        (create_response_error(404), False),
+        (asyncio.TimeoutError(), True),
+        (RequestsConnectionError(), True),
+        (ValueError(), False),
+    ],
+)
+def test_is_overloaded(*, error: BaseException, expected: bool) -> None:
+    assert is_overloaded(error) == expected
+
+
+URL = "https://example.com/segment.aac"
+
+
+async def succeed(host_limiters: HostConcurrencyLimiters) -> None:
+    async with host_limiters.acquire(URL):
+        pass
+
+
+async def fail(host_limiters: HostConcurrencyLimiters, error: BaseException) -> None:
+    with pytest.raises(type(error)):
+        async with host_limiters.acquire(URL):
+            raise error
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """Tests for AdaptiveConcurrencyLimiter."""
+
+    @pytest.mark.asyncio
+    async def test_increase(self) -> None:
+        """The window should grow up to max_window while requests succeed."""
+        max_window = 5
+        host_limiters = HostConcurrencyLimiters(max_window)
+        limiter = host_limiters.windows.get("example.com")
+        assert limiter.window == AdaptiveConcurrencyLimiter.INITIAL_WINDOW
+        await succeed(host_limiters)
+        assert limiter.latency is not None
+        assert limiter.in_flight == 0
+        for _ in range(20):
+            limiter.increase(limiter.latency)
+        assert limiter.window == max_window
+        assert limiter.limit == max_window
+
+    def test_increase_slow(self) -> None:
+        """The window should stay while the latency gets worse than the lowest latency."""
+        limiter = AdaptiveConcurrencyLimiter("example.com", 8)
+        limiter.increase(0.1)
+        window = limiter.window
+        for _ in range(5):
+            limiter.increase(1.0)
+        assert limiter.window == window
+
+    @pytest.mark.asyncio
+    async def test_decrease(self) -> None:
+        """The window should be halved on overload, but not on other errors."""
+        host_limiters = HostConcurrencyLimiters(8)
+        limiter = host_limiters.windows.get("example.com")
+        limiter.set_window(8)
+        await fail(host_limiters, create_response_error(404))
+        expected_window = 8
+        assert limiter.window == expected_window
+        await fail(host_limiters, create_response_error(503))
+        expected_window = 4
+        assert limiter.window == expected_window
+        await fail(host_limiters, RequestsConnectionError())
+        expected_window = 2
+        assert limiter.window == expected_window
+        for _ in range(3):
+            await fail(host_limiters, asyncio.TimeoutError())
+        assert limiter.window == 1
+
+    @pytest.mark.asyncio
+    async def test_decrease_burst(self) -> None:
+        """Failures of the requests which started before the decrease should halve the window only once."""
+        host_limiters = HostConcurrencyLimiters(8)
+        limiter = host_limiters.windows.get("example.com")
+        limiter.set_window(8)
+        event = asyncio.Event()
+
+        async def fail_after_event() -> None:
+            async with host_limiters.acquire(URL):
+                await event.wait()
+                raise create_response_error(503)
+
+        tasks = [asyncio.ensure_future(fail_after_event()) for _ in range(4)]
+        await asyncio.sleep(0.1)
+        assert limiter.in_flight == len(tasks)
+        event.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        expected_window = 4
+        assert limiter.window == expected_window
+
+    @pytest.mark.asyncio
+    async def test_acquire(self) -> None:
+        """Requests over the window should wait."""
+        max_window = 2
+        host_limiters = HostConcurrencyLimiters(max_window)
+        running = 0
+        max_running = 0
+
+        async def run() -> None:
+            nonlocal running, max_running
+            async with host_limiters.acquire(URL):
+                running += 1
+                max_running = max(max_running, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(run() for _ in range(6)))
+        assert max_running == max_window
+
+
+class TestHostConcurrencyLimiters:
+    """Tests for HostConcurrencyLimiters."""
+
+    @pytest.mark.asyncio
+    async def test_acquire(self) -> None:
+        """Windows should be adapted for each host, and exposed as stats."""
+        host_limiters = HostConcurrencyLimiters(8)
+        async with host_limiters.acquire("https://a.example.com/playlist.m3u8"):
+            pass
+        with pytest.raises(RequestsConnectionError):
+            async with host_limiters.acquire("https://b.example.com/segment.aac"):
+                raise RequestsConnectionError
+        stats = {stats.host: stats for stats in host_limiters.get_stats()}
+        assert stats["a.example.com"].window > AdaptiveConcurrencyLimiter.INITIAL_WINDOW
+        assert stats["a.example.com"].latency is not None
+        assert stats["b.example.com"].window < AdaptiveConcurrencyLimiter.INITIAL_WINDOW
+        assert stats["b.example.com"].latency is None
+
+    @pytest.mark.asyncio
+    async def test_pickle(self) -> None:
+        """Windows which the manager doesn't serve should be adapted again in the process they are passed to."""
+        host_limiters = HostConcurrencyLimiters(8)
+        async with host_limiters.acquire("https://a.example.com/playlist.m3u8"):
+            pass
+        assert pickle.loads(pickle.dumps(host_limiters)).get_stats() == []  # noqa: S301
+
+    @pytest.mark.asyncio
+    async def test_acquire_bounds_waiting_threads(self) -> None:
+        """Only up to max_window coroutines of the process should wait for the window in threads at the same time."""
+        max_window = 2
+        host_limiters = HostConcurrencyLimiters(max_window)
+        limiter = host_limiters.windows.get("example.com")
+        limiter.set_window(1)
+        holder = os.getpid()
+        assert limiter.acquire(holder, 0) is not None
+        waiting = 0
+        max_waiting = 0
+        acquire = host_limiters.windows.acquire
+        lock = threading.Lock()
+
+        def count_waiting(host: str, holder: int, timeout: float) -> float | None:
+            nonlocal waiting, max_waiting
+            with lock:
+                waiting += 1
+                max_waiting = max(max_waiting, waiting)
+            try:
+                return acquire(host, holder, timeout)
+            finally:
+                with lock:
+                    waiting -= 1
+
+        with patch.object(host_limiters.windows, "acquire", side_effect=count_waiting):
+            tasks = [asyncio.ensure_future(succeed(host_limiters)) for _ in range(8)]
+            await asyncio.sleep(0.1)
+            limiter.release(holder)
+            await asyncio.gather(*tasks)
+        assert max_waiting == max_window
+
+    def test_shared(self) -> None:
+        """A backoff which a program observed should shrink the window which another program sees."""
+        with ArchiveManager() as manager:
+            original_limits = ArchiveLimits.create_shared(manager, 1, 8)
+            # Reason: Each program receives its own copy of the limits pickled by asynccpu.
+            limits_program_a, limits_program_b = (
+                pickle.loads(pickle.dumps(original_limits))  # noqa: S301
+                for _ in range(2)
+            )
+            asyncio.run(fail(limits_program_a.hosts, create_response_error(503)))
+            (stats,) = limits_program_b.hosts.get_stats()
+            assert stats.host == "example.com"
+            assert (
+                stats.window == AdaptiveConcurrencyLimiter.INITIAL_WINDOW * AdaptiveConcurrencyLimiter.DECREASE_FACTOR
+            )
+            assert stats.in_flight == 0
@@ -0,0 +1,110 @@
+# Copyright (C) 2026 Master
+"""Tests for crash_recovery.py."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+import pytest
+
+from radikopodcast.crash_recovery import CrashRecovery
+from radikopodcast.database.models import ArchiveStatusId
+from radikopodcast.database.models import Program
+from radikopodcast.node_lease import NodeLeases
+from radikopodcast.output_directory import OutputDirectory
+from radikopodcast.programaggregate.segment.directory import SegmentDirectory
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+KEYWORD = "ROPPONGI PASSION PIT"
+
+
+class TestCrashRecovery:
+    """Test for CrashRecovery."""
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program", "execution_environment")
+    def test_recover_expired_lease(find_program_by_keyword: Callable[[str], Program]) -> None:
+        """Program whose lease expired should be requeued, only once, with the partial output removed."""
+        output_directory = OutputDirectory()
+        program = find_program_by_keyword(KEYWORD)
+        now = NodeLeases.now()
+        Program.claim([program.id], lease_owner="crashed", lease_expires_at=now + NodeLeases.LEASE_DURATION)
+        output_file_path = output_directory.build_file_path(program)
+        output_file_path.write_bytes(b"partial")
+        segment_directory_path = SegmentDirectory.build_path(output_directory, program)
+        segment_directory_path.mkdir()
+        crash_recovery = CrashRecovery(output_directory)
+        assert crash_recovery.recover(now) == 0
+        later = now + NodeLeases.LEASE_DURATION + timedelta(seconds=1)
+        assert crash_recovery.recover(later) == 1
+        assert crash_recovery.recover(later) == 0
+        program = find_program_by_keyword(KEYWORD)
+        assert program.archive_status == ArchiveStatusId.ARCHIVABLE.value
+        assert program.archive_retry_count == 1
+        assert program.lease_owner is None
+        assert not output_file_path.exists()
+        assert segment_directory_path.exists()
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program", "execution_environment")
+    def test_recover_expired_own_lease_in_flight(find_program_by_keyword: Callable[[str], Program]) -> None:
+        """Program which this node is still archiving should be kept even when its lease expired."""
+        output_directory = OutputDirectory()
+        program = find_program_by_keyword(KEYWORD)
+        now = NodeLeases.now()
+        Program.claim([program.id], lease_owner="node", lease_expires_at=now + NodeLeases.LEASE_DURATION)
+        output_file_path = output_directory.build_file_path(program)
+        output_file_path.write_bytes(b"writing")
+        crash_recovery = CrashRecovery(output_directory, owner="node")
+        later = now + NodeLeases.LEASE_DURATION + timedelta(seconds=1)
+        assert crash_recovery.recover(later, in_flight={program.id}) == 0
+        assert find_program_by_keyword(KEYWORD).archive_status == ArchiveStatusId.ARCHIVING.value
+        assert output_file_path.exists()
+        # Reason: Another node should recover the program since it can't know whether the owner is alive.
+        assert CrashRecovery(output_directory, owner="other").recover(later, in_flight={program.id}) == 1
+        assert not output_file_path.exists()
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program", "execution_environment")
+    def test_recover_suspended(find_program_by_keyword: Callable[[str], Program]) -> None:
+        """Suspended program should be requeued without counting an attempt once its heartbeat is stale."""
+        program = find_program_by_keyword(KEYWORD)
+        Program.claim([program.id])
+        program.mark_suspended()
+        crash_recovery = CrashRecovery(OutputDirectory())
+        now = NodeLeases.now()
+        assert crash_recovery.recover(now) == 0
+        assert crash_recovery.recover(now + CrashRecovery.STALE_AFTER + timedelta(seconds=1)) == 1
+        program = find_program_by_keyword(KEYWORD)
+        assert program.archive_status == ArchiveStatusId.ARCHIVABLE.value
+        assert program.archive_retry_count == 0
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program", "execution_environment")
+    def test_recover_gives_up(find_program_by_keyword: Callable[[str], Program]) -> None:
+        """Program which was left archiving too many times should be marked failed with its segments removed."""
+        output_directory = OutputDirectory()
+        program = find_program_by_keyword(KEYWORD)
+        Program.claim([program.id])
+        segment_directory_path = SegmentDirectory.build_path(output_directory, program)
+        segment_directory_path.mkdir()
+        now = NodeLeases.now() + CrashRecovery.STALE_AFTER + timedelta(seconds=1)
+        assert CrashRecovery(output_directory, max_retry_count=1).recover(now) == 1
+        assert find_program_by_keyword(KEYWORD).archive_status == ArchiveStatusId.FAILED.value
+        assert not segment_directory_path.exists()
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_take_over(find_program_by_keyword: Callable[[str], Program]) -> None:
+        """Only one node should take over the stale program."""
+        program = find_program_by_keyword(KEYWORD)
+        Program.claim([program.id])
+        now = NodeLeases.now() + CrashRecovery.STALE_AFTER + timedelta(seconds=1)
+        stale_programs = Program.find_stale(now, now - CrashRecovery.STALE_AFTER)
+        assert [stale_program.id for stale_program in stale_programs] == [program.id]
+        assert stale_programs[0].take_over(now)
+        assert not stale_programs[0].take_over(now)
+        assert Program.find_stale(now, now - CrashRecovery.STALE_AFTER) == []
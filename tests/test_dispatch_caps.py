@@ -0,0 +1,74 @@
+# Copyright (C) 2026 Master
+"""Tests for dispatch_caps.py."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import pytest
+from sqlalchemy import insert
+
+from radikopodcast.database.models import Program
+from radikopodcast.database.models import Station
+from radikopodcast.dispatch_caps import DispatchCaps
+from radikopodcast.programaggregate.host_classifier import HOST_CLASS_FAST
+from radikopodcast.programaggregate.host_classifier import HOST_CLASS_SLOW
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session as SQLAlchemySession
+
+MAX_CONFIDENCE = 7
+
+
+def find_programs(station_id: str) -> list[Program]:
+    return [program for program in Program.find([""]) if program.station_id == station_id]
+
+
+@pytest.fixture
+def record_station(record_program: SQLAlchemySession) -> SQLAlchemySession:
+    """Prepare the stations of the fixture programs."""
+    for station_id in ("FMJ", "JORF", "BAYFM78"):
+        record_program.execute(insert(Station).values(id=station_id, name=station_id))
+    record_program.commit()
+    return record_program
+
+
+class TestDispatchCaps:
+    """Test for DispatchCaps."""
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_station")
+    def test_station() -> None:
+        """Method should defer programs over the cap of the station until another one is released."""
+        dispatch_caps = DispatchCaps(max_programs_per_station=2)
+        first, second, third, *_ = find_programs("FMJ")
+        assert dispatch_caps.acquire(first)
+        assert dispatch_caps.acquire(second)
+        assert not dispatch_caps.acquire(third)
+        assert dispatch_caps.acquire(find_programs("JORF")[0])
+        dispatch_caps.release(first.id)
+        dispatch_caps.release(first.id)
+        assert dispatch_caps.acquire(third)
+        assert not dispatch_caps.acquire(find_programs("FMJ")[3])
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_station")
+    def test_host() -> None:
+        """Method should defer programs over the cap of the slow host, but not the fast host."""
+        now = datetime(2021, 1, 17)  # noqa: DTZ001
+        Station.record_host_class("FMJ", HOST_CLASS_SLOW, now, MAX_CONFIDENCE, "example.com")
+        Station.record_host_class("JORF", HOST_CLASS_SLOW, now, MAX_CONFIDENCE, "example.com")
+        Station.record_host_class("BAYFM78", HOST_CLASS_FAST, now, MAX_CONFIDENCE, "radiko.jp")
+        dispatch_caps = DispatchCaps(max_programs_per_station=2, max_programs_per_host=1)
+        fmj = find_programs("FMJ")[0]
+        assert dispatch_caps.acquire(fmj)
+        assert not dispatch_caps.acquire(find_programs("JORF")[0])
+        assert all(dispatch_caps.acquire(program) for program in find_programs("BAYFM78")[:2])
+        dispatch_caps.release(fmj.id)
+        assert dispatch_caps.acquire(find_programs("JORF")[0])
+
+    @staticmethod
+    def test_invalid() -> None:
+        with pytest.raises(ValueError, match="max_programs_per_station=0"):
+            DispatchCaps(max_programs_per_station=0)
@@ -0,0 +1,23 @@
+# Copyright (C) 2026 Master
+"""Tests for keyword_matcher.py."""
+
+from radikopodcast.keyword_matcher import KeywordMatcher
+
+
+class TestKeywordMatcher:
+    """Tests for KeywordMatcher."""
+
+    @staticmethod
+    def test_match() -> None:
+        """Matcher should find all keywords including the ones overlapping or suffixes of others."""
+        keyword_matcher = KeywordMatcher(["he", "she", "his", "hers", "ushers!"])
+        assert keyword_matcher.match("ushers") == {"he", "she", "hers"}
+        assert keyword_matcher.match("this") == {"his"}
+        assert keyword_matcher.match("") == set()
+
+    @staticmethod
+    def test_normalize() -> None:
+        """Matcher should find keywords regardless of full-width and half-width forms and cases."""
+        keyword_matcher = KeywordMatcher(["カフェイン11", "STRASSE", ""])
+        assert keyword_matcher.match(KeywordMatcher.normalize("ｶﾌｪｲﾝ11 in Straße")) == {"カフェイン11", "STRASSE", ""}
+        assert keyword_matcher.match(KeywordMatcher.normalize("カフェイン")) == {""}
@@ -0,0 +1,83 @@
+# Copyright (C) 2026 Master
+"""Tests for logging_pipeline.py."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+from radikopodcast.archive_scheduler import ArchiveScheduler
+from radikopodcast.logging_pipeline import LoggingPipeline
+from radikopodcast.logging_pipeline import SampledLogger
+
+if TYPE_CHECKING:
+    from logging import LogRecord
+
+
+async def log_in_child_process() -> None:
+    logger = logging.getLogger(__name__)
+    logger.debug("Debug in child process")
+    logger.info("Info in child process")
+
+
+class TestLoggingPipeline:
+    """Test for LoggingPipeline."""
+
+    @staticmethod
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(sys.platform == "win32", reason="test for Linux only")
+    async def test_child_process(caplog: pytest.LogCaptureFixture) -> None:
+        """Records of child processes should be written by the handlers of the root logger at the level."""
+        root = logging.getLogger()
+        handlers = root.handlers[:]
+        with LoggingPipeline("info") as logging_pipeline:
+            assert root.level == logging.INFO
+            with ArchiveScheduler(
+                max_programs=1,
+                queue=logging_pipeline.queue,
+                configurer=logging_pipeline.create_configurer(),
+            ) as archive_scheduler:
+                await archive_scheduler.create_process_task(log_in_child_process)
+            logging.getLogger(__name__).info("Info in parent process")
+        assert root.handlers == handlers
+        assert "Info in child process" in caplog.messages
+        assert "Debug in child process" not in caplog.messages
+        assert "Info in parent process" in caplog.messages
+
+    @staticmethod
+    def test_queue_given_by_caller() -> None:
+        """Records should be put into the queue given by the caller, whose listener writes them."""
+        records: queue.Queue[LogRecord] = queue.Queue()
+        with LoggingPipeline("warning", records):
+            logging.getLogger(__name__).info("Skipped")
+            logging.getLogger(__name__).warning("Put")
+        assert [record.getMessage() for record in records.queue] == ["Put"]
+
+    @staticmethod
+    def test_not_running() -> None:
+        with pytest.raises(RuntimeError):
+            LoggingPipeline().create_configurer()
+        with pytest.raises(ValueError, match="Unknown log level"):
+            LoggingPipeline("verbose")
+
+
+class TestSampledLogger:
+    """Test for SampledLogger."""
+
+    @staticmethod
+    def test_log(caplog: pytest.LogCaptureFixture) -> None:
+        """Logger should log the first record and every interval-th record, counting skipped records."""
+        caplog.set_level(logging.WARNING)
+        sampled_logger = SampledLogger(logging.getLogger(__name__), 3)
+        for index in range(7):
+            sampled_logger.warning("Retry %d", index)
+            sampled_logger.log(logging.DEBUG, "Not counted")
+        assert caplog.messages == [
+            "Retry 0",
+            "Retry 3 (2 similar records skipped)",
+            "Retry 6 (2 similar records skipped)",
+        ]
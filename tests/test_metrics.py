@@ -0,0 +1,97 @@
+# Copyright (C) 2026 Master
+"""Tests for metrics.py."""
+
+from __future__ import annotations
+
+import queue
+from typing import TYPE_CHECKING
+
+import pytest
+
+from radikopodcast.metrics import ARCHIVE_RETRIES
+from radikopodcast.metrics import FFMPEG_RUN_SECONDS
+from radikopodcast.metrics import METRICS
+from radikopodcast.metrics import PROGRAMS
+from radikopodcast.metrics import SEGMENTS_DOWNLOADED
+from radikopodcast.metrics import Metrics
+from radikopodcast.metrics import MetricsConfigurer
+
+if TYPE_CHECKING:
+    from pytest_mock import MockFixture
+
+    from radikopodcast.metrics import Sample
+
+
+class TestMetrics:
+    """Test for Metrics."""
+
+    @staticmethod
+    def test_render() -> None:
+        """Metrics should be rendered in Prometheus text exposition format."""
+        metrics = Metrics()
+        metrics.inc(SEGMENTS_DOWNLOADED)
+        metrics.inc(SEGMENTS_DOWNLOADED, 2)
+        metrics.set(PROGRAMS, 3, status="archivable")
+        metrics.set(PROGRAMS, 4, status="archivable")
+        metrics.inc(ARCHIVE_RETRIES, reason='say "hi"\n')
+        lines = metrics.render().splitlines()
+        assert "# TYPE radikopodcast_segments_downloaded_total counter" in lines
+        assert "radikopodcast_segments_downloaded_total 3.0" in lines
+        assert 'radikopodcast_programs{status="archivable"} 4' in lines
+        assert 'radikopodcast_archive_retries_total{reason="say \\"hi\\"\\n"} 1.0' in lines
+
+    @staticmethod
+    def test_render_histogram() -> None:
+        """Histogram should be rendered with cumulative buckets, sum and count."""
+        metrics = Metrics()
+        metrics.observe(FFMPEG_RUN_SECONDS, 0.5, purpose="segment")
+        metrics.observe(FFMPEG_RUN_SECONDS, 5.0, purpose="segment")
+        metrics.observe(FFMPEG_RUN_SECONDS, 10000.0, purpose="segment")
+        lines = metrics.render().splitlines()
+        assert 'radikopodcast_ffmpeg_run_seconds_bucket{purpose="segment",le="1.0"} 1' in lines
+        assert 'radikopodcast_ffmpeg_run_seconds_bucket{purpose="segment",le="5.0"} 2' in lines
+        assert 'radikopodcast_ffmpeg_run_seconds_bucket{purpose="segment",le="7200.0"} 2' in lines
+        assert 'radikopodcast_ffmpeg_run_seconds_bucket{purpose="segment",le="+Inf"} 3' in lines
+        assert 'radikopodcast_ffmpeg_run_seconds_sum{purpose="segment"} 10005.5' in lines
+        assert 'radikopodcast_ffmpeg_run_seconds_count{purpose="segment"} 3' in lines
+
+    @staticmethod
+    def test_time(mocker: MockFixture) -> None:
+        """Duration of the block should be observed even when it raised."""
+        mocker.patch("radikopodcast.metrics.time.monotonic", side_effect=[10.0, 12.5])
+        metrics = Metrics()
+        with pytest.raises(RuntimeError), metrics.time(FFMPEG_RUN_SECONDS, purpose="record"):
+            raise RuntimeError
+        assert 'radikopodcast_ffmpeg_run_seconds_sum{purpose="record"} 2.5' in metrics.render().splitlines()
+
+    @staticmethod
+    def test_drain() -> None:
+        """Samples put by child processes should be aggregated by the parent process."""
+        samples: queue.Queue[Sample] = queue.Queue()
+        child1 = Metrics()
+        child2 = Metrics()
+        child1.queue = child2.queue = samples
+        child1.inc(SEGMENTS_DOWNLOADED)
+        child2.inc(SEGMENTS_DOWNLOADED)
+        child2.observe(FFMPEG_RUN_SECONDS, 1.0, purpose="segment")
+        assert child1.values == {}
+        parent = Metrics()
+        expected_count = 3
+        assert parent.drain(samples) == expected_count
+        lines = parent.render().splitlines()
+        assert "radikopodcast_segments_downloaded_total 2.0" in lines
+        assert 'radikopodcast_ffmpeg_run_seconds_count{purpose="segment"} 1' in lines
+
+
+class TestMetricsConfigurer:
+    """Test for MetricsConfigurer."""
+
+    @staticmethod
+    def test_call(mocker: MockFixture) -> None:
+        """Configurer should send metrics to the queue, then call the configurer given by the caller."""
+        samples: queue.Queue[Sample] = queue.Queue()
+        configurer = mocker.MagicMock()
+        mocker.patch.object(METRICS, "queue", None)
+        MetricsConfigurer(samples, configurer)()
+        assert METRICS.queue is samples
+        configurer.assert_called_once_with()
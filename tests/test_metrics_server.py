@@ -0,0 +1,52 @@
+# Copyright (C) 2026 Master
+"""Tests for metrics_server.py."""
+
+from __future__ import annotations
+
+import queue
+import socket
+from typing import TYPE_CHECKING
+
+import aiohttp
+import pytest
+
+from radikopodcast.metrics import METRICS
+from radikopodcast.metrics import SEGMENT_RETRIES
+from radikopodcast.metrics import Metrics
+from radikopodcast.metrics_server import MetricsServer
+
+if TYPE_CHECKING:
+    from pytest_mock import MockFixture
+
+    from radikopodcast.metrics import Sample
+
+
+def find_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+class TestMetricsServer:
+    """Test for MetricsServer."""
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_handle(mocker: MockFixture) -> None:
+        """Server should aggregate samples of child processes and collect gauges on each scrape."""
+        mocker.patch("radikopodcast.metrics_server.METRICS", Metrics())
+        samples: queue.Queue[Sample] = queue.Queue()
+        child = Metrics()
+        child.queue = samples
+        child.inc(SEGMENT_RETRIES)
+        collect = mocker.MagicMock()
+        port = find_free_port()
+        server = MetricsServer(port, samples=samples, collect=collect)
+        url = f"http://127.0.0.1:{port}/metrics"
+        async with server, aiohttp.ClientSession() as session, session.get(url) as response:
+            assert response.status == 200  # noqa: PLR2004
+            assert response.headers["Content-Type"].startswith("text/plain")
+            body = await response.text()
+        assert "radikopodcast_segment_retries_total 1.0" in body.splitlines()
+        collect.assert_called_once_with()
+        assert "radikopodcast_segment_retries_total 1.0" not in METRICS.render().splitlines()
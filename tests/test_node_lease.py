@@ -0,0 +1,97 @@
+# Copyright (C) 2026 Master
+"""Tests for node_lease.py."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+import pytest
+
+from radikopodcast.database.models import ArchiveStatusId
+from radikopodcast.database.models import Lease
+from radikopodcast.database.models import Program
+from radikopodcast.node_lease import NodeLeases
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+class TestLease:
+    """Test for Lease."""
+
+    @staticmethod
+    @pytest.mark.usefixtures("database_session_with_schema")
+    def test_acquire() -> None:
+        """Only one owner should hold the lease until it expires or is released."""
+        now = NodeLeases.now()
+        until = now + NodeLeases.LEASE_DURATION
+        assert Lease.acquire("leader", "node1", now, until)
+        assert not Lease.acquire("leader", "node2", now, until)
+        assert Lease.acquire("leader", "node1", now, until)
+        assert Lease.acquire("leader", "node2", until + timedelta(seconds=1), until + NodeLeases.LEASE_DURATION)
+        Lease.release("leader", "node1")
+        assert not Lease.acquire("leader", "node1", now, until)
+        Lease.release("leader", "node2")
+        assert Lease.acquire("leader", "node1", now, until)
+
+
+class TestNodeLeases:
+    """Test for NodeLeases."""
+
+    @staticmethod
+    @pytest.mark.usefixtures("database_session_with_schema")
+    def test_elect() -> None:
+        """Only one node should be the leader until it resigns."""
+        node1 = NodeLeases("node1")
+        node2 = NodeLeases("node2")
+        assert node1.elect()
+        assert not node2.elect()
+        assert not node2.is_leader
+        node1.resign()
+        assert not node1.is_leader
+        assert node2.elect()
+
+    @staticmethod
+    def test_create_owner() -> None:
+        assert NodeLeases().owner == NodeLeases.create_owner()
+        assert NodeLeases("node1").owner == "node1"
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_claim_disjoint() -> None:
+        """Nodes should claim disjoint programs and record the lease on each of them."""
+        node1 = NodeLeases("node1")
+        node2 = NodeLeases("node2")
+        program_ids = [program.id for program in Program.find(["ROPPONGI PASSION PIT", "ZAPPA"])]
+        claimed1 = Program.claim(program_ids[:1], lease_owner=node1.owner, lease_expires_at=node1.lease_expires_at())
+        claimed2 = Program.claim(program_ids, lease_owner=node2.owner, lease_expires_at=node2.lease_expires_at())
+        assert [program.id for program in claimed1] == program_ids[:1]
+        assert [program.id for program in claimed2] == program_ids[1:]
+        assert claimed1[0].lease_owner == "node1"
+        assert claimed2[0].lease_owner == "node2"
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_heartbeat(find_program_by_keyword: Callable[[str], Program]) -> None:
+        """Heartbeat should renew own leases and the heartbeat of the programs."""
+        node = NodeLeases("node1")
+        program = find_program_by_keyword("ROPPONGI PASSION PIT")
+        Program.claim([program.id], lease_owner=node.owner, lease_expires_at=node.now())
+        assert node.heartbeat([program.id]) == {program.id}
+        program = find_program_by_keyword("ROPPONGI PASSION PIT")
+        assert program.archive_status == ArchiveStatusId.ARCHIVING.value
+        assert program.lease_expires_at is not None
+        assert program.lease_expires_at > node.now()
+        assert program.archive_updated_at is not None
+
+    @staticmethod
+    @pytest.mark.usefixtures("record_program")
+    def test_heartbeat_lost(find_program_by_keyword: Callable[[str], Program]) -> None:
+        """Heartbeat shouldn't renew the lease which another node took over."""
+        node1 = NodeLeases("node1")
+        node2 = NodeLeases("node2")
+        program = find_program_by_keyword("ROPPONGI PASSION PIT")
+        Program.claim([program.id], lease_owner=node2.owner, lease_expires_at=node2.lease_expires_at())
+        assert Program.renew_leases(node1.owner, [program.id], node1.lease_expires_at()) == set()
+        assert Program.renew_leases(node2.owner, [program.id], node2.lease_expires_at()) == {program.id}
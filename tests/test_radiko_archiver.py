@@ -6,10 +6,13 @@ import sys
 from collections.abc import Callable
 from unittest.mock import AsyncMock
 
+import aiohttp
+import ffmpeg
 import pytest
 from asynccpu.process_task_pool_executor import ProcessTaskPoolExecutor
 from pytest_mock import MockFixture
 from radikoplaylist.exceptions import BadHttpStatusCodeError
+from radikoplaylist.exceptions import HttpRequestTimeoutError
 from radikoplaylist.exceptions import NoAvailableUrlError
 from requests.exceptions import ConnectionError as RequestsConnectionError
 
@@ -19,15 +22,22 @@ from radikopodcast.database.models import ArchiveStatusId
 from radikopodcast.database.models import Program
 from radikopodcast.output_directory import OutputDirectory
 from radikopodcast.programaggregate.factory import RadikoProgramAggregateToArchiveFactory
+from radikopodcast.programaggregate.segment.directory import SegmentDirectory
 from radikopodcast.programaggregate.timefree30 import RadikoProgramAggregateToArchiveTimeFree30
 
 
+def claim_program() -> Program:
+    """Claim the program as the dispatcher does before it runs the archive."""
+    (program,) = Program.claim([program.id for program in Program.find(["ROPPONGI PASSION PIT"])])
+    return program
+
+
 class TestRadikoArchiver:
     """Test for RadikoArchiver."""
 
     @pytest.mark.usefixtures("record_program", "mock_master_playlist_client", "mock_ffmpeg_coroutine")
     def test(self) -> None:
-        program = Program.find(["ROPPONGI PASSION PIT"])[0]
+        program = claim_program()
         asyncio.run(RadikoArchiveWorkflow(RadikoProgramAggregateToArchiveFactory(OutputDirectory())).execute(program))
 
     @staticmethod
@@ -39,7 +49,7 @@ class TestRadikoArchiver:
 
         During running RadikoArchiver.archive().
         """
-        program = Program.find(["ROPPONGI PASSION PIT"])[0]
+        program = claim_program()
         radiko_archiver = RadikoArchiveWorkflow(RadikoProgramAggregateToArchiveFactory(OutputDirectory()))
         # Reason: To test that process can teardown when running asynchronous task
         with pytest.raises(KeyboardInterrupt):  # noqa: PT012, SIM117
@@ -55,7 +65,7 @@ class TestRadikoArchiver:
         factory = RadikoProgramAggregateToArchiveFactory(OutputDirectory())
         # Reason: Creating mock.
         factory.ffmpeg_coroutine.execute.side_effect = type_error  # type: ignore[attr-defined]
-        program = Program.find(["ROPPONGI PASSION PIT"])[0]
+        program = claim_program()
         with pytest.raises(type_error):
             asyncio.run(RadikoArchiveWorkflow(factory, stop_if_file_exists=True).execute(program))
 
@@ -64,7 +74,7 @@ class TestRadikoArchiver:
         factory = RadikoProgramAggregateToArchiveFactory(OutputDirectory())
         # Reason: Creating mock.
         factory.ffmpeg_coroutine.execute.side_effect = FileExistsError  # type: ignore[attr-defined]
-        program = Program.find(["ROPPONGI PASSION PIT"])[0]
+        program = claim_program()
         asyncio.run(RadikoArchiveWorkflow(factory).execute(program))
 
     @pytest.mark.asyncio
@@ -72,13 +82,24 @@ class TestRadikoArchiver:
     async def test_timefree30_branch(self, mocker: MockFixture) -> None:
         """When radiko_session is set, RadikoProgramAggregateToArchiveTimeFree30.archive() should be called."""
         mock_archive = mocker.patch.object(RadikoProgramAggregateToArchiveTimeFree30, "archive", new=AsyncMock())
-        program = Program.find(["ROPPONGI PASSION PIT"])[0]
+        program = claim_program()
         factory = RadikoProgramAggregateToArchiveFactory(OutputDirectory(), radiko_session="session_token")
         radiko_archive_workflow = RadikoArchiveWorkflow(factory)
         await radiko_archive_workflow.execute(program)
         mock_archive.assert_called_once()
         assert radiko_archive_workflow.radiko_program_aggregate_factory.radiko_session == "session_token"
 
+    @staticmethod
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("record_program")
+    async def test_not_claimed(mocker: MockFixture, find_program_by_keyword: Callable[[str], Program]) -> None:
+        """Program which isn't claimed, for example, requeued by another node, should not be archived."""
+        create = mocker.patch.object(RadikoProgramAggregateToArchiveFactory, "create")
+        program = Program.find(["ROPPONGI PASSION PIT"])[0]
+        await RadikoArchiveWorkflow(RadikoProgramAggregateToArchiveFactory(OutputDirectory())).execute(program)
+        create.assert_not_called()
+        assert find_program_by_keyword("ROPPONGI PASSION PIT").archive_status == ArchiveStatusId.ARCHIVABLE.value
+
     @staticmethod
     @pytest.mark.asyncio
     @pytest.mark.usefixtures("record_program")
@@ -92,7 +113,7 @@ class TestRadikoArchiver:
             "create",
             side_effect=NoAvailableUrlError([]),
         )
-        program = Program.find(["ROPPONGI PASSION PIT"])[0]
+        program = claim_program()
         await RadikoArchiveWorkflow(RadikoProgramAggregateToArchiveFactory(OutputDirectory())).execute(program)
         found = find_program_by_keyword("ROPPONGI PASSION PIT")
         assert found.archive_status == ArchiveStatusId.FAILED.value
@@ -112,7 +133,7 @@ class TestRadikoArchiver:
             "create",
             side_effect=BadHttpStatusCodeError("failed in https://example.com/playlist.m3u8."),
         )
-        program = Program.find(["ROPPONGI PASSION PIT"])[0]
+        program = claim_program()
         await RadikoArchiveWorkflow(RadikoProgramAggregateToArchiveFactory(OutputDirectory())).execute(program)
         found = find_program_by_keyword("ROPPONGI PASSION PIT")
         assert found.archive_status == ArchiveStatusId.ARCHIVABLE.value
@@ -134,12 +155,42 @@ class TestRadikoArchiver:
             "create",
             side_effect=RequestsConnectionError(),
         )
-        program = Program.find(["ROPPONGI PASSION PIT"])[0]
+        program = claim_program()
+        await RadikoArchiveWorkflow(RadikoProgramAggregateToArchiveFactory(OutputDirectory())).execute(program)
+        found = find_program_by_keyword("ROPPONGI PASSION PIT")
+        assert found.archive_status == ArchiveStatusId.ARCHIVABLE.value
+        assert found.archive_retry_count == 1
+        assert found.archive_retry_at is not None
+        assert "will retry at" in caplog.text
+
+    @staticmethod
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("record_program")
+    @pytest.mark.parametrize(
+        "error",
+        [
+            ffmpeg.Error("ffmpeg", b"", b"Connection timed out"),
+            HttpRequestTimeoutError("timed out in https://example.com/playlist.m3u8."),
+            aiohttp.ClientPayloadError(),
+            asyncio.TimeoutError(),
+        ],
+    )
+    async def test_retry_budget_exhausted(
+        mocker: MockFixture,
+        find_program_by_keyword: Callable[[str], Program],
+        error: Exception,
+    ) -> None:
+        """Errors which the segment retry budget gave up on should requeue the program instead of leaving it."""
+        mocker.patch.object(
+            RadikoProgramAggregateToArchiveFactory,
+            "create",
+            return_value=mocker.MagicMock(archive=AsyncMock(side_effect=error)),
+        )
+        program = claim_program()
         await RadikoArchiveWorkflow(RadikoProgramAggregateToArchiveFactory(OutputDirectory())).execute(program)
         found = find_program_by_keyword("ROPPONGI PASSION PIT")
         assert found.archive_status == ArchiveStatusId.ARCHIVABLE.value
         assert found.archive_retry_count == 1
-        assert "will retry next cycle" in caplog.text
 
     @staticmethod
     @pytest.mark.asyncio
@@ -155,9 +206,51 @@ class TestRadikoArchiver:
             "create",
             side_effect=RequestsConnectionError(),
         )
-        program = Program.find(["ROPPONGI PASSION PIT"])[0]
+        program = claim_program()
         await RadikoArchiveWorkflow(RadikoProgramAggregateToArchiveFactory(OutputDirectory())).execute(program)
         found = find_program_by_keyword("ROPPONGI PASSION PIT")
         assert found.archive_status == ArchiveStatusId.FAILED.value
         assert found.archive_retry_count == MAX_ARCHIVE_RETRY_COUNT
         assert "Giving up" in caplog.text
+
+    @staticmethod
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("record_program_retried", "execution_environment")
+    async def test_retry_exhausted_removes_segment_directory(mocker: MockFixture) -> None:
+        """The segment directory kept to resume should be removed once retries are exhausted."""
+        mocker.patch.object(
+            RadikoProgramAggregateToArchiveFactory,
+            "create",
+            side_effect=RequestsConnectionError(),
+        )
+        program = claim_program()
+        output_directory = OutputDirectory()
+        segment_dir_path = SegmentDirectory.build_path(output_directory, program)
+        segment_dir_path.mkdir()
+        await RadikoArchiveWorkflow(RadikoProgramAggregateToArchiveFactory(output_directory)).execute(program)
+        assert not segment_dir_path.exists()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("record_program")
+    @pytest.mark.parametrize(("error_in_routing", "expected_invalidated"), [(True, True), (False, False)])
+    async def test_invalidate_host_class_only_on_routing_failure(
+        mocker: MockFixture,
+        *,
+        error_in_routing: bool,
+        expected_invalidated: bool,
+    ) -> None:
+        """Host class should be expired only when the host rejects routing, not when segments fail transiently."""
+        error = BadHttpStatusCodeError("failed in https://example.com/playlist.m3u8.")
+        aggregate = mocker.MagicMock(archive=AsyncMock(side_effect=error))
+        mocker.patch.object(
+            RadikoProgramAggregateToArchiveFactory,
+            "create",
+            side_effect=error if error_in_routing else None,
+            return_value=aggregate,
+        )
+        factory = RadikoProgramAggregateToArchiveFactory(OutputDirectory())
+        invalidate = mocker.patch.object(factory.host_classifier, "invalidate")
+        program = claim_program()
+        await RadikoArchiveWorkflow(factory).execute(program)
+        assert invalidate.called is expected_invalidated
@@ -3,12 +3,19 @@
 
 import asyncio
 import sys
+import threading
+from datetime import datetime
 from pathlib import Path
 from unittest import mock
 
 import pytest
 from freezegun.api import freeze_time
 
+from radikopodcast import CONFIG
+from radikopodcast.database.models import Program
+from radikopodcast.metrics import METRICS
+from radikopodcast.radiko_datetime import JST
+from radikopodcast.radiko_datetime import RadikoDatetime
 from radikopodcast.radiko_podcast import RadikoPodcast
 
 
@@ -29,10 +36,133 @@ class TestRadikoPodcast:
         podcast = RadikoPodcast(path_to_configuration=config_yaml)
         with (
             pytest.raises(KeyboardInterrupt),
-            mock.patch.object(RadikoPodcast, "sleep", side_effect=KeyboardInterrupt),
+            mock.patch.object(RadikoPodcast, "sleep_until_next_search", side_effect=KeyboardInterrupt),
         ):
             podcast.run()
 
     @staticmethod
-    def test_sleep() -> None:
-        asyncio.run(RadikoPodcast.sleep(0.1))
+    @pytest.mark.usefixtures("_mock_all")
+    def test_claim(config_yaml: Path) -> None:
+        """Programs should not be queued again while they are in flight."""
+        podcast = RadikoPodcast(path_to_configuration=config_yaml)
+        podcast.program_schedule.add(datetime(2021, 1, 17, 5, 16, tzinfo=JST))
+        programs = Program.find(["ZAPPA"])
+        assert programs
+        claimed_programs = podcast.claim(programs)
+        assert [program.id for program in claimed_programs] == [program.id for program in programs]
+        for program in claimed_programs:
+            program.mark_archivable()
+        assert podcast.claim(programs) == []
+        with mock.patch.object(podcast.wakeup, "wake") as wake:
+            podcast.release(programs[0].id, mock.MagicMock())
+        wake.assert_called_once_with()
+        assert [program.id for program in podcast.claim(programs)] == [programs[0].id]
+
+    @staticmethod
+    @pytest.mark.usefixtures("_mock_all")
+    def test_dispatch(config_yaml: Path) -> None:
+        """Method should dispatch programs in the order of the deadline, up to the free processes."""
+        podcast = RadikoPodcast(path_to_configuration=config_yaml)
+        podcast.program_schedule.add(datetime(2021, 1, 17, 5, 16, tzinfo=JST))
+        # Reason: To match all programs.
+        programs = Program.find([""])
+        assert len(programs) > CONFIG.number_process
+        archive_scheduler = mock.MagicMock()
+        podcast.dispatch(archive_scheduler, programs)
+        assert archive_scheduler.create_process_task.call_count == CONFIG.number_process
+        assert len(podcast.in_flight) == len(podcast.busy_until) == CONFIG.number_process
+        podcast.dispatch(archive_scheduler, programs)
+        assert archive_scheduler.create_process_task.call_count == CONFIG.number_process
+        podcast.release(next(iter(podcast.in_flight)), mock.MagicMock())
+        podcast.dispatch(archive_scheduler, Program.find([""]))
+        assert archive_scheduler.create_process_task.call_count == CONFIG.number_process + 1
+
+    @staticmethod
+    @pytest.mark.usefixtures("_mock_all")
+    def test_revalidate_in_background(config_yaml: Path) -> None:
+        """Method should not block the event loop by revalidation, and should not run it twice at once."""
+        podcast = RadikoPodcast(path_to_configuration=config_yaml)
+        started = threading.Event()
+        release = threading.Event()
+
+        def revalidate_expired(_programs: list[Program]) -> None:
+            started.set()
+            release.wait(10)
+
+        async def run() -> None:
+            with mock.patch.object(
+                podcast.program_aggregate_factory.host_classifier,
+                "revalidate_expired",
+                side_effect=revalidate_expired,
+            ) as mock_revalidate_expired:
+                podcast.revalidate_in_background([])
+                assert await asyncio.to_thread(started.wait, 10)
+                podcast.revalidate_in_background([])
+                release.set()
+                assert podcast.revalidation is not None
+                await podcast.revalidation
+            mock_revalidate_expired.assert_called_once_with([])
+
+        asyncio.run(run())
+
+    @staticmethod
+    @pytest.mark.usefixtures("_mock_all")
+    def test_revalidate_in_background_error(config_yaml: Path, caplog: pytest.LogCaptureFixture) -> None:
+        """Method should log the error which the revalidation raised, since nothing awaits it."""
+        podcast = RadikoPodcast(path_to_configuration=config_yaml)
+
+        async def run() -> None:
+            with mock.patch.object(
+                podcast.program_aggregate_factory.host_classifier,
+                "revalidate_expired",
+                side_effect=RuntimeError("revalidation failed"),
+            ):
+                podcast.revalidate_in_background([])
+                assert podcast.revalidation is not None
+                await asyncio.wait([podcast.revalidation])
+                # Reason: To run the done callback, which the event loop schedules.
+                await asyncio.sleep(0)
+
+        asyncio.run(run())
+        assert "Failed to revalidate host classes" in caplog.text
+        assert "revalidation failed" in caplog.text
+
+    @staticmethod
+    @pytest.mark.usefixtures("_mock_all")
+    def test_collect_metrics(config_yaml: Path) -> None:
+        """Method should publish windows and latencies of hosts as gauges."""
+        podcast = RadikoPodcast(path_to_configuration=config_yaml)
+        podcast.program_aggregate_factory.limits.hosts.windows.get("example.com").increase(0.5)
+        podcast.collect_metrics()
+        rendered = METRICS.render()
+        assert 'radikopodcast_host_concurrency_window{host="example.com"} ' in rendered
+        assert 'radikopodcast_host_latency_seconds{host="example.com"} 0.5' in rendered
+
+    @staticmethod
+    @pytest.mark.usefixtures("_mock_all")
+    def test_sleep_until_next_search(config_yaml: Path) -> None:
+        """Method should sleep until the next search, and reload the configuration when it changes."""
+        podcast = RadikoPodcast(path_to_configuration=config_yaml)
+        next_search_at = RadikoDatetime.now_jst()
+        with (
+            mock.patch.object(podcast.program_schedule, "next_search_at", return_value=next_search_at),
+            mock.patch.object(podcast.wakeup, "sleep_until", return_value=True) as sleep_until,
+            mock.patch.object(podcast, "reload_configuration") as reload_configuration,
+        ):
+            asyncio.run(podcast.sleep_until_next_search())
+        sleep_until.assert_called_once_with(next_search_at)
+        reload_configuration.assert_called_once_with()
+
+    @staticmethod
+    @pytest.mark.usefixtures("_mock_all")
+    def test_reload_configuration(config_yaml: Path, tmp_path: Path) -> None:
+        """Method should keep the current configuration when the file is broken."""
+        path = tmp_path / "config.yml"
+        path.write_text(config_yaml.read_text(encoding="UTF-8"), encoding="UTF-8")
+        podcast = RadikoPodcast(path_to_configuration=path)
+        path.write_text("area_id: JP13\nkeywords:\n  - ZAPPA\n", encoding="UTF-8")
+        podcast.reload_configuration()
+        assert CONFIG.keywords == ["ZAPPA"]
+        path.write_text("keywords: [", encoding="UTF-8")
+        podcast.reload_configuration()
+        assert CONFIG.keywords == ["ZAPPA"]
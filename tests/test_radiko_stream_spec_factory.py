@@ -1,9 +1,8 @@
 # Copyright (C) 2026 Master
 """Tests for radiko_stream_spec_factory.py."""
 
-from dataclasses import dataclass
+from datetime import datetime
 from typing import TYPE_CHECKING
-from typing import Any
 
 import pytest
 
@@ -11,20 +10,18 @@ import pytest
 from ffmpeg.nodes import Stream  # type: ignore[import-untyped]
 
 from radikopodcast.output_directory import OutputDirectory
+from radikopodcast.programaggregate.factory import RadikoProgramAggregateToArchiveFactory
+from radikopodcast.programaggregate.normal import RadikoProgramAggregateToArchiveGeneral
 from radikopodcast.radiko_stream_spec_factory import RadikoStreamSpecFactory
+from radikopodcast.radikoapi.authorization import ExpiringMasterPlaylist
 
 if TYPE_CHECKING:
     from pathlib import Path
+    from unittest.mock import MagicMock
 
     from radikopodcast.database.models import Program
 
 
-@dataclass
-class MasterPlaylist:
-    media_playlist_url: str
-    headers: dict[str, Any]
-
-
 class TestRadikoStreamSpecFactory:
     """Tests for RadikoStreamSpecFactory."""
 
@@ -37,6 +34,39 @@ class TestRadikoStreamSpecFactory:
         assert isinstance(stream_spec, Stream)
         self.check_stream_spec(stream_spec)
 
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("execution_environment", "mock_ffmpeg_coroutine", "database_session_with_schema")
+    async def test_master_playlist_from_factory(
+        self,
+        model_program: "Program",
+        mock_master_playlist_client: "MagicMock",
+    ) -> None:
+        """Master playlist requested to route the program should be reused to record it."""
+        output_directory = OutputDirectory()
+        program_aggregate = RadikoProgramAggregateToArchiveFactory(output_directory).create(model_program)
+        assert isinstance(program_aggregate, RadikoProgramAggregateToArchiveGeneral)
+        radiko_stream_spec_factory = RadikoStreamSpecFactory(
+            model_program,
+            output_directory,
+            program_aggregate.master_playlist,
+        )
+        self.check_stream_spec(await radiko_stream_spec_factory.create())
+        mock_master_playlist_client.assert_called_once()
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("execution_environment")
+    async def test_master_playlist_expired(
+        self,
+        model_program: "Program",
+        mock_master_playlist_client: "MagicMock",
+    ) -> None:
+        """Master playlist should be requested again when it has expired."""
+        master_playlist = ExpiringMasterPlaylist("https://radiko.jp/expired.m3u8", {}, datetime(2021, 1, 16))  # noqa: DTZ001
+        radiko_stream_spec_factory = RadikoStreamSpecFactory(model_program, OutputDirectory(), master_playlist)
+        self.check_stream_spec(await radiko_stream_spec_factory.create())
+        mock_master_playlist_client.assert_called_once()
+        assert radiko_stream_spec_factory.master_playlist is mock_master_playlist_client.return_value
+
     def check_stream_spec(self, stream_spec: Stream) -> None:
         assert "output(c='copy', filename='output/20210116050000_FMJ_ZAPPA.m4a', format='mp4')[None]" in str(
             stream_spec,
@@ -13,16 +13,21 @@ from unittest.mock import MagicMock
 
 import anyio
 import pytest
-from asynccpu import ProcessTaskPoolExecutor
 from radikoplaylist import TimeFree30DayMasterPlaylistRequest
+from radikoplaylist.exceptions import BadHttpStatusCodeError
 from radikoplaylist.exceptions import NoAvailableUrlError
 
 from radikopodcast.output_directory import OutputDirectory
+from radikopodcast.programaggregate.segment.discovery import SegmentsCoverageDiscovery
 from radikopodcast.programaggregate.segment.discovery import SegmentsDiscovery
 from radikopodcast.programaggregate.segment.discovery import get_segment_datetimes
+from radikopodcast.programaggregate.segment.downloader import SegmentsAdtsDownloader
 from radikopodcast.programaggregate.segment.downloader import SegmentsDownloader
+from radikopodcast.programaggregate.segment.muxer import SEGMENT_MUXER_STREAM
+from radikopodcast.programaggregate.segment.muxer import SegmentStreamMuxer
 from radikopodcast.programaggregate.timefree30 import RadikoProgramAggregateToArchiveTimeFree30
 from radikopodcast.radiko_datetime import JST
+from radikopodcast.radiko_datetime import RadikoDatetime
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -42,11 +47,7 @@ _PLAYLIST_TEXT = dedent("""\
 
 
 class TestSegmentsDiscoveryGatherSegmentDatetimes:
-    """Tests for SegmentsDiscovery.gather_segment_datetimes() when every chunk fails.
-
-    ``ProcessTaskPoolExecutor.create_process_task`` is mocked because it spawns real OS subprocesses (via forkserver)
-    that do not inherit mocks applied in this process, and would otherwise reach the real radiko servers.
-    """
+    """Tests for SegmentsDiscovery.gather_segment_datetimes() when every chunk fails."""
 
     @pytest.mark.asyncio
     async def test_error(self, mocker: MockFixture, model_program: Program) -> None:
@@ -54,19 +55,84 @@ class TestSegmentsDiscoveryGatherSegmentDatetimes:
         assert model_program.ft is not None
         model_program.to = model_program.ft + timedelta(seconds=10)
 
-        async def fail_chunk() -> list[datetime]:
-            raise NoAvailableUrlError([])
-
-        mocker.patch.object(
-            ProcessTaskPoolExecutor,
-            "create_process_task",
-            side_effect=lambda *_args, **_kwargs: asyncio.ensure_future(fail_chunk()),
+        mocker.patch(
+            "radikopodcast.programaggregate.segment.discovery.get_segment_datetimes",
+            side_effect=NoAvailableUrlError([]),
         )
         discovery = SegmentsDiscovery(model_program, "JP13", "session_token")
         with pytest.raises(NoAvailableUrlError):
             await discovery.gather_segment_datetimes()
 
 
+class FakeTimeFreeEndpoint:
+    """Fake endpoint which lists 5-second segments from 05:00 to 06:00 in media playlists up to max_listed."""
+
+    def __init__(self, *, max_listed: int = 60, max_requestable_seconds: int = 3600) -> None:
+        self.max_listed = max_listed
+        self.max_requestable_seconds = max_requestable_seconds
+        self.requests: list[tuple[datetime, datetime]] = []
+        self.all_segment_dts = [
+            datetime(2021, 1, 16, 5, 0, 0, tzinfo=JST) + timedelta(seconds=5 * i) for i in range(720)
+        ]
+
+    async def get_segment_datetimes(self, start_at: int, end_at: int) -> list[datetime]:
+        start = RadikoDatetime.decode(str(start_at))
+        end = RadikoDatetime.decode(str(end_at))
+        self.requests.append((start, end))
+        if (end - start).total_seconds() > self.max_requestable_seconds:
+            return []
+        listed = [dt for dt in self.all_segment_dts if start - timedelta(seconds=5) < dt < end]
+        return listed[: self.max_listed]
+
+    def patch(self, mocker: MockFixture) -> None:
+        """Replace get_segment_datetimes() so that discovery requests this endpoint."""
+
+        async def get_segment_datetimes(_station_id: str, start_at: int, end_at: int, *_: object) -> list[datetime]:
+            return await self.get_segment_datetimes(start_at, end_at)
+
+        mocker.patch(
+            "radikopodcast.programaggregate.segment.discovery.get_segment_datetimes",
+            side_effect=get_segment_datetimes,
+        )
+
+
+class TestSegmentsCoverageDiscovery:
+    """Tests for SegmentsCoverageDiscovery."""
+
+    @pytest.mark.asyncio
+    async def test(self, mocker: MockFixture, model_program: Program) -> None:
+        """Should probe only the gaps following the segments which previous media playlists listed."""
+        endpoint = FakeTimeFreeEndpoint()
+        endpoint.patch(mocker)
+        discovery = SegmentsCoverageDiscovery(model_program, "JP13", "session_token")
+        assert await discovery.discover_all_segments() == endpoint.all_segment_dts
+        expected_requests = 12
+        assert len(endpoint.requests) == expected_requests
+
+    @pytest.mark.asyncio
+    async def test_bisect(self, mocker: MockFixture, model_program: Program) -> None:
+        """Should bisect the range when the wide request returns nothing."""
+        endpoint = FakeTimeFreeEndpoint(max_listed=720, max_requestable_seconds=900)
+        endpoint.patch(mocker)
+        discovery = SegmentsCoverageDiscovery(model_program, "JP13", "session_token")
+        assert await discovery.discover_all_segments() == endpoint.all_segment_dts
+        # 1 hour -> 2 x 30 minutes -> 4 x 15 minutes
+        expected_requests = 7
+        assert len(endpoint.requests) == expected_requests
+
+    @pytest.mark.asyncio
+    async def test_no_segment(self, mocker: MockFixture, model_program: Program) -> None:
+        """Should stop bisecting once the range gets narrower than a segment."""
+        endpoint = FakeTimeFreeEndpoint(max_listed=0)
+        model_program.to = datetime(2021, 1, 16, 5, 0, 20, tzinfo=JST)
+        endpoint.patch(mocker)
+        discovery = SegmentsCoverageDiscovery(model_program, "JP13", "session_token")
+        assert await discovery.discover_all_segments() == []
+        # 20 seconds -> 2 x 10 seconds -> 4 x 5 seconds
+        expected_requests = 7
+        assert len(endpoint.requests) == expected_requests
+
+
 @pytest.fixture
 def mock_aiohttp_session(mocker: MockFixture) -> MagicMock:
     """Mock aiohttp.ClientSession to return a canned media playlist."""
@@ -174,6 +240,42 @@ class TestRadikoProgramAggregateToArchiveTimeFree30:
         # Segment directory should be cleaned up
         assert not (execution_environment / "output" / OutputDirectory.build_file_stem(model_program)).exists()
 
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("execution_environment")
+    async def test_stream(self, model_program: Program, mocker: MockFixture) -> None:
+        """Archive() should stream ADTS segments into the muxer instead of concatenating after all downloads."""
+        segment_dt = datetime(2021, 1, 16, 5, 0, 0, tzinfo=JST)
+        mocker.patch.object(
+            SegmentsDiscovery,
+            "discover_all_segments",
+            new=AsyncMock(return_value=[segment_dt]),
+        )
+        mock_stream = mocker.patch.object(SegmentsAdtsDownloader, "stream", new=AsyncMock())
+        mocker.patch.object(SegmentStreamMuxer, "__aenter__", new=AsyncMock())
+        mocker.patch.object(SegmentStreamMuxer, "__aexit__", new=AsyncMock(return_value=False))
+        mock_ffmpeg_run = mocker.patch("radikopodcast.programaggregate.slowapi.ffmpeg.run")
+
+        await RadikoProgramAggregateToArchiveTimeFree30(
+            model_program,
+            OutputDirectory(),
+            "session_token",
+            segment_muxer=SEGMENT_MUXER_STREAM,
+        ).archive()
+
+        mock_stream.assert_called_once()
+        mock_ffmpeg_run.assert_not_called()
+
+    @staticmethod
+    @pytest.mark.usefixtures("execution_environment")
+    def test_unknown_segment_muxer(model_program: Program) -> None:
+        with pytest.raises(ValueError, match="gstreamer"):
+            RadikoProgramAggregateToArchiveTimeFree30(
+                model_program,
+                OutputDirectory(),
+                "session_token",
+                segment_muxer="gstreamer",
+            )
+
     @pytest.mark.asyncio
     async def test_file_exists_error(
         self,
@@ -229,3 +331,42 @@ class TestRadikoProgramAggregateToArchiveTimeFree30:
             ).archive()
 
         assert not (execution_environment / "output" / OutputDirectory.build_file_stem(model_program)).exists()
+
+    @pytest.mark.asyncio
+    async def test_resume_after_transient_error(
+        self,
+        execution_environment: Path,
+        model_program: Program,
+        mocker: MockFixture,
+        tmp_path: Path,
+    ) -> None:
+        """Archive() should keep the segment directory on transient errors and resume without discovery."""
+        segment_dt = datetime(2021, 1, 16, 5, 0, 0, tzinfo=JST)
+        mock_discover = mocker.patch.object(
+            SegmentsDiscovery,
+            "discover_all_segments",
+            new=AsyncMock(return_value=[segment_dt]),
+        )
+        mock_download = mocker.patch.object(
+            SegmentsDownloader,
+            "download",
+            new=AsyncMock(side_effect=BadHttpStatusCodeError("failed in https://example.com/segment.aac.")),
+        )
+        mock_ffmpeg_run = mocker.patch("radikopodcast.programaggregate.slowapi.ffmpeg.run")
+        segment_dir_path = execution_environment / "output" / OutputDirectory.build_file_stem(model_program)
+
+        with pytest.raises(BadHttpStatusCodeError):
+            await RadikoProgramAggregateToArchiveTimeFree30(
+                model_program,
+                OutputDirectory(),
+                "session_token",
+            ).archive()
+        assert (segment_dir_path / "manifest.jsonl").exists()
+
+        mock_download.side_effect = None
+        mock_download.return_value = anyio.Path(tmp_path / "input.txt")
+        await RadikoProgramAggregateToArchiveTimeFree30(model_program, OutputDirectory(), "session_token").archive()
+        mock_discover.assert_called_once()
+        mock_download.assert_called_with([segment_dt])
+        mock_ffmpeg_run.assert_called_once()
+        assert not segment_dir_path.exists()
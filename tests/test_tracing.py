@@ -0,0 +1,97 @@
+# Copyright (C) 2026 Master
+"""Tests for tracing.py."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import TYPE_CHECKING
+from typing import Any
+
+import pytest
+
+from radikopodcast.tracing import STATUS_CODE_ERROR
+from radikopodcast.tracing import TRACER
+from radikopodcast.tracing import Tracer
+from radikopodcast.tracing import TracingConfigurer
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockFixture
+
+
+def load_spans(path: Path) -> dict[str, dict[str, Any]]:
+    """Load spans written by Tracer by their name."""
+    spans = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        span = json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        spans[span["name"]] = span
+    return spans
+
+
+class TestTracer:
+    """Test for Tracer."""
+
+    @staticmethod
+    def test_span(tmp_path: Path) -> None:
+        """Spans should be written as OTLP/JSON lines, linked to the span which started them."""
+        tracer = Tracer()
+        tracer.path = tmp_path / "traces.jsonl"
+        with tracer.span("archive", program_id=1), tracer.span("route") as span:
+            span.set_attribute("aggregate", "SlowApi")
+        spans = load_spans(tracer.path)
+        assert spans["route"]["traceId"] == spans["archive"]["traceId"]
+        assert spans["route"]["parentSpanId"] == spans["archive"]["spanId"]
+        assert "parentSpanId" not in spans["archive"]
+        assert spans["archive"]["attributes"] == [{"key": "program_id", "value": {"intValue": "1"}}]
+        assert spans["route"]["attributes"] == [{"key": "aggregate", "value": {"stringValue": "SlowApi"}}]
+        assert int(spans["route"]["startTimeUnixNano"]) <= int(spans["route"]["endTimeUnixNano"])
+
+    @staticmethod
+    def test_span_error(tmp_path: Path) -> None:
+        """Span should record the error which the block raised."""
+        tracer = Tracer()
+        tracer.path = tmp_path / "traces.jsonl"
+        with pytest.raises(RuntimeError), tracer.span("archive"):
+            raise RuntimeError
+        assert load_spans(tracer.path)["archive"]["status"] == {"code": STATUS_CODE_ERROR, "message": "RuntimeError()"}
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_span_in_tasks(tmp_path: Path) -> None:
+        """Spans in tasks and threads should be linked to the span which started the tasks."""
+        tracer = Tracer()
+        tracer.path = tmp_path / "traces.jsonl"
+
+        async def download(name: str) -> None:
+            with tracer.span(name):
+                await asyncio.to_thread(lambda: tracer.end(tracer.start(f"{name}_thread")))
+
+        with tracer.span("download_segments"):
+            await asyncio.gather(download("segment1"), download("segment2"))
+        spans = load_spans(tracer.path)
+        assert spans["segment1"]["parentSpanId"] == spans["download_segments"]["spanId"]
+        assert spans["segment2"]["parentSpanId"] == spans["download_segments"]["spanId"]
+        assert spans["segment1_thread"]["parentSpanId"] == spans["segment1"]["spanId"]
+
+    @staticmethod
+    def test_disabled(tmp_path: Path) -> None:
+        """Tracer shouldn't write anything while path is None."""
+        tracer = Tracer()
+        with tracer.span("archive"):
+            pass
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestTracingConfigurer:
+    """Test for TracingConfigurer."""
+
+    @staticmethod
+    def test_call(tmp_path: Path, mocker: MockFixture) -> None:
+        """Configurer should make the child process write spans into the file, then call the given configurer."""
+        configurer = mocker.MagicMock()
+        mocker.patch.object(TRACER, "path", None)
+        TracingConfigurer(tmp_path / "traces.jsonl", configurer)()
+        assert TRACER.path == tmp_path / "traces.jsonl"
+        configurer.assert_called_once_with()
@@ -0,0 +1,83 @@
+# Copyright (C) 2026 Master
+"""Tests for wakeup.py."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+import pytest
+
+from radikopodcast.radiko_datetime import RadikoDatetime
+from radikopodcast.wakeup import ArchiveWakeup
+from radikopodcast.wakeup import ConfigWatcher
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockFixture
+
+
+class TestConfigWatcher:
+    """Test for ConfigWatcher."""
+
+    @staticmethod
+    def test_has_changed(tmp_path: Path) -> None:
+        """Method should return True once for each change of the modification time."""
+        path = tmp_path / "config.yml"
+        path.write_text("keywords: []\n", encoding="UTF-8")
+        config_watcher = ConfigWatcher(path)
+        assert not config_watcher.has_changed()
+        modified_at = path.stat().st_mtime_ns + 1_000_000_000
+        os.utime(path, ns=(modified_at, modified_at))
+        assert config_watcher.has_changed()
+        assert not config_watcher.has_changed()
+        path.unlink()
+        assert config_watcher.has_changed()
+
+
+class TestArchiveWakeup:
+    """Test for ArchiveWakeup."""
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_sleep_until() -> None:
+        """Method should sleep until the moment."""
+        duration = 0.2
+        started_at = time.monotonic()
+        assert not await ArchiveWakeup().sleep_until(RadikoDatetime.now_jst() + timedelta(seconds=duration))
+        assert time.monotonic() - started_at >= duration / 2
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_sleep_until_past() -> None:
+        """Method should return immediately when the moment has passed."""
+        started_at = time.monotonic()
+        assert not await ArchiveWakeup().sleep_until(RadikoDatetime.now_jst() - timedelta(hours=1))
+        assert time.monotonic() - started_at < 1
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_wake() -> None:
+        """Method should wake the sleep immediately, and the wake before the sleep should wake it too."""
+        wakeup = ArchiveWakeup()
+        moment = RadikoDatetime.now_jst() + timedelta(hours=1)
+        task = asyncio.ensure_future(wakeup.sleep_until(moment))
+        await asyncio.sleep(0)
+        wakeup.wake()
+        assert not await asyncio.wait_for(task, 1)
+        wakeup.wake()
+        assert not await asyncio.wait_for(wakeup.sleep_until(moment), 1)
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_config_changed(mocker: MockFixture, tmp_path: Path) -> None:
+        """Method should return True when the configuration file changes."""
+        mocker.patch.object(ArchiveWakeup, "CONFIG_POLLING_INTERVAL_SECONDS", new=0.01)
+        path = tmp_path / "config.yml"
+        wakeup = ArchiveWakeup(ConfigWatcher(path))
+        path.write_text("keywords: []\n", encoding="UTF-8")
+        assert await asyncio.wait_for(wakeup.sleep_until(RadikoDatetime.now_jst() + timedelta(hours=1)), 1)
@@ -13,7 +13,8 @@ if TYPE_CHECKING:
     from types import TracebackType
 
     from sqlalchemy.orm import scoped_session
-    from sqlalchemy.orm.session import Session
+
+    from radikopodcast.database.engine import LazyEngineSession
 
 
 class DatabaseEngineManager(AbstractContextManager[Engine]):
@@ -23,7 +24,7 @@ class DatabaseEngineManager(AbstractContextManager[Engine]):
     in the development / production database and inject new engine on every unit testing to run parallel.
     """
 
-    def __init__(self, argument_scoped_session: scoped_session[Session]) -> None:
+    def __init__(self, argument_scoped_session: scoped_session[LazyEngineSession]) -> None:
         self.scoped_session = argument_scoped_session
         self.engine = sqlalchemy.create_engine("sqlite://")
 